@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidate_membership
+from .models import StoreUser
+
+
+@receiver([post_save, post_delete], sender=StoreUser)
+def invalidate_store_access_cache(sender, instance, **kwargs):
+    invalidate_membership(instance.user_id, instance.store_id)
@@ -1,3 +1,1200 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import include, path
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from accounts.models import StoreUser
+from api.v1.urls import build_urlpatterns as build_v1_urlpatterns
+from api.v1.views.inventory import ItemListCreateAPIView
+from api.v1.views.rentals import RentalListCreateAPIView
+from core.cache import catalog_cache_stats
+from core.mixins import resolve_store
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+from core.testing import QueryBudgetMixin
+from core.values import ValuesSerializer
+from inventory import search
+from inventory.models import Category, Item
+from inventory.services import InventoryService
+from rentals.models import Rental
+from rentals.services import RentalService
+from reports.services import ReportsService
+from stores.models import Store
+
+User = get_user_model()
+
+
+class ReadEndpointQueryBudgetTestCase(QueryBudgetMixin, APITestCase):
+    """Every v1 list and detail endpoint must run a bounded number of queries."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        StoreUser.objects.create(user=self.user, store=self.store, role=StoreUser.ROLE_ADMIN)
+        self.client.force_authenticate(self.user)
+        self.counter = 0
+        self.add_rows(3)
+        self.item = Item.objects.filter(store=self.store).first()
+        self.rental = self.store.rentals.first()
+
+    def add_rows(self, count):
+        """Add categories, items and a rental using all of them."""
+        items = []
+        for _ in range(count):
+            self.counter += 1
+            category = Category.objects.create(store=self.store, name=f'Category {self.counter}')
+            items.append(Item.objects.create(
+                store=self.store,
+                category=category,
+                name=f'Item {self.counter}',
+                sku=f'SKU{self.counter:03d}',
+                price=Decimal('10.00'),
+                quantity=10,
+            ))
+        for _ in range(count):
+            RentalService.create_rental(
+                store=self.store,
+                created_by=self.user,
+                customer_name='John Doe',
+                due_date=date.today() + timedelta(days=3),
+                items=[{'item_id': item.id, 'qty': 1, 'per_day': Decimal('2.00')} for item in items],
+            )
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def assertEndpointBudget(self, url, budget):
+        with self.assertMaxQueries(budget):
+            self.get(url)
+
+    def test_whoami(self):
+        self.assertEndpointBudget('/api/v1/auth/whoami/', 1)
+
+    def test_store_access(self):
+        self.assertEndpointBudget(f'/api/v1/auth/store-access/{self.store.id}/', 2)
+
+    def test_category_list(self):
+        url = f'/api/v1/stores/{self.store.id}/categories/'
+        self.assertQueriesConstant(lambda: self.get(url), grow=lambda: self.add_rows(5))
+        self.assertEndpointBudget(url, 4)
+
+    def test_item_list(self):
+        url = f'/api/v1/stores/{self.store.id}/items/'
+        self.assertQueriesConstant(lambda: self.get(url), grow=lambda: self.add_rows(5))
+        # Budgets of conditional-GET endpoints include the ETag validator query
+        self.assertEndpointBudget(url, 5)
+
+    def test_item_detail(self):
+        self.assertEndpointBudget(f'/api/v1/stores/{self.store.id}/items/{self.item.id}/', 4)
+
+    def test_rental_list(self):
+        url = f'/api/v1/stores/{self.store.id}/rentals/'
+        self.assertQueriesConstant(lambda: self.get(url), grow=lambda: self.add_rows(5))
+        self.assertEndpointBudget(url, 6)
+
+    def test_rental_detail(self):
+        url = f'/api/v1/stores/{self.store.id}/rentals/{self.rental.id}/'
+        self.assertQueriesConstant(lambda: self.get(url), grow=lambda: self.add_rows(5))
+        self.assertEndpointBudget(url, 5)
+
+    def test_item_transaction_list(self):
+        url = f'/api/v1/stores/{self.store.id}/items/{self.item.id}/transactions/'
+        self.assertQueriesConstant(lambda: self.get(url), grow=lambda: self.add_rows(5))
+        self.assertEndpointBudget(url, 5)
+
+    def test_item_stock(self):
+        url = f'/api/v1/stores/{self.store.id}/items/{self.item.id}/stock/?at=2100-01-01T00:00:00Z'
+        self.assertQueriesConstant(lambda: self.get(url), grow=lambda: self.add_rows(5))
+        response = self.get(url)
+        self.assertEqual(response.data['quantity'], sum(self.item.transactions.values_list('delta', flat=True)))
+        self.assertEqual(self.client.get(url.split('?')[0]).status_code, 400)
+        self.assertEndpointBudget(url, 5)
+
+
+@override_settings(STORE_ACCESS_CACHE='default')
+class StoreAccessCacheTestCase(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        self.membership = StoreUser.objects.create(user=self.user, store=self.store, role=StoreUser.ROLE_STAFF)
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/v1/stores/{self.store.id}/categories/'
+
+    def test_store_and_membership_cached_across_requests(self):
+        self.client.get(self.url)
+        with self.assertMaxQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_membership_change_invalidates_cache(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.membership.is_active = False
+        self.membership.save()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.membership.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_store_change_invalidates_cache(self):
+        self.client.get(self.url)
+        self.store.name = 'Renamed Store'
+        self.store.save()
+        self.assertEqual(resolve_store(self.store.id).name, 'Renamed Store')
+        self.store.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class KeysetPaginationTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        StoreUser.objects.create(user=self.user, store=self.store, role=StoreUser.ROLE_ADMIN)
+        self.client.force_authenticate(self.user)
+        self.items = [
+            InventoryService.create_item(
+                store=self.store, name=f'Item {i}', sku=f'SKU{i:03d}', price=Decimal('10.00'), quantity=10
+            )
+            for i in range(7)
+        ]
+        self.url = f'/api/v1/stores/{self.store.id}/items/'
+
+    def test_walks_all_rows_in_order(self):
+        ids = []
+        response = self.client.get(self.url, {'pagination': 'keyset', 'page_size': 3})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids.extend(row['id'] for row in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        expected = list(Item.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_count_is_optional(self):
+        response = self.client.get(self.url, {'pagination': 'keyset', 'count': 'true'})
+        self.assertEqual(response.data['count'], 7)
+
+    def test_page_number_pagination_is_default(self):
+        response = self.client.get(self.url, {'page': 2, 'page_size': 5})
+        self.assertEqual(response.data['count'], 7)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_rental_and_transaction_history(self):
+        for _ in range(3):
+            RentalService.create_rental(
+                store=self.store,
+                created_by=self.user,
+                customer_name='John Doe',
+                due_date=date.today() + timedelta(days=3),
+                items=[{'item_id': self.items[0].id, 'qty': 1, 'per_day': Decimal('2.00')}],
+            )
+        response = self.client.get(f'/api/v1/stores/{self.store.id}/rentals/', {'pagination': 'keyset', 'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+        url = f'/api/v1/stores/{self.store.id}/items/{self.items[0].id}/transactions/'
+        response = self.client.get(url, {'pagination': 'keyset'})
+        self.assertEqual([row['delta'] for row in response.data['results']], [-1, -1, -1, 10])
+
+    def test_search_in_both_modes(self):
+        response = self.client.get(self.url, {'search': 'item 3'})
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['sku'], 'SKU003')
+        response = self.client.get(self.url, {'search': 'ite', 'pagination': 'keyset', 'page_size': 5})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNotNone(response.data['next'])
+
+
+class RentalLifecycleAPITestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        StoreUser.objects.create(user=self.user, store=self.store, role=StoreUser.ROLE_STAFF)
+        self.client.force_authenticate(self.user)
+        self.item = InventoryService.create_item(
+            store=self.store, name='Tent', sku='TENT', price=Decimal('10.00'), quantity=5
+        )
+        self.base = f'/api/v1/stores/{self.store.id}'
+
+    def test_reserve_check_availability_start_and_return(self):
+        start = date.today() + timedelta(days=7)
+        response = self.client.post(f'{self.base}/rentals/', {
+            'customer_name': 'John Doe',
+            'starts_on': start.isoformat(),
+            'due_date': (start + timedelta(days=3)).isoformat(),
+            'items': [{'item_id': self.item.id, 'qty': 3, 'per_day': 2}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        rental = self.store.rentals.get()
+        self.assertEqual(rental.status, 'reserved')
+
+        response = self.client.get(f'{self.base}/availability/', {
+            'start': start.isoformat(), 'end': (start + timedelta(days=1)).isoformat(),
+        })
+        self.assertEqual(response.data['items'], [{'item_id': self.item.id, 'available': 2}])
+        response = self.client.get(f'{self.base}/availability/', {
+            'start': date.today().isoformat(), 'end': date.today().isoformat(), 'item_id': self.item.id,
+        })
+        self.assertEqual(response.data['items'], [{'item_id': self.item.id, 'available': 5}])
+
+        response = self.client.post(f'{self.base}/rentals/{rental.id}/start/')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['status'], 'active')
+
+        response = self.client.post(f'{self.base}/rentals/{rental.id}/return/', {'return_all': True}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['status'], 'returned')
+
+    def test_service_errors_are_bad_requests(self):
+        rental = RentalService.create_rental(
+            store=self.store, created_by=self.user, customer_name='John Doe',
+            due_date=date.today() + timedelta(days=3),
+            items=[{'item_id': self.item.id, 'qty': 4, 'per_day': Decimal('2.00')}],
+        )
+        line = rental.items.get()
+
+        response = self.client.post(f'{self.base}/rentals/{rental.id}/start/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, ["Only reserved rentals can be started"])
+        self.assertEqual(response.data[0].code, 'not_reserved')
+
+        response = self.client.post(f'{self.base}/rentals/{rental.id}/return/', {
+            'returned_items': [{'rental_item_id': line.id, 'qty': 5}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0].code, 'over_return')
+
+        start = date.today() + timedelta(days=1)
+        response = self.client.post(f'{self.base}/rentals/', {
+            'customer_name': 'Jane Doe',
+            'starts_on': start.isoformat(),
+            'due_date': (start + timedelta(days=2)).isoformat(),
+            'items': [{'item_id': self.item.id, 'qty': 2, 'per_day': 2}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0].code, 'insufficient_stock')
+        self.assertFalse(self.store.rentals.filter(status='reserved').exists())
+
+    def test_cancel_reservation(self):
+        start = date.today() + timedelta(days=7)
+        rental = RentalService.create_rental(
+            store=self.store, created_by=self.user, customer_name='John Doe', start_date=start,
+            due_date=start + timedelta(days=3), items=[{'item_id': self.item.id, 'qty': 5, 'per_day': Decimal('2.00')}],
+        )
+        response = self.client.post(f'{self.base}/rentals/{rental.id}/cancel/')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['status'], 'cancelled')
+        response = self.client.get(f'{self.base}/availability/', {'start': start.isoformat(), 'end': start.isoformat()})
+        self.assertEqual(response.data['items'], [{'item_id': self.item.id, 'available': 5}])
+
+        self.assertEqual(self.client.post(f'{self.base}/rentals/{rental.id}/cancel/').status_code, 400)
+        self.assertEqual(self.client.post(f'{self.base}/rentals/999999/cancel/').status_code, 404)
+
+    def test_cancelled_reservation_cannot_be_returned(self):
+        start = date.today() + timedelta(days=7)
+        rental = RentalService.create_rental(
+            store=self.store, created_by=self.user, customer_name='John Doe', start_date=start,
+            due_date=start + timedelta(days=3), items=[{'item_id': self.item.id, 'qty': 3, 'per_day': Decimal('2.00')}],
+        )
+        RentalService.cancel_reservation(rental_id=rental.id)
+        response = self.client.post(f'{self.base}/rentals/{rental.id}/return/', {'return_all': True}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0].code, 'cancelled')
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 5)
+        rental.refresh_from_db()
+        self.assertEqual(rental.status, 'cancelled')
+
+    def test_other_store_rentals_cannot_be_returned(self):
+        other_store = Store.objects.create(name='Other Store', slug='other-store')
+        other_item = InventoryService.create_item(
+            store=other_store, name='Kayak', sku='KAYAK', price=Decimal('10.00'), quantity=5
+        )
+        rental = RentalService.create_rental(
+            store=other_store, created_by=None, customer_name='Jane Doe',
+            due_date=date.today() + timedelta(days=3),
+            items=[{'item_id': other_item.id, 'qty': 1, 'per_day': Decimal('2.00')}],
+        )
+        response = self.client.post(f'{self.base}/rentals/{rental.id}/return/', {'return_all': True}, format='json')
+        self.assertEqual(response.status_code, 404)
+        rental.refresh_from_db()
+        self.assertEqual(rental.status, 'active')
+
+    def test_availability_validation(self):
+        response = self.client.get(f'{self.base}/availability/', {'start': '2025-06-05', 'end': '2025-06-01'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(f'{self.base}/availability/', {
+            'start': '2025-06-01', 'end': '2025-06-05', 'item_id': 999999,
+        })
+        self.assertEqual(response.status_code, 404)
+
+
+    def test_list_date_filter_validation(self):
+        for params in ({'date_from': '2024-13-45'}, {'date_to': '2024-02-30'}, {'date_from': 'garbage'}):
+            response = self.client.get(f'{self.base}/rentals/', params)
+            self.assertEqual(response.status_code, 400, params)
+        response = self.client.get(f'{self.base}/rentals/', {'date_from': '2024-02-29'})
+        self.assertEqual(response.status_code, 200)
+
+
+class ItemImportAPITestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        self.membership = StoreUser.objects.create(user=self.user, store=self.store, role=StoreUser.ROLE_ADMIN)
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/v1/stores/{self.store.id}/items/import/'
+
+    def upload(self, name, content, **data):
+        return self.client.post(self.url, {'file': SimpleUploadedFile(name, content.encode()), **data})
+
+    def test_import_csv(self):
+        response = self.upload('items.csv', "name,sku,price,quantity\nTent,TENT,10,3\nStove,,5,1\n")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'], [{'row': 2, 'errors': {'sku': ["This field is required."]}}])
+        self.assertEqual(Item.objects.get(store=self.store, sku='TENT').quantity, 3)
+
+        response = self.upload('items.jsonl', '{"name": "Tent", "sku": "TENT", "price": 10}\n', skip_existing=True)
+        self.assertEqual((response.data['created'], response.data['error_count']), (0, 1))
+
+    def test_unknown_format_and_staff(self):
+        self.assertEqual(self.upload('items.txt', "name,sku,price\n").status_code, 400)
+        self.assertEqual(self.upload('items.txt', "name,sku,price\n", format='csv').status_code, 200)
+        self.membership.role = StoreUser.ROLE_STAFF
+        self.membership.save()
+        self.assertEqual(self.upload('items.csv', "name,sku,price\n").status_code, 403)
+
+
+class ExportAPITestCase(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        StoreUser.objects.create(user=self.user, store=self.store, role=StoreUser.ROLE_STAFF)
+        self.client.force_authenticate(self.user)
+        self.items = [
+            InventoryService.create_item(
+                store=self.store, name=f'Item {i}', sku=f'SKU{i}', price=Decimal('10.00'), quantity=50,
+            )
+            for i in range(2)
+        ]
+        for i in range(5):
+            RentalService.create_rental(
+                store=self.store,
+                created_by=self.user,
+                customer_name=f'Customer {i}',
+                due_date=date.today() + timedelta(days=3),
+                items=[{'item_id': item.id, 'qty': 1, 'per_day': Decimal('2.00')} for item in self.items[:i % 2 + 1]],
+            )
+        self.base = f'/api/v1/stores/{self.store.id}'
+
+    def export(self, path, **params):
+        response = self.client.get(f'{self.base}/{path}/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def ndjson(self, path, **params):
+        return [json.loads(line) for line in self.export(path, **params).splitlines()]
+
+    def test_rental_export_ndjson_and_resume(self):
+        records = self.ndjson('rentals')
+        self.assertEqual([r['customer_name'] for r in records], [f'Customer {i}' for i in range(5)])
+        self.assertEqual([len(r['items']) for r in records], [1, 2, 1, 2, 1])
+        self.assertEqual(records[1]['items'][1]['item_sku'], 'SKU1')
+
+        resumed = self.ndjson('rentals', cursor=records[2]['cursor'])
+        self.assertEqual([r['id'] for r in resumed], [r['id'] for r in records[3:]])
+        filtered = self.ndjson('rentals', item_id=self.items[1].id)
+        self.assertEqual([r['id'] for r in filtered], [records[1]['id'], records[3]['id']])
+
+    def test_rental_export_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('rentals', output='csv'))))
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[1]['id'], rows[2]['id'])
+        self.assertEqual((rows[1]['item_sku'], rows[2]['item_sku']), ('SKU0', 'SKU1'))
+
+    def test_ledger_export(self):
+        records = self.ndjson('transactions', item_id=self.items[0].id)
+        self.assertEqual([r['delta'] for r in records], [50, -1, -1, -1, -1, -1])
+        self.assertEqual(len(self.ndjson('transactions', reason='rental')), 7)
+        rows = list(csv.DictReader(io.StringIO(self.export('transactions', output='csv'))))
+        self.assertEqual(len(rows), 9)
+        self.assertEqual(self.client.get(f'{self.base}/transactions/export/', {'cursor': 'nope'}).status_code, 404)
+
+    def test_export_reads_in_chunks(self):
+        from rentals.selectors import export_rentals
+        # One query for the rentals and one for their lines per chunk of 2, plus the empty final probe
+        with self.assertMaxQueries(6):
+            self.assertEqual(len(list(export_rentals(store=self.store, chunk_size=2))), 5)
+
+
+class LowStockAPITestCase(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        StoreUser.objects.create(user=self.user, store=self.store, role=StoreUser.ROLE_STAFF)
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/v1/stores/{self.store.id}/low-stock/'
+        self.tent = InventoryService.create_item(
+            store=self.store, name='Tent', sku='TENT', price=Decimal('10.00'), quantity=6, reorder_point=6,
+        )
+        InventoryService.create_item(store=self.store, name='Stove', sku='STOVE', price=Decimal('5.00'), quantity=1)
+
+    def test_alerts_and_changes_since_cursor(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual([alert['item']['sku'] for alert in response.data['alerts']], ['STOVE'])
+        self.assertEqual(response.data['changes'], [])
+        cursor = response.data['cursor']
+
+        InventoryService.adjust_stock(item=self.tent, delta=-1, reason=InventoryService.REASON_SALE)
+        InventoryService.adjust_stock(item=self.tent, delta=2, reason=InventoryService.REASON_RETURN)
+        response = self.client.get(self.url, {'since': cursor})
+        changes = [(change['item_sku'], change['kind'], change['quantity']) for change in response.data['changes']]
+        self.assertEqual(changes, [('TENT', 'raised', 5), ('TENT', 'cleared', 7)])
+        self.assertFalse(response.data['has_more'])
+
+        response = self.client.get(self.url, {'since': response.data['cursor']})
+        self.assertEqual(response.data['changes'], [])
+        self.assertEqual(self.client.get(self.url, {'since': 'bogus'}).status_code, 404)
+
+    def test_poll_does_not_grow_with_catalog(self):
+        cursor = self.client.get(self.url).data['cursor']
+
+        def add_items():
+            Item.objects.bulk_create([
+                Item(store=self.store, name=f'Item {i}', sku=f'SKU{i:03d}', price=Decimal('1.00'), quantity=50)
+                for i in range(100)
+            ])
+
+        self.assertQueriesConstant(lambda: self.client.get(self.url, {'since': cursor}), grow=add_items)
+        with self.assertMaxQueries(4):
+            self.client.get(self.url, {'since': cursor})
+
+
+@override_settings(CATALOG_CACHE='default')
+class CatalogCacheTestCase(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        StoreUser.objects.create(user=self.user, store=self.store, role=StoreUser.ROLE_STAFF)
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(store=self.store, name='Tents')
+        self.item = InventoryService.create_item(
+            store=self.store, category=self.category, name='Tent', sku='TENT', price=Decimal('10.00'), quantity=5,
+        )
+        self.items_url = f'/api/v1/stores/{self.store.id}/items/'
+        self.categories_url = f'/api/v1/stores/{self.store.id}/categories/'
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def test_hits_skip_the_database(self):
+        for url in (self.items_url, self.categories_url):
+            miss = self.get(url)
+            self.assertEqual(miss['X-Cache'], 'MISS')
+            # Membership and, for items, the ETag validator
+            with self.assertMaxQueries(3):
+                hit = self.get(url)
+            self.assertEqual(hit['X-Cache'], 'HIT')
+            self.assertEqual(hit.content, miss.content)
+        self.assertEqual(catalog_cache_stats(), {'hits': 2, 'misses': 2})
+
+    def test_writes_bump_the_version(self):
+        self.get(self.items_url)
+        self.get(self.categories_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryService.adjust_stock(item=self.item, delta=-2, reason=InventoryService.REASON_SALE)
+        response = self.get(self.items_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['quantity'], 3)
+        # One version per store covers both lists
+        self.assertEqual(self.get(self.categories_url)['X-Cache'], 'MISS')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Shelters'
+            self.category.save()
+        response = self.get(self.categories_url)
+        self.assertEqual((response['X-Cache'], response.data['results'][0]['name']), ('MISS', 'Shelters'))
+        self.assertEqual(self.get(self.items_url).data['results'][0]['category']['name'], 'Shelters')
+
+    def test_uncommitted_writes_do_not_bump(self):
+        self.get(self.categories_url)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            InventoryService.update_item(item=self.item, name='Dome')
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.get(self.categories_url)['X-Cache'], 'HIT')
+
+    def test_filtered_item_lists_are_not_cached(self):
+        self.get(self.items_url, {'status': 'active'})
+        self.assertNotIn('X-Cache', self.get(self.items_url, {'status': 'active'}))
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def test_pages_are_kept_per_origin(self):
+        InventoryService.create_item(store=self.store, name='Stove', sku='STOVE', price=Decimal('10.00'), quantity=5)
+        params = {'pagination': 'keyset', 'page_size': 1}
+        for host, secure in (('a.example.com', False), ('b.example.com', False), ('a.example.com', True)):
+            response = self.client.get(self.items_url, params, HTTP_HOST=host, secure=secure)
+            self.assertEqual(response['X-Cache'], 'MISS')
+            scheme = 'https' if secure else 'http'
+            self.assertTrue(response.data['next'].startswith(f'{scheme}://{host}/'), response.data['next'])
+        response = self.client.get(self.items_url, params, HTTP_HOST='b.example.com')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertTrue(response.data['next'].startswith('http://b.example.com/'))
+
+    def test_file_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}
+            with override_settings(CACHES={'default': backend}):
+                self.assertEqual(self.get(self.items_url)['X-Cache'], 'MISS')
+                self.assertEqual(self.get(self.items_url)['X-Cache'], 'HIT')
+                with self.captureOnCommitCallbacks(execute=True):
+                    InventoryService.update_item(item=self.item, name='Dome')
+                self.assertEqual(self.get(self.items_url).data['results'][0]['name'], 'Dome')
+                self.assertEqual(catalog_cache_stats(), {'hits': 1, 'misses': 2})
+
+
+class ConditionalGetAPITestCase(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        StoreUser.objects.create(user=self.user, store=self.store, role=StoreUser.ROLE_STAFF)
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(store=self.store, name='Tents')
+        self.item = InventoryService.create_item(
+            store=self.store, category=self.category, name='Tent', sku='TENT', price=Decimal('10.00'), quantity=5,
+        )
+        self.rental = RentalService.create_rental(
+            store=self.store,
+            created_by=self.user,
+            customer_name='John Doe',
+            due_date=date.today() + timedelta(days=3),
+            items=[{'item_id': self.item.id, 'qty': 2, 'per_day': Decimal('2.00')}],
+        )
+        self.base = f'/api/v1/stores/{self.store.id}'
+
+    def assertNotModified(self, url, etag, **params):
+        # Permission checks plus the validator query; nothing is fetched or serialized
+        with self.assertMaxQueries(3):
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def assertModified(self, url, etag, **params):
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response['ETag']
+
+    def test_item_endpoints(self):
+        for url in (f'{self.base}/items/', f'{self.base}/items/{self.item.id}/'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('private', response['Cache-Control'])
+            etag = response['ETag']
+            self.assertNotModified(url, etag)
+
+            InventoryService.adjust_stock(item=self.item, delta=1, reason=InventoryService.REASON_ADJUSTMENT)
+            etag = self.assertModified(url, etag)
+            self.category.name = 'Shelters'
+            self.category.save()
+            etag = self.assertModified(url, etag)
+            self.assertNotModified(url, etag)
+
+    def test_list_etag_covers_filters_and_deletions(self):
+        url = f'{self.base}/items/'
+        etag = self.client.get(url)['ETag']
+        self.assertModified(url, etag, status='archived')
+        other = InventoryService.create_item(store=self.store, name='Stove', sku='STOVE', price=Decimal('5.00'))
+        etag = self.assertModified(url, etag)
+        Item.objects.filter(id=other.id).delete()
+        self.assertModified(url, etag)
+
+    def test_rental_endpoints(self):
+        line = self.rental.items.get()
+        for name, url in (('Family Tent', f'{self.base}/rentals/'), ('Dome', f'{self.base}/rentals/{self.rental.id}/')):
+            etag = self.client.get(url)['ETag']
+            self.assertNotModified(url, etag)
+            # Lines show item names
+            InventoryService.update_item(item=self.item, name=name)
+            etag = self.assertModified(url, etag)
+        RentalService.process_return(rental_id=self.rental.id, returned_items=[
+            {'rental_item_id': line.id, 'qty': 1},
+        ])
+        self.assertModified(url, etag)
+        self.assertEqual(self.client.get(f'{self.base}/rentals/999/').status_code, 404)
+
+
+class ReportAPITestCase(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        self.membership = StoreUser.objects.create(user=self.user, store=self.store, role=StoreUser.ROLE_ADMIN)
+        self.client.force_authenticate(self.user)
+        item = InventoryService.create_item(
+            store=self.store, name='Tent', sku='TENT', price=Decimal('10.00'), quantity=5,
+        )
+        RentalService.create_rental(
+            store=self.store,
+            created_by=self.user,
+            customer_name='John Doe',
+            due_date=date.today() + timedelta(days=3),
+            items=[{'item_id': item.id, 'qty': 2, 'per_day': Decimal('2.00')}],
+        )
+        ReportsService.refresh()
+        self.base = f'/api/v1/stores/{self.store.id}/reports'
+        self.today = date.today().isoformat()
+
+    def test_daily_and_item_reports(self):
+        start = (date.today() - timedelta(days=29)).isoformat()
+        with self.assertMaxQueries(4):
+            response = self.client.get(f'{self.base}/daily/', {'start': start, 'end': self.today})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.data['days']), 30)
+        self.assertEqual(response.data['totals']['revenue'], Decimal('12.00'))
+        self.assertEqual(response.data['totals']['units_out'], 2)
+
+        response = self.client.get(f'{self.base}/items/', {'start': start, 'end': self.today})
+        self.assertEqual(response.data['items'][0]['sku'], 'TENT')
+        self.assertEqual(response.data['items'][0]['stock_delta'], 3)
+
+    def test_validation_and_permissions(self):
+        response = self.client.get(f'{self.base}/daily/', {'start': '2024-01-01', 'end': '2025-06-01'})
+        self.assertEqual(response.status_code, 400)
+        self.membership.role = StoreUser.ROLE_STAFF
+        self.membership.save()
+        response = self.client.get(f'{self.base}/daily/', {'start': self.today, 'end': self.today})
+        self.assertEqual(response.status_code, 403)
+
+
+class ValuesListAPITestCase(QueryBudgetMixin, APITestCase):
+    """List endpoints served from values_list rows must return the serializers' exact bytes."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        StoreUser.objects.create(user=self.user, store=self.store, role=StoreUser.ROLE_ADMIN)
+        self.client.force_authenticate(self.user)
+        tents = Category.objects.create(store=self.store, name='Tents', reorder_point=3)
+        self.items = [
+            InventoryService.create_item(
+                store=self.store, category=tents if i % 2 else None, name=f'Item {i}', sku=f'SKU{i:03d}',
+                description='Sleeps "two" \u00e9' if i == 1 else '', price=Decimal('10.50'),
+                rental_rate=Decimal('1.25') if i % 3 else None, quantity=10, reorder_point=2 if i == 4 else None,
+            )
+            for i in range(7)
+        ]
+        for i in range(3):
+            rental = RentalService.create_rental(
+                store=self.store,
+                created_by=self.user if i else None,
+                customer_name=f'Customer {i}',
+                due_date=date.today() + timedelta(days=3),
+                items=[{'item_id': item.id, 'qty': 1, 'per_day': Decimal('2.00')} for item in self.items[i:i + 3]],
+            )
+        line = rental.items.order_by('id').first()
+        RentalService.process_return(rental_id=rental.id, returned_items=[{'rental_item_id': line.id, 'qty': 1}])
+        Rental.objects.create(store=self.store, customer_name='No lines', due_date=date.today())
+
+    def assertSameContent(self, view, url, params):
+        fast = self.client.get(url, params)
+        self.assertEqual(fast.status_code, 200, fast.content)
+        with mock.patch.object(view, 'use_values_list', False):
+            slow = self.client.get(url, params)
+        self.assertEqual(fast.content, slow.content)
+        return json.loads(fast.content)
+
+    def test_item_list_matches_serializer(self):
+        url = f'/api/v1/stores/{self.store.id}/items/'
+        for params in ({}, {'page': 2, 'page_size': 5}, {'search': 'item'}, {'category': self.items[1].category_id}):
+            self.assertSameContent(ItemListCreateAPIView, url, params)
+        page = self.assertSameContent(ItemListCreateAPIView, url, {'pagination': 'keyset', 'page_size': 4})
+        rest = self.assertSameContent(ItemListCreateAPIView, page['next'], {})
+        self.assertEqual(len(page['results']) + len(rest['results']), 7)
+        with timezone.override('America/New_York'):
+            data = self.assertSameContent(ItemListCreateAPIView, url, {})
+        self.assertFalse(data['results'][0]['created_at'].endswith('Z'))
+
+    def test_rental_list_matches_serializer(self):
+        url = f'/api/v1/stores/{self.store.id}/rentals/'
+        data = self.assertSameContent(RentalListCreateAPIView, url, {})
+        self.assertEqual([len(rental['items']) for rental in data['results']], [0, 3, 3, 3])
+        self.assertSameContent(RentalListCreateAPIView, url, {'item_id': self.items[2].id})
+        page = self.assertSameContent(RentalListCreateAPIView, url, {'pagination': 'keyset', 'page_size': 3})
+        self.assertSameContent(RentalListCreateAPIView, page['next'], {})
+
+    def test_query_counts(self):
+        with self.assertMaxQueries(5):
+            self.client.get(f'/api/v1/stores/{self.store.id}/items/')
+        with self.assertMaxQueries(6):
+            self.client.get(f'/api/v1/stores/{self.store.id}/rentals/')
+
+    def test_unsupported_fields_are_rejected(self):
+        class ItemWithMethodSerializer(serializers.ModelSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Item
+                fields = ['id', 'label']
+
+        with self.assertRaisesMessage(ImproperlyConfigured, 'ItemWithMethodSerializer.label'):
+            ValuesSerializer(ItemWithMethodSerializer)
+
+
+class FastJSONTestCase(APITestCase):
+    """The orjson renderer and parser must accept and produce what DRF's stdlib ones do."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        StoreUser.objects.create(user=self.user, store=self.store, role=StoreUser.ROLE_ADMIN)
+        self.client.force_authenticate(self.user)
+        item = InventoryService.create_item(
+            store=self.store, name='Tent \u00e9\u2028', sku='TENT', price=Decimal('10.00'), quantity=5,
+        )
+        RentalService.create_rental(
+            store=self.store,
+            created_by=self.user,
+            customer_name='John Doe',
+            due_date=date.today() + timedelta(days=3),
+            items=[{'item_id': item.id, 'qty': 2, 'per_day': Decimal('2.00')}],
+        )
+
+    def assertSameBytes(self, data, **kwargs):
+        self.assertEqual(FastJSONRenderer().render(data, **kwargs), JSONRenderer().render(data, **kwargs))
+
+    def test_renders_api_pages_like_drf(self):
+        for path in ('items', 'rentals'):
+            response = self.client.get(f'/api/v1/stores/{self.store.id}/{path}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertSameBytes(response.data)
+            self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_renders_python_values_like_drf(self):
+        self.assertSameBytes({
+            'decimal': Decimal('12.50'),
+            'utc': datetime(2025, 3, 1, 12, 30, 15, 250, tzinfo=dt_timezone.utc),
+            'local': timezone.localtime(timezone.now(), timezone=dt_timezone(timedelta(hours=-5))),
+            'naive': datetime(2025, 3, 1, 12, 30),
+            'day': date(2025, 3, 1),
+            'uuid': uuid.UUID(int=1),
+            'lazy': gettext_lazy('Not found.'),
+            'separators': 'a\u2028b\u2029c',
+            'nested': [(1, 2), {'set': {3}}],
+        })
+        # Handed to the stdlib renderer
+        self.assertSameBytes({1: 'int key', 'big': 2 ** 70})
+        self.assertSameBytes({'a': 1}, renderer_context={'indent': 4})
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_parses_like_drf(self):
+        def parse(parser, body):
+            return parser.parse(io.BytesIO(body), parser_context={'encoding': 'utf-8'})
+
+        for body in (b'{"qty": 2, "per_day": 2.5, "name": "Tent \xc3\xa9"}', b'[1, 2e3, null]', b'{"big": 1180591620717411303424}'):
+            self.assertEqual(parse(FastJSONParser(), body), parse(JSONParser(), body))
+        for body in (b'{"qty": }', b'{"n": NaN}', b''):
+            errors = []
+            for parser in (FastJSONParser(), JSONParser()):
+                with self.assertRaises(ParseError) as caught:
+                    parse(parser, body)
+                errors.append(str(caught.exception.detail))
+            self.assertEqual(errors[0], errors[1])
+
+    def test_stdlib_fallback(self):
+        with mock.patch('core.renderers.orjson', None), mock.patch('core.parsers.orjson', None):
+            self.assertSameBytes({'decimal': Decimal('1.50'), 'day': date(2025, 3, 1)})
+            self.assertEqual(FastJSONParser().parse(io.BytesIO(b'[1, "a"]')), [1, 'a'])
+
+    def test_json_requests(self):
+        item = Item.objects.get(sku='TENT')
+        response = self.client.post(f'/api/v1/stores/{self.store.id}/rentals/', {
+            'customer_name': 'Jane Doe',
+            'due_date': (date.today() + timedelta(days=2)).isoformat(),
+            'items': [{'item_id': item.id, 'qty': 1, 'per_day': 2.5}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        response = self.client.post(
+            f'/api/v1/stores/{self.store.id}/rentals/', b'{"customer_name": ', content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.data['detail'].startswith('JSON parse error'))
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=1, REQUEST_TIMING_HEADER=True, REQUEST_TIMING_LOG_MIN_MS=0)
+class RequestTimingTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        StoreUser.objects.create(user=self.user, store=self.store, role=StoreUser.ROLE_ADMIN)
+        self.client.force_authenticate(self.user)
+        item = InventoryService.create_item(store=self.store, name='Tent', sku='TENT', price=Decimal('10.00'),
+                                            quantity=5)
+        RentalService.create_rental(
+            store=self.store,
+            created_by=self.user,
+            customer_name='John Doe',
+            due_date=date.today() + timedelta(days=3),
+            items=[{'item_id': item.id, 'qty': 2, 'per_day': Decimal('2.00')}],
+        )
+
+    def get(self, path):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/v1/stores/{self.store.id}/{path}')
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_server_timing_header_and_log_line(self):
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            response, queries = self.get('rentals/')
+
+        metrics = dict(metric.split(';', 1) for metric in response['Server-Timing'].split(', '))
+        self.assertEqual(set(metrics), {'db', 'serialize', 'view', 'total'})
+        self.assertIn(f'desc="{queries} queries"', metrics['db'])
+
+        [record] = logs.records
+        self.assertIn(f'route=api/v1/stores/<int:store>/rentals/ store={self.store.id} status=200', record.getMessage())
+        self.assertEqual(record.timing['route'], 'api/v1/stores/<int:store>/rentals/')
+        self.assertEqual(record.timing['store'], self.store.id)
+        self.assertEqual(record.timing['queries'], queries)
+        self.assertGreater(record.timing['serialize_ms'], 0)
+        parts = record.timing['db_ms'] + record.timing['serialize_ms'] + record.timing['view_ms']
+        self.assertLessEqual(parts, record.timing['total_ms'] + 0.01)
+
+    def test_sampling_and_switches(self):
+        with override_settings(REQUEST_TIMING_SAMPLE_RATE=0), self.assertNoLogs('core.timing'):
+            response, _ = self.get('items/')
+        self.assertNotIn('Server-Timing', response)
+
+        with override_settings(REQUEST_TIMING_HEADER=False), self.assertLogs('core.timing', 'INFO'):
+            response, _ = self.get('items/')
+        self.assertNotIn('Server-Timing', response)
+
+        with override_settings(REQUEST_TIMING_LOG_MIN_MS=60_000), self.assertNoLogs('core.timing'):
+            response, _ = self.get('items/')
+        self.assertIn('Server-Timing', response)
+
+        with mock.patch('core.timing.random.random', side_effect=[0.3, 0.7]), \
+                override_settings(REQUEST_TIMING_SAMPLE_RATE=0.5):
+            self.assertIn('Server-Timing', self.get('items/')[0])
+            self.assertNotIn('Server-Timing', self.get('items/')[0])
+
+
+def _record_in_other_process():
+    from core.metrics import OPERATIONS, REGISTRY
+
+    OPERATIONS.inc(operation='create_rental', outcome='success')
+    OPERATIONS.inc(operation='create_rental', outcome='not_found')
+    REGISTRY.flush()
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsTestCase(APITestCase):
+    def setUp(self):
+        from core.metrics import REGISTRY
+
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        self.item = InventoryService.create_item(store=self.store, name='Tent', sku='TENT', price=Decimal('10.00'),
+                                                 quantity=5)
+        REGISTRY.reset()
+        self.addCleanup(REGISTRY.reset)
+
+    def rent(self, qty):
+        return RentalService.create_rental(
+            store=self.store,
+            created_by=self.user,
+            customer_name='John Doe',
+            due_date=date.today() + timedelta(days=3),
+            items=[{'item_id': self.item.id, 'qty': qty, 'per_day': Decimal('2.00')}] * 2,
+        )
+
+    def scrape(self, **headers):
+        response = self.client.get('/metrics', **{'HTTP_AUTHORIZATION': 'Bearer secret', **headers})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        return response.content.decode().splitlines()
+
+    def test_operations_by_outcome(self):
+        from django.core.exceptions import ValidationError
+
+        rental = self.rent(1)
+        with self.assertRaises(ValidationError):
+            self.rent(3)
+        RentalService.process_return(rental_id=rental.id, return_all=True)
+        for rental_id in (rental.id, 0):
+            with self.assertRaises(ValidationError):
+                RentalService.process_return(rental_id=rental_id, return_all=True)
+        with self.assertRaises(ValueError):
+            InventoryService.adjust_stock(item=self.item, delta=-99, reason=InventoryService.REASON_ADJUSTMENT)
+
+        lines = self.scrape()
+        for sample in (
+            'service_operations_total{operation="create_rental",outcome="success"} 1',
+            'service_operations_total{operation="create_rental",outcome="insufficient_stock"} 1',
+            'service_operations_total{operation="process_return",outcome="success"} 1',
+            'service_operations_total{operation="process_return",outcome="already_returned"} 1',
+            'service_operations_total{operation="process_return",outcome="not_found"} 1',
+            'service_operations_total{operation="adjust_stock",outcome="insufficient_stock"} 1',
+            'service_operation_duration_seconds_count{operation="create_rental"} 2',
+            'service_operation_lock_wait_seconds_count{operation="process_return"} 3',
+            'rental_lines_per_rental_bucket{le="1"} 0',
+            'rental_lines_per_rental_bucket{le="2"} 1',
+            'rental_lines_per_rental_bucket{le="+Inf"} 1',
+            'rental_lines_per_rental_sum 2',
+            '# TYPE service_operation_duration_seconds histogram',
+        ):
+            self.assertIn(sample, lines)
+
+    def test_adds_up_worker_processes(self):
+        import multiprocessing
+
+        from core.metrics import OPERATIONS
+
+        OPERATIONS.inc(operation='create_rental', outcome='success')
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            context = multiprocessing.get_context('fork')
+            for _ in range(2):
+                worker = context.Process(target=_record_in_other_process)
+                worker.start()
+                worker.join()
+                self.assertEqual(worker.exitcode, 0)
+            lines = self.scrape()
+
+        self.assertIn('service_operations_total{operation="create_rental",outcome="success"} 3', lines)
+        self.assertIn('service_operations_total{operation="create_rental",outcome="not_found"} 2', lines)
+
+    def test_flush_errors_do_not_fail_operations(self):
+        import threading
+
+        from core.metrics import OPERATIONS, REGISTRY
+
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(METRICS_DIR=directory, METRICS_FLUSH_INTERVAL=0):
+            with mock.patch('core.metrics.os.replace', side_effect=FileNotFoundError), \
+                    self.assertLogs('core.metrics', 'WARNING'):
+                self.rent(1)
+
+            errors = []
+
+            def record():
+                try:
+                    for _ in range(50):
+                        OPERATIONS.inc(operation='create_rental', outcome='success')
+                except Exception as exc:
+                    errors.append(exc)
+
+            threads = [threading.Thread(target=record) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(errors, [])
+            REGISTRY.flush()
+            snapshot = json.loads(REGISTRY.snapshot_path(directory).read_text())
+
+        samples = dict((tuple(key), value) for key, value in snapshot['service_operations_total']['samples'])
+        self.assertEqual(samples[('create_rental', 'success')], 401)
+
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        self.scrape(HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(self.client.post('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 405)
+
+    def test_closed_without_token(self):
+        with override_settings(METRICS_TOKEN=None):
+            response = self.client.get('/metrics')
+            self.assertEqual(response.status_code, 403)
+            self.assertNotIn(b'service_operations_total', response.content)
+            with override_settings(DEBUG=True):
+                self.scrape(HTTP_AUTHORIZATION='')
+
+
+class OperationCommitMetricsTestCase(TransactionTestCase):
+    """Operations that commit: their on_commit callbacks are not part of the figures."""
+
+    def setUp(self):
+        from core.metrics import REGISTRY
+
+        REGISTRY.reset()
+        self.addCleanup(REGISTRY.reset)
+
+    def test_duration_and_lock_wait_end_at_commit(self):
+        from core.metrics import REGISTRY, track_operation
+
+        callbacks = []
+
+        @track_operation('create_store')
+        @transaction.atomic
+        def create_store():
+            Store.objects.create(name='Test Store', slug='test-store')
+            transaction.on_commit(lambda: (time.sleep(0.2), callbacks.append(True)))
+
+        create_store()
+        self.assertEqual(callbacks, [True])
+        samples = {
+            (name, tuple(labels)): value
+            for name, metric in REGISTRY.collect().items()
+            for labels, value in metric['samples']
+        }
+        _, duration, count = samples['service_operation_duration_seconds', ('create_store',)]
+        self.assertEqual(count, 1)
+        self.assertLess(duration, 0.2)
+        _, waited, count = samples['service_operation_lock_wait_seconds', ('create_store',)]
+        self.assertEqual(count, 1)
+        self.assertLess(waited, 0.2)
+
+
+# URLconf of AsyncReadViewTestCase: the v1 API with its async read views
+urlpatterns = [path('api/v1/', include(build_v1_urlpatterns(async_reads=True)))]
+
+
+@override_settings(ROOT_URLCONF='api.tests')
+class AsyncReadViewTestCase(TestCase):
+    """The async read views answer exactly as the sync ones, without a synchronous query."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        StoreUser.objects.create(user=self.user, store=self.store, role=StoreUser.ROLE_ADMIN)
+        category = Category.objects.create(store=self.store, name='Camping')
+        items = [
+            InventoryService.create_item(store=self.store, category=category if i % 2 else None, name=f'Item {i}',
+                                         sku=f'SKU{i}', price=Decimal('10.00'), quantity=5)
+            for i in range(3)
+        ]
+        self.item = items[0]
+        self.rental = RentalService.create_rental(
+            store=self.store,
+            created_by=self.user,
+            customer_name='John Doe',
+            due_date=date.today() + timedelta(days=3),
+            items=[{'item_id': item.id, 'qty': 1, 'per_day': Decimal('2.00')} for item in items],
+        )
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    async def compare(self, path, **headers):
+        """Async response to ``path``, checked against the sync view's."""
+        with override_settings(ROOT_URLCONF='config.urls'):
+            expected = await sync_to_async(self.client.get)(path, headers=headers)
+        response = await self.async_client.get(path, headers=headers)
+        self.assertEqual(response.status_code, expected.status_code, response.content)
+        if expected.status_code != 304:
+            self.assertEqual(response.json(), expected.json())
+        self.assertEqual(response.get('ETag'), expected.get('ETag'))
+        return response
+
+    async def test_matches_sync_views(self):
+        store = f'/api/v1/stores/{self.store.id}'
+        for path in (
+            '/api/v1/auth/whoami/',
+            f'{store}/categories/',
+            f'{store}/items/',
+            f'{store}/items/?page=2&page_size=2',
+            f'{store}/items/?page=9',
+            f'{store}/items/?pagination=keyset&page_size=2&count=true',
+            f'{store}/items/?is_rentable=true&search=Item',
+            f'{store}/items/{self.item.id}/',
+            f'{store}/items/0/',
+            f'{store}/rentals/',
+            f'{store}/rentals/?pagination=keyset',
+            f'{store}/rentals/{self.rental.id}/',
+            f'{store}/rentals/0/',
+            '/api/v1/stores/0/items/',
+        ):
+            with self.subTest(path=path):
+                await self.compare(path)
+
+        # Cursor from the async keyset page, then the page after it
+        first = await self.compare(f'{store}/items/?pagination=keyset&page_size=2')
+        await self.compare(first.json()['next'].replace('http://testserver', ''))
+
+        etag = (await self.compare(f'{store}/rentals/')).get('ETag')
+        response = await self.compare(f'{store}/rentals/', if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+
+    async def test_authentication_and_membership(self):
+        store = f'/api/v1/stores/{self.store.id}'
+        outsider = await User.objects.acreate(username='outsider')
+        await self.async_client.aforce_login(outsider)
+        await sync_to_async(self.client.force_login)(outsider)
+        self.assertEqual((await self.compare(f'{store}/items/')).status_code, 403)
+
+        await self.async_client.alogout()
+        await sync_to_async(self.client.logout)()
+        self.assertEqual((await self.compare(f'{store}/items/')).status_code, 403)
+        self.assertEqual((await self.compare('/api/v1/auth/whoami/')).status_code, 403)
+
+        credentials = base64.b64encode(b'testuser:testpass123').decode()
+        response = await self.compare(f'{store}/rentals/', authorization=f'Basic {credentials}')
+        self.assertEqual(response.status_code, 200)
+        response = await self.compare(f'{store}/rentals/', authorization='Basic d3Jvbmc6d3Jvbmc=')
+        self.assertEqual(response.status_code, 403)
+
+    async def test_search_availability_checked_off_the_event_loop(self):
+        store = f'/api/v1/stores/{self.store.id}'
+        for path in (f'{store}/items/?search=item', f'{store}/categories/?search=camp'):
+            with self.subTest(path=path):
+                await sync_to_async(search.reset_availability)()
+                response = await self.async_client.get(path)
+                self.assertEqual(response.status_code, 200, response.content)
+                search.reset_availability()
+                await self.compare(path)
+
+    async def test_catalog_cache(self):
+        url = f'/api/v1/stores/{self.store.id}/categories/'
+        with override_settings(CATALOG_CACHE='default'):
+            await sync_to_async(cache.clear)()
+            self.assertEqual((await self.async_client.get(url))['X-Cache'], 'MISS')
+            self.assertEqual((await self.async_client.get(url))['X-Cache'], 'HIT')
+
+    def test_other_methods_use_the_sync_view(self):
+        response = self.client.post(
+            f'/api/v1/stores/{self.store.id}/items/',
+            {'store': self.store.id, 'name': 'Lantern', 'sku': 'LANTERN', 'price': '5.00', 'quantity': 2},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        response = self.client.options(f'/api/v1/stores/{self.store.id}/rentals/{self.rental.id}/')
+        self.assertEqual(response.status_code, 200)
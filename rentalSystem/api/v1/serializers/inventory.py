@@ -1,12 +1,12 @@
 from rest_framework import serializers
 
-from inventory.models import Item, Category, InventoryTransaction
+from inventory.models import Item, Category, InventoryTransaction, LowStockAlert, LowStockEvent
 
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ['id', 'name']
+        fields = ['id', 'name', 'reorder_point']
 
 
 class InventoryTransactionSerializer(serializers.ModelSerializer):
@@ -28,9 +28,9 @@ class ItemSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'store', 'store_name', 'category', 'category_id', 'name', 'sku', 'description', 
             'is_rentable', 'is_sellable', 'price', 'rental_rate', 'quantity', 'status', 
-            'created_at', 'updated_at'
+            'reorder_point', 'low_stock_threshold', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'low_stock_threshold', 'created_at', 'updated_at']
 
 
 class ItemCreateSerializer(serializers.ModelSerializer):
@@ -40,7 +40,7 @@ class ItemCreateSerializer(serializers.ModelSerializer):
         model = Item
         fields = [
             'store', 'category_id', 'name', 'sku', 'description', 'is_rentable', 'is_sellable', 
-            'price', 'rental_rate', 'quantity', 'status'
+            'price', 'rental_rate', 'quantity', 'status', 'reorder_point'
         ]
 
     def create(self, validated_data):
@@ -66,7 +66,7 @@ class ItemUpdateSerializer(serializers.ModelSerializer):
         model = Item
         fields = [
             'category_id', 'name', 'description', 'is_rentable', 'is_sellable', 
-            'price', 'rental_rate', 'status'
+            'price', 'rental_rate', 'status', 'reorder_point'
         ]
 
     def update(self, instance, validated_data):
@@ -81,4 +81,74 @@ class ItemUpdateSerializer(serializers.ModelSerializer):
                 ).first()
             instance.category = category
         
-        return InventoryService.update_item(item=instance, **validated_data) 
\ No newline at end of file
+        return InventoryService.update_item(item=instance, **validated_data)
+
+
+class StockQuerySerializer(serializers.Serializer):
+    """Either ``at`` for a point-in-time quantity, or ``start`` and ``end`` for a range."""
+    at = serializers.DateTimeField(required=False)
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if 'at' in attrs:
+            if 'start' in attrs or 'end' in attrs:
+                raise serializers.ValidationError("Pass either at, or start and end")
+            return attrs
+        if 'start' not in attrs or 'end' not in attrs:
+            raise serializers.ValidationError("Pass either at, or start and end")
+        if attrs['end'] < attrs['start']:
+            raise serializers.ValidationError({'end': "End must not be before start"})
+        return attrs
+
+
+class ItemImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=['csv', 'ndjson'], required=False)
+    # Omitted booleans read as False in multipart forms, so the flag opts out of updates
+    skip_existing = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        from inventory import importer
+        if 'format' not in attrs:
+            upload = attrs['file']
+            fmt = importer.detect_format(upload.name, getattr(upload, 'content_type', ''))
+            if fmt is None:
+                raise serializers.ValidationError({'format': "Cannot tell the file format; pass csv or ndjson"})
+            attrs['format'] = fmt
+        return attrs
+
+
+class TransactionExportQuerySerializer(serializers.Serializer):
+    output = serializers.ChoiceField(choices=['csv', 'ndjson'], default='ndjson')
+    cursor = serializers.CharField(required=False)
+    item_id = serializers.IntegerField(required=False)
+    reason = serializers.ChoiceField(choices=InventoryTransaction.REASON_CHOICES, required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+
+class LowStockQuerySerializer(serializers.Serializer):
+    since = serializers.CharField(required=False)
+
+
+class LowStockItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Item
+        fields = ['id', 'name', 'sku', 'quantity', 'low_stock_threshold']
+
+
+class LowStockAlertSerializer(serializers.ModelSerializer):
+    item = LowStockItemSerializer(read_only=True)
+
+    class Meta:
+        model = LowStockAlert
+        fields = ['item', 'raised_at']
+
+
+class LowStockEventSerializer(serializers.ModelSerializer):
+    item_sku = serializers.CharField(source='item.sku', read_only=True)
+
+    class Meta:
+        model = LowStockEvent
+        fields = ['id', 'item', 'item_sku', 'kind', 'quantity', 'threshold', 'created_at']
@@ -28,9 +28,9 @@ class RentalSerializer(serializers.ModelSerializer):
         model = Rental
         fields = [
             'id', 'store', 'store_name', 'created_by', 'created_by_username', 'customer_name', 
-            'start_date', 'due_date', 'returned_date', 'status', 'total', 'items'
+            'start_date', 'starts_on', 'due_date', 'returned_date', 'status', 'total', 'items'
         ]
-        read_only_fields = ['id', 'start_date', 'status', 'items']
+        read_only_fields = ['id', 'start_date', 'starts_on', 'status', 'items']
 
 
 class RentalCreateSerializer(serializers.ModelSerializer):
@@ -41,7 +41,7 @@ class RentalCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Rental
-        fields = ['customer_name', 'due_date', 'items']
+        fields = ['customer_name', 'starts_on', 'due_date', 'items']
         read_only_fields = ['store', 'created_by']
 
     def validate_items(self, value):
@@ -71,20 +71,47 @@ class RentalCreateSerializer(serializers.ModelSerializer):
             customer_name=validated_data['customer_name'],
             due_date=validated_data['due_date'],
             items=items_data,
+            start_date=validated_data.get('starts_on'),
         )
 
+    def to_representation(self, instance):
+        return RentalSerializer(instance, context=self.context).data
+
+
+class AvailabilityQuerySerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    item_id = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if attrs['end'] < attrs['start']:
+            raise serializers.ValidationError({'end': "End must not be before start"})
+        return attrs
+
+
+class RentalExportQuerySerializer(serializers.Serializer):
+    """Query parameters of the rental export: the ``list_rentals`` filters plus output and cursor."""
+    output = serializers.ChoiceField(choices=['csv', 'ndjson'], default='ndjson')
+    cursor = serializers.CharField(required=False)
+    status = serializers.ChoiceField(choices=Rental.STATUS_CHOICES, required=False)
+    item_id = serializers.IntegerField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
 
 class RentalReturnSerializer(serializers.Serializer):
     returned_items = serializers.ListField(
         child=serializers.DictField(),
+        required=False,
         help_text="List of items being returned with rental_item_id, qty, condition, damage_cost"
     )
+    return_all = serializers.BooleanField(
+        default=False,
+        help_text="Return every outstanding quantity not listed in returned_items"
+    )
 
     def validate_returned_items(self, value):
         """Validate returned items data."""
-        if not value:
-            raise serializers.ValidationError("At least one item must be returned")
-        
         for item_data in value:
             if 'rental_item_id' not in item_data:
                 raise serializers.ValidationError("Each item must have rental_item_id")
@@ -95,10 +122,18 @@ class RentalReturnSerializer(serializers.Serializer):
         
         return value
 
+    def validate(self, attrs):
+        if not attrs.get('returned_items') and not attrs.get('return_all'):
+            raise serializers.ValidationError({'returned_items': "At least one item must be returned"})
+        return attrs
+
     def save(self, **kwargs):
         from rentals.services import RentalService
-        rental_id = self.context['rental_id']
+        rental = self.context['rental']
+        request = self.context.get('request')
         return RentalService.process_return(
-            rental_id=rental_id, 
-            returned_items=self.validated_data['returned_items']
-        ) 
\ No newline at end of file
+            rental_id=rental.id,
+            returned_items=self.validated_data.get('returned_items', []),
+            return_all=self.validated_data['return_all'],
+            actor=request.user if request else None,
+        )
\ No newline at end of file
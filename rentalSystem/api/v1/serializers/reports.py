@@ -0,0 +1,18 @@
+from rest_framework import serializers
+
+# Longest range a report request may cover, in days
+MAX_REPORT_DAYS = 366
+
+
+class ReportQuerySerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    item_id = serializers.IntegerField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=1000, default=50)
+
+    def validate(self, attrs):
+        if attrs['end'] < attrs['start']:
+            raise serializers.ValidationError({'end': "End must not be before start"})
+        if (attrs['end'] - attrs['start']).days >= MAX_REPORT_DAYS:
+            raise serializers.ValidationError({'end': f"Range must not exceed {MAX_REPORT_DAYS} days"})
+        return attrs
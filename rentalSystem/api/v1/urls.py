@@ -1,26 +1,57 @@
+from django.conf import settings
 from django.urls import path
-from api.v1.views.auth import WhoAmIView, LoginView, LogoutView, StoreAccessView
+from api.v1.views.auth import WhoAmIView, WhoAmIAsyncView, LoginView, LogoutView, StoreAccessView
 from api.v1.views.inventory import (
-    CategoryListAPIView, ItemListCreateAPIView, ItemDetailAPIView
+    CategoryListAPIView, CategoryListAsyncAPIView, ItemListCreateAPIView, ItemListAsyncAPIView, ItemDetailAPIView,
+    ItemDetailAsyncAPIView, ItemTransactionListAPIView, ItemStockAPIView, ItemImportAPIView, TransactionExportAPIView,
+    LowStockAPIView,
 )
 from api.v1.views.rentals import (
-    RentalListCreateAPIView, RentalDetailAPIView, RentalReturnAPIView
+    RentalListCreateAPIView, RentalListAsyncAPIView, RentalDetailAPIView, RentalDetailAsyncAPIView,
+    RentalReturnAPIView, RentalStartAPIView, RentalCancelAPIView, AvailabilityAPIView, RentalExportAPIView,
 )
+from api.v1.views.reports import DailyReportAPIView, ItemReportAPIView
 
-urlpatterns = [
-    # Authentication endpoints
-    path("auth/whoami/", WhoAmIView.as_view()),
-    path("auth/login/", LoginView.as_view()),
-    path("auth/logout/", LogoutView.as_view()),
-    path("auth/store-access/<int:store_id>/", StoreAccessView.as_view()),
+
+def build_urlpatterns(*, async_reads: bool):
+    """
+    The v1 routes. With ``async_reads``, GETs of the item, category and rental
+    lists and details and of whoami are served by their async views.
+    """
+    def read(sync_view, async_view):
+        return (async_view if async_reads else sync_view).as_view()
+
+    return [
+        # Authentication endpoints
+        path("auth/whoami/", read(WhoAmIView, WhoAmIAsyncView)),
+        path("auth/login/", LoginView.as_view()),
+        path("auth/logout/", LogoutView.as_view()),
+        path("auth/store-access/<int:store_id>/", StoreAccessView.as_view()),
     
-    # Store-scoped inventory endpoints
-    path("stores/<int:store>/categories/", CategoryListAPIView.as_view()),
-    path("stores/<int:store>/items/", ItemListCreateAPIView.as_view()),
-    path("stores/<int:store>/items/<int:pk>/", ItemDetailAPIView.as_view()),
+        # Store-scoped inventory endpoints
+        path("stores/<int:store>/categories/", read(CategoryListAPIView, CategoryListAsyncAPIView)),
+        path("stores/<int:store>/items/", read(ItemListCreateAPIView, ItemListAsyncAPIView)),
+        path("stores/<int:store>/items/import/", ItemImportAPIView.as_view()),
+        path("stores/<int:store>/transactions/export/", TransactionExportAPIView.as_view()),
+        path("stores/<int:store>/low-stock/", LowStockAPIView.as_view()),
+        path("stores/<int:store>/items/<int:pk>/", read(ItemDetailAPIView, ItemDetailAsyncAPIView)),
+        path("stores/<int:store>/items/<int:pk>/transactions/", ItemTransactionListAPIView.as_view()),
+        path("stores/<int:store>/items/<int:pk>/stock/", ItemStockAPIView.as_view()),
+
+        # Store-scoped rental endpoints
+        path("stores/<int:store>/rentals/", read(RentalListCreateAPIView, RentalListAsyncAPIView)),
+        path("stores/<int:store>/rentals/export/", RentalExportAPIView.as_view()),
+        path("stores/<int:store>/rentals/<int:pk>/", read(RentalDetailAPIView, RentalDetailAsyncAPIView)),
+        path("stores/<int:store>/rentals/<int:pk>/return/", RentalReturnAPIView.as_view()),
+        path("stores/<int:store>/rentals/<int:pk>/start/", RentalStartAPIView.as_view()),
+        path("stores/<int:store>/rentals/<int:pk>/cancel/", RentalCancelAPIView.as_view()),
+        path("stores/<int:store>/availability/", AvailabilityAPIView.as_view()),
+
+        # Store-scoped reports, read from the daily rollups
+        path("stores/<int:store>/reports/daily/", DailyReportAPIView.as_view()),
+        path("stores/<int:store>/reports/items/", ItemReportAPIView.as_view()),
+    ]
+
 
-    # Store-scoped rental endpoints
-    path("stores/<int:store>/rentals/", RentalListCreateAPIView.as_view()),
-    path("stores/<int:store>/rentals/<int:pk>/", RentalDetailAPIView.as_view()),
-    path("stores/<int:store>/rentals/<int:pk>/return/", RentalReturnAPIView.as_view()),
-]
+# API_ASYNC_READS is on under ASGI (see rentalSystem/asgi.py)
+urlpatterns = build_urlpatterns(async_reads=getattr(settings, 'API_ASYNC_READS', False))
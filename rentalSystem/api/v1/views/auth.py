@@ -5,31 +5,47 @@ from rest_framework.permissions import AllowAny
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import AnonymousUser
 from accounts.models import StoreUser
+from core.asyncviews import AsyncReadMixin
 
 
 class WhoAmIView(APIView):
     def get(self, request):
         user = request.user
         if user.is_authenticated:
-            # Get user's store memberships
-            store_memberships = StoreUser.objects.filter(
-                user=user, 
-                is_active=True
-            ).select_related('store').values(
-                'store__id', 
-                'store__name', 
-                'store__slug', 
-                'role'
-            )
-            
-            return Response({
-                "id": user.id, 
-                "username": user.get_username(),
-                "email": user.email,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "store_memberships": list(store_memberships)
-            })
+            return Response(self.describe(user, list(self.get_memberships(user))))
+        return Response({"anonymous": True})
+
+    @staticmethod
+    def get_memberships(user):
+        return StoreUser.objects.filter(
+            user=user, 
+            is_active=True
+        ).select_related('store').values(
+            'store__id', 
+            'store__name', 
+            'store__slug', 
+            'role'
+        )
+
+    @staticmethod
+    def describe(user, store_memberships):
+        return {
+            "id": user.id, 
+            "username": user.get_username(),
+            "email": user.email,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "store_memberships": store_memberships
+        }
+
+
+class WhoAmIAsyncView(AsyncReadMixin, WhoAmIView):
+    """``WhoAmIView`` with GET on the async ORM, for ASGI."""
+
+    async def aget(self, request):
+        user = request.user
+        if user.is_authenticated:
+            return Response(self.describe(user, [row async for row in self.get_memberships(user)]))
         return Response({"anonymous": True})
 
 
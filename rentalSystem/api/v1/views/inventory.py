@@ -1,17 +1,34 @@
+from django.shortcuts import get_object_or_404
 from rest_framework import generics
+from rest_framework.exceptions import NotFound
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from core.pagination import DefaultPagination
-from core.mixins import TenancyMixin, IsStoreMember
-from inventory.models import Item, Category
+from core.asyncviews import AsyncListMixin, AsyncReadMixin, AsyncRetrieveMixin
+from core.pagination import DefaultPagination, SelectablePagination
+from inventory import search
+from core.mixins import (
+    CatalogCacheMixin, ConditionalGetMixin, TenancyMixin, ValuesListMixin, IsStoreMember, IsStoreAdmin,
+    aupdated_at_validator, updated_at_validator,
+)
+from inventory.models import Item, Category, InventoryTransaction, LowStockEvent
 from ..serializers.inventory import (
     ItemSerializer,
     ItemCreateSerializer,
     ItemUpdateSerializer,
     CategorySerializer,
+    InventoryTransactionSerializer,
+    ItemImportSerializer,
+    LowStockAlertSerializer,
+    LowStockEventSerializer,
+    LowStockQuerySerializer,
+    StockQuerySerializer,
+    TransactionExportQuerySerializer,
 )
 
 
-class CategoryListAPIView(TenancyMixin, generics.ListAPIView):
+class CategoryListAPIView(CatalogCacheMixin, TenancyMixin, generics.ListAPIView):
     serializer_class = CategorySerializer
     pagination_class = DefaultPagination
     permission_classes = [IsStoreMember]
@@ -23,10 +40,32 @@ class CategoryListAPIView(TenancyMixin, generics.ListAPIView):
         return list_categories(store=store, search=search)
 
 
-class ItemListCreateAPIView(TenancyMixin, generics.ListCreateAPIView):
+class AsyncSearchMixin:
+    """
+    Checks for the search index before a ``?search=`` list builds its queryset.
+
+    ``get_queryset`` would otherwise introspect the database on the event
+    loop the first time. Goes before ``AsyncReadMixin``.
+    """
+
+    async def aget(self, request, *args, **kwargs):
+        if request.query_params.get('search'):
+            await search.ais_available()
+        return await super().aget(request, *args, **kwargs)
+
+
+class CategoryListAsyncAPIView(AsyncSearchMixin, AsyncReadMixin, CategoryListAPIView, AsyncListMixin):
+    """``CategoryListAPIView`` with GET on the async ORM, for ASGI."""
+
+
+class ItemListCreateAPIView(ConditionalGetMixin, CatalogCacheMixin, ValuesListMixin, TenancyMixin,
+                            generics.ListCreateAPIView):
     serializer_class = ItemSerializer
-    pagination_class = DefaultPagination
+    pagination_class = SelectablePagination
+    keyset_ordering = ('-created_at', '-id')
+    use_values_list = True
     permission_classes = [IsStoreMember]
+    filter_params = ('search', 'is_rentable', 'is_sellable', 'status', 'category')
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -57,16 +96,171 @@ class ItemListCreateAPIView(TenancyMixin, generics.ListCreateAPIView):
             category=category
         )
 
+    def get_validator(self):
+        return updated_at_validator(self.get_queryset())
+
+    def is_catalog_cacheable(self):
+        # Only the unfiltered catalog pages; filtered reads are too varied to be worth keeping
+        return not any(self.request.query_params.get(name) for name in self.filter_params)
+
+
+class ItemListAsyncAPIView(AsyncSearchMixin, AsyncReadMixin, ItemListCreateAPIView, AsyncListMixin):
+    """``ItemListCreateAPIView`` with GET on the async ORM, for ASGI."""
+
+    async def aget_validator(self):
+        return await aupdated_at_validator(self.get_queryset())
+
 
-class ItemDetailAPIView(TenancyMixin, generics.RetrieveUpdateDestroyAPIView):
+class ItemImportAPIView(TenancyMixin, APIView):
+    """Create or update items by SKU from an uploaded CSV or NDJSON file."""
+    permission_classes = [IsStoreAdmin]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, **kwargs):
+        from inventory.services import InventoryService
+        serializer = ItemImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        report = InventoryService.import_items(
+            store=self.get_store(),
+            stream=data['file'],
+            fmt=data['format'],
+            actor=request.user,
+            update_existing=not data['skip_existing'],
+        )
+        return Response(report.as_dict())
+
+
+class ItemDetailAPIView(ConditionalGetMixin, TenancyMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ItemSerializer
     permission_classes = [IsStoreMember]
 
     def get_queryset(self):
         store = self.get_store()
-        return Item.objects.filter(store=store)
+        return Item.objects.filter(store=store).select_related('store', 'category')
+
+    def get_validator(self):
+        updated_at = self.updated_at_queryset().first()
+        return None if updated_at is None else (self.kwargs['pk'], updated_at)
+
+    def updated_at_queryset(self):
+        return Item.objects.filter(store=self.get_store(), pk=self.kwargs['pk']).values_list('updated_at', flat=True)
 
     def get_serializer_class(self):
         if self.request.method in ('PUT', 'PATCH'):
             return ItemUpdateSerializer
-        return ItemSerializer 
\ No newline at end of file
+        return ItemSerializer 
+
+
+
+class ItemDetailAsyncAPIView(AsyncReadMixin, ItemDetailAPIView, AsyncRetrieveMixin):
+    """``ItemDetailAPIView`` with GET on the async ORM, for ASGI."""
+
+    async def aget_validator(self):
+        updated_at = await self.updated_at_queryset().afirst()
+        return None if updated_at is None else (self.kwargs['pk'], updated_at)
+
+
+class ItemTransactionListAPIView(TenancyMixin, generics.ListAPIView):
+    serializer_class = InventoryTransactionSerializer
+    pagination_class = SelectablePagination
+    keyset_ordering = ('-created_at', '-id')
+    permission_classes = [IsStoreMember]
+
+    def get_queryset(self):
+        from inventory.selectors import get_item_transactions
+        item = get_object_or_404(Item, store=self.get_store(), pk=self.kwargs['pk'])
+        return get_item_transactions(item=item)
+
+
+class ItemStockAPIView(TenancyMixin, APIView):
+    """Stock of an item at a point in time, or its movements over a range."""
+    permission_classes = [IsStoreMember]
+
+    def get(self, request, pk, **kwargs):
+        from inventory.selectors import get_stock_at, get_stock_over_range
+        item = get_object_or_404(Item, store=self.get_store(), pk=pk)
+        serializer = StockQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if 'at' in data:
+            return Response({'item_id': item.id, 'at': data['at'], 'quantity': get_stock_at(item=item, at=data['at'])})
+        return Response({
+            'item_id': item.id,
+            'start': data['start'],
+            'end': data['end'],
+            **get_stock_over_range(item=item, start=data['start'], end=data['end']),
+        })
+
+
+class TransactionExportAPIView(TenancyMixin, APIView):
+    """Stream the store's inventory ledger as NDJSON or CSV, resumable by cursor."""
+    permission_classes = [IsStoreMember]
+
+    def get(self, request, **kwargs):
+        from core.export import export_response
+        from core.pagination import decode_cursor
+        from inventory.selectors import (
+            TRANSACTION_EXPORT_COLUMNS, TRANSACTION_EXPORT_ORDERING, export_transactions,
+        )
+        serializer = TransactionExportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        filters = dict(serializer.validated_data)
+        fmt = filters.pop('output')
+        cursor = filters.pop('cursor', None)
+        after = None
+        if cursor:
+            try:
+                after = decode_cursor(TRANSACTION_EXPORT_ORDERING, InventoryTransaction, cursor)
+            except ValueError:
+                raise NotFound("Invalid cursor")
+
+        store = self.get_store()
+        return export_response(
+            fmt=fmt,
+            records=export_transactions(store=store, after=after, **filters),
+            filename=f'ledger-{store.slug}',
+            columns=TRANSACTION_EXPORT_COLUMNS,
+        )
+
+
+class LowStockAPIView(TenancyMixin, APIView):
+    """
+    Current low-stock alerts, plus the alerts raised and cleared since ``?since=``.
+    
+    Pass the returned ``cursor`` as ``since`` on the next poll. Without
+    ``since`` no changes are listed, only the alerts and a fresh cursor.
+    """
+    permission_classes = [IsStoreMember]
+    changes_limit = 1000
+
+    def get(self, request, **kwargs):
+        from core.pagination import decode_cursor, encode_cursor
+        from inventory.selectors import get_low_stock_alerts, get_low_stock_changes, get_low_stock_cursor
+        serializer = LowStockQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        store = self.get_store()
+
+        changes = []
+        has_more = False
+        since = serializer.validated_data.get('since')
+        if since:
+            try:
+                (after,) = decode_cursor(('id',), LowStockEvent, since)
+            except ValueError:
+                raise NotFound("Invalid cursor")
+            changes = list(get_low_stock_changes(store=store, after=after)[:self.changes_limit + 1])
+            has_more = len(changes) > self.changes_limit
+            changes = changes[:self.changes_limit]
+            last_id = changes[-1].id if changes else after
+        else:
+            last_id = get_low_stock_cursor(store=store)
+
+        return Response({
+            'alerts': LowStockAlertSerializer(get_low_stock_alerts(store=store), many=True).data,
+            'changes': LowStockEventSerializer(changes, many=True).data,
+            'has_more': has_more,
+            'cursor': encode_cursor(('id',), {'id': last_id}),
+        })
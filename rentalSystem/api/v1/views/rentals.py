@@ -1,20 +1,28 @@
 from rest_framework import generics, status
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from core.pagination import DefaultPagination
-from core.mixins import TenancyMixin, IsStoreMember
+from core.asyncviews import AsyncListMixin, AsyncReadMixin, AsyncRetrieveMixin
+from core.pagination import SelectablePagination
+from core.mixins import (
+    ConditionalGetMixin, TenancyMixin, ValuesListMixin, IsStoreMember, aupdated_at_validator, updated_at_validator,
+)
 from rentals.models import Rental
 from ..serializers.rentals import (
     RentalSerializer,
     RentalCreateSerializer,
     RentalReturnSerializer,
+    RentalExportQuerySerializer,
+    AvailabilityQuerySerializer,
 )
 
 
-class RentalListCreateAPIView(TenancyMixin, generics.ListCreateAPIView):
+class RentalListCreateAPIView(ConditionalGetMixin, ValuesListMixin, TenancyMixin, generics.ListCreateAPIView):
     queryset = Rental.objects.all().order_by('-start_date')
-    pagination_class = DefaultPagination
+    pagination_class = SelectablePagination
+    keyset_ordering = ('-start_date', '-id')
+    use_values_list = True
     permission_classes = [IsStoreMember]
 
     def get_serializer_class(self):
@@ -34,18 +42,138 @@ class RentalListCreateAPIView(TenancyMixin, generics.ListCreateAPIView):
             date_to=params.get('date_to'),
         )
 
+    def get_validator(self):
+        return updated_at_validator(self.get_queryset())
+
+
+class RentalListAsyncAPIView(AsyncReadMixin, RentalListCreateAPIView, AsyncListMixin):
+    """``RentalListCreateAPIView`` with GET on the async ORM, for ASGI."""
+
+    async def aget_validator(self):
+        return await aupdated_at_validator(self.get_queryset())
+
 
-class RentalDetailAPIView(TenancyMixin, generics.RetrieveAPIView):
-    queryset = Rental.objects.all().select_related('store')
+class RentalDetailAPIView(ConditionalGetMixin, TenancyMixin, generics.RetrieveAPIView):
     serializer_class = RentalSerializer
     permission_classes = [IsStoreMember]
 
+    def get_queryset(self):
+        from rentals.selectors import get_rental_queryset
+        return get_rental_queryset(store=self.get_store())
+
+    def get_validator(self):
+        updated_at = self.updated_at_queryset().first()
+        return None if updated_at is None else (self.kwargs['pk'], updated_at)
+
+    def updated_at_queryset(self):
+        return Rental.objects.filter(store=self.get_store(), pk=self.kwargs['pk']).values_list('updated_at', flat=True)
+
+
+class RentalDetailAsyncAPIView(AsyncReadMixin, RentalDetailAPIView, AsyncRetrieveMixin):
+    """``RentalDetailAPIView`` with GET on the async ORM, for ASGI."""
+
+    async def aget_validator(self):
+        updated_at = await self.updated_at_queryset().afirst()
+        return None if updated_at is None else (self.kwargs['pk'], updated_at)
+
 
 class RentalReturnAPIView(TenancyMixin, APIView):
     permission_classes = [IsStoreMember]
     
-    def post(self, request, pk: int):
-        serializer = RentalReturnSerializer(data=request.data, context={'rental_id': pk})
+    def post(self, request, pk: int, **kwargs):
+        from rentals.selectors import get_rental_by_id
+        rental = get_rental_by_id(store=self.get_store(), rental_id=pk)
+        if rental is None:
+            raise NotFound()
+        serializer = RentalReturnSerializer(data=request.data, context={'rental': rental, 'request': request})
         serializer.is_valid(raise_exception=True)
-        rental = serializer.save()
-        return Response(RentalSerializer(rental).data, status=status.HTTP_200_OK) 
\ No newline at end of file
+        serializer.save()
+        rental = get_rental_by_id(store=self.get_store(), rental_id=pk)
+        return Response(RentalSerializer(rental).data, status=status.HTTP_200_OK)
+
+
+class RentalStartAPIView(TenancyMixin, APIView):
+    permission_classes = [IsStoreMember]
+
+    def post(self, request, pk: int, **kwargs):
+        from rentals.selectors import get_rental_by_id
+        from rentals.services import RentalService
+        rental = get_rental_by_id(store=self.get_store(), rental_id=pk)
+        if rental is None:
+            raise NotFound()
+        RentalService.start_rental(rental_id=rental.id, actor=request.user)
+        rental = get_rental_by_id(store=self.get_store(), rental_id=pk)
+        return Response(RentalSerializer(rental).data, status=status.HTTP_200_OK)
+
+
+class RentalCancelAPIView(TenancyMixin, APIView):
+    permission_classes = [IsStoreMember]
+
+    def post(self, request, pk: int, **kwargs):
+        from rentals.selectors import get_rental_by_id
+        from rentals.services import RentalService
+        rental = get_rental_by_id(store=self.get_store(), rental_id=pk)
+        if rental is None:
+            raise NotFound()
+        RentalService.cancel_reservation(rental_id=rental.id, actor=request.user)
+        rental = get_rental_by_id(store=self.get_store(), rental_id=pk)
+        return Response(RentalSerializer(rental).data, status=status.HTTP_200_OK)
+
+
+class AvailabilityAPIView(TenancyMixin, APIView):
+    """Units free on every day of [start, end], per item or for the whole store."""
+    permission_classes = [IsStoreMember]
+
+    def get(self, request, **kwargs):
+        from rentals.availability import AvailabilityIndex
+        serializer = AvailabilityQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        start = serializer.validated_data['start']
+        end = serializer.validated_data['end']
+        item_id = serializer.validated_data.get('item_id')
+
+        index = AvailabilityIndex.for_store(
+            self.get_store(),
+            item_ids=[item_id] if item_id is not None else None,
+        )
+        if item_id is not None and item_id not in index.capacity:
+            raise NotFound()
+        available = index.available_all(start, end)
+        return Response({
+            'start': start,
+            'end': end,
+            'items': [
+                {'item_id': item_id, 'available': units}
+                for item_id, units in sorted(available.items())
+            ],
+        })
+
+
+class RentalExportAPIView(TenancyMixin, APIView):
+    """Stream the store's rentals with their lines as NDJSON or CSV, resumable by cursor."""
+    permission_classes = [IsStoreMember]
+
+    def get(self, request, **kwargs):
+        from core.export import export_response
+        from core.pagination import decode_cursor
+        from rentals.selectors import EXPORT_COLUMNS, EXPORT_ORDERING, export_rentals, flatten_rental_export
+        serializer = RentalExportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        filters = dict(serializer.validated_data)
+        fmt = filters.pop('output')
+        cursor = filters.pop('cursor', None)
+        after = None
+        if cursor:
+            try:
+                after = decode_cursor(EXPORT_ORDERING, Rental, cursor)
+            except ValueError:
+                raise NotFound("Invalid cursor")
+
+        store = self.get_store()
+        return export_response(
+            fmt=fmt,
+            records=export_rentals(store=store, after=after, **filters),
+            filename=f'rentals-{store.slug}',
+            columns=EXPORT_COLUMNS,
+            flatten=flatten_rental_export,
+        )
@@ -0,0 +1,48 @@
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.mixins import TenancyMixin, IsStoreAdmin
+from ..serializers.reports import ReportQuerySerializer
+
+
+class DailyReportAPIView(TenancyMixin, APIView):
+    """Per-day store stats over [start, end] plus their totals, read from the daily rollups."""
+    permission_classes = [IsStoreAdmin]
+
+    def get(self, request, **kwargs):
+        from reports.selectors import ReportsSelectors
+        serializer = ReportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        start = serializer.validated_data['start']
+        end = serializer.validated_data['end']
+        store = self.get_store()
+
+        return Response({
+            'start': start,
+            'end': end,
+            'totals': ReportsSelectors.store_totals(store=store, start=start, end=end),
+            'days': ReportsSelectors.daily_store_stats(store=store, start=start, end=end),
+        })
+
+
+class ItemReportAPIView(TenancyMixin, APIView):
+    """Per-item totals over [start, end], highest revenue first, read from the daily rollups."""
+    permission_classes = [IsStoreAdmin]
+
+    def get(self, request, **kwargs):
+        from reports.selectors import ReportsSelectors
+        serializer = ReportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        return Response({
+            'start': data['start'],
+            'end': data['end'],
+            'items': ReportsSelectors.item_totals(
+                store=self.get_store(),
+                start=data['start'],
+                end=data['end'],
+                item_id=data.get('item_id'),
+                limit=data['limit'],
+            ),
+        })
@@ -0,0 +1,7 @@
+"""
+Micro-benchmarks for the service and API layers.
+
+Run from the project directory, e.g.::
+
+    python -m benchmarks.bench_create_rental
+"""
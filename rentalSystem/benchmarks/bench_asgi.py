@@ -0,0 +1,197 @@
+"""
+Read throughput by concurrent connections: WSGI vs ASGI, sync vs async views.
+
+No server: each configuration calls Django's own handler in-process, so
+only the handler, middleware and views are measured, not sockets or HTTP
+parsing.
+
+- ``wsgi``: ``WSGIHandler`` called from one thread per connection, like a
+  threaded WSGI server
+- ``asgi sync``: ``ASGIHandler`` with one task per connection and the DRF
+  views, which Django runs through ``sync_to_async``
+- ``asgi async``: the same with ``API_ASYNC_READS`` on
+
+Each connection loops over item list, item detail, rental list and whoami
+GETs with a session cookie. ``--db-latency-ms`` adds a sleep to every query,
+as a network round trip to a database server would.
+"""
+import argparse
+import asyncio
+import io
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from types import ModuleType
+
+from .harness import print_table, seed_store, setup_django, test_database
+
+CONFIGURATIONS = [('wsgi', False), ('asgi sync', False), ('asgi async', True)]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=400, help="Requests per run, over all connections")
+    parser.add_argument('--db-latency-ms', type=float, nargs='+', default=[0, 1])
+    return parser.parse_args()
+
+
+def seed():
+    from django.test import Client
+    from inventory.models import Item
+    from rentals.models import Rental, RentalItem
+
+    store, user = seed_store(items=200)
+    item_ids = list(Item.objects.filter(store=store).values_list('id', flat=True))
+    rentals = Rental.objects.bulk_create([
+        Rental(store=store, created_by=user, customer_name=f'Customer {i}', due_date=date.today() + timedelta(days=3),
+               total=Decimal('12.00'))
+        for i in range(100)
+    ])
+    RentalItem.objects.bulk_create([
+        RentalItem(rental=rental, item_id=item_ids[(i + line) % len(item_ids)], qty=1, per_day=Decimal('2.00'))
+        for i, rental in enumerate(rentals)
+        for line in range(3)
+    ])
+    client = Client()
+    client.force_login(user)
+    paths = [
+        f'/api/v1/stores/{store.id}/items/',
+        f'/api/v1/stores/{store.id}/items/{item_ids[0]}/',
+        f'/api/v1/stores/{store.id}/rentals/',
+        '/api/v1/auth/whoami/',
+    ]
+    return paths, client.cookies['sessionid'].value
+
+
+def wsgi_run(paths, session, connections, requests):
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+
+    def request(path):
+        statuses = []
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+            'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_COOKIE': f'sessionid={session}', 'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http',
+        }
+        started = time.perf_counter()
+        response = handler(environ, lambda status, headers: statuses.append(status))
+        b''.join(response)
+        response.close()
+        return statuses[0], time.perf_counter() - started
+
+    def connection(index):
+        return [request(paths[(index + n) % len(paths)]) for n in range(requests // connections)]
+
+    with ThreadPoolExecutor(connections) as pool:
+        return [result for results in pool.map(connection, range(connections)) for result in results]
+
+
+def asgi_run(paths, session, connections, requests):
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+
+    async def request(path):
+        messages = iter([{'type': 'http.request', 'body': b'', 'more_body': False}])
+        status = []
+        done = asyncio.Event()
+
+        async def receive():
+            message = next(messages, None)
+            if message is None:
+                # Nothing more from the client until the response is sent
+                await done.wait()
+                return {'type': 'http.disconnect'}
+            return message
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif not message.get('more_body'):
+                done.set()
+
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'cookie', f'sessionid={session}'.encode())],
+            'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+        }
+        started = time.perf_counter()
+        await handler(scope, receive, send)
+        return status[0], time.perf_counter() - started
+
+    async def connection(index):
+        return [await request(paths[(index + n) % len(paths)]) for n in range(requests // connections)]
+
+    async def main():
+        results = await asyncio.gather(*(connection(index) for index in range(connections)))
+        return [result for connection_results in results for result in connection_results]
+
+    return asyncio.run(main())
+
+
+def db_latency(seconds):
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+    return wrapper
+
+
+def main():
+    args = parse_args()
+    setup_django()
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+    from django.test import override_settings
+    from django.urls import include, path
+    from api.v1.urls import build_urlpatterns
+
+    latency = {'seconds': 0}
+
+    def add_latency(sender, connection, **kwargs):
+        if latency['seconds']:
+            connection.execute_wrappers.append(db_latency(latency['seconds']))
+
+    connection_created.connect(add_latency)
+
+    with tempfile.TemporaryDirectory() as tmp, test_database(path=Path(tmp) / 'bench.sqlite3'):
+        paths, session = seed()
+        rows = []
+        for latency_ms in args.db_latency_ms:
+            latency['seconds'] = latency_ms / 1000
+            for name, async_reads in CONFIGURATIONS:
+                urlconf = ModuleType(f'bench_urls_{async_reads}')
+                urlconf.urlpatterns = [path('api/v1/', include(build_urlpatterns(async_reads=async_reads)))]
+                run = wsgi_run if name == 'wsgi' else asgi_run
+                with override_settings(ROOT_URLCONF=urlconf, REQUEST_TIMING_SAMPLE_RATE=0):
+                    for concurrency in args.concurrency:
+                        # New connections pick up the latency setting; warm up after closing them
+                        connections.close_all()
+                        run(paths, session, concurrency, concurrency * 4)
+                        started = time.perf_counter()
+                        results = run(paths, session, concurrency, args.requests)
+                        elapsed = time.perf_counter() - started
+                        failed = sum(1 for status, _ in results if not str(status).startswith('200'))
+                        latencies = sorted(seconds * 1000 for _, seconds in results)
+                        rows.append((
+                            latency_ms, name, concurrency, len(results) / elapsed,
+                            statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1], failed,
+                        ))
+                connections.close_all()
+
+        print_table(
+            'GET throughput by handler and concurrent connections (in-process)',
+            ['db latency ms', 'handler', 'connections', 'req/s', 'p50 ms', 'p99 ms', 'errors'],
+            rows,
+        )
+
+
+if __name__ == '__main__':
+    main()
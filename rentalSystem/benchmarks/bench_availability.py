@@ -0,0 +1,81 @@
+"""Availability engine: index build and range-query latency over 1M historical rental lines."""
+import random
+import sys
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from .harness import measure, print_table, seed_store, setup_django, test_database
+
+HISTORICAL_LINES = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+OPEN_RENTALS = 2_000
+ITEMS = 1_000
+LINES_PER_RENTAL = 4
+
+
+def main():
+    setup_django()
+    from django.utils import timezone
+    from inventory.models import Item
+    from rentals.availability import AvailabilityIndex
+    from rentals.models import Rental, RentalItem
+
+    rng = random.Random(3)
+    today = timezone.now().date()
+    with test_database():
+        store, user = seed_store(items=ITEMS, quantity=50)
+        item_ids = list(Item.objects.filter(store=store).values_list('id', flat=True))
+
+        def add_rentals(count, status):
+            for offset in range(0, count, 5_000):
+                batch = min(5_000, count - offset)
+                rentals = Rental.objects.bulk_create([
+                    Rental(
+                        store=store,
+                        created_by=user,
+                        customer_name='Bench',
+                        starts_on=today + timedelta(days=rng.randint(-400, 30) if status != 'reserved' else rng.randint(1, 60)),
+                        due_date=today + timedelta(days=rng.randint(1, 90)),
+                        status=status,
+                    )
+                    for _ in range(batch)
+                ])
+                RentalItem.objects.bulk_create([
+                    RentalItem(
+                        rental=rental,
+                        item_id=rng.choice(item_ids),
+                        qty=rng.randint(1, 3),
+                        per_day=Decimal('2.00'),
+                        returned_qty=0 if status != Rental.STATUS_RETURNED else 3,
+                    )
+                    for rental in rentals
+                    for _ in range(LINES_PER_RENTAL)
+                ])
+
+        started = time.perf_counter()
+        add_rentals(HISTORICAL_LINES // LINES_PER_RENTAL, Rental.STATUS_RETURNED)
+        add_rentals(OPEN_RENTALS // 2, Rental.STATUS_ACTIVE)
+        add_rentals(OPEN_RENTALS // 2, Rental.STATUS_RESERVED)
+        print(f'seeded {RentalItem.objects.count()} rental lines in {time.perf_counter() - started:.1f}s')
+
+        build = measure(lambda: AvailabilityIndex.for_store(store), repeat=5, warmup=1)
+        build_one = measure(lambda: AvailabilityIndex.for_store(store, item_ids=[item_ids[0]]), repeat=20)
+        index = AvailabilityIndex.for_store(store)
+        start, end = today + timedelta(days=12), today + timedelta(days=15)
+        one = measure(lambda: index.available(rng.choice(item_ids), start, end), repeat=2_000, warmup=50)
+        store_wide = measure(lambda: index.available_all(start, end), repeat=50)
+
+        print_table(
+            f'availability, {HISTORICAL_LINES} historical + {OPEN_RENTALS * LINES_PER_RENTAL} open lines, {ITEMS} items',
+            ['operation', 'p50 ms', 'p95 ms'],
+            [
+                ('build index (store)', build['p50_ms'], build['p95_ms']),
+                ('build index (1 item)', build_one['p50_ms'], build_one['p95_ms']),
+                ('available(item, 4 days)', one['p50_ms'], one['p95_ms']),
+                ('available_all(store, 4 days)', store_wide['p50_ms'], store_wide['p95_ms']),
+            ],
+        )
+
+
+if __name__ == '__main__':
+    main()
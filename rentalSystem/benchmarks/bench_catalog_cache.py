@@ -0,0 +1,66 @@
+"""Category and unfiltered item list latency without the catalog cache, and on hits with locmem and file backends."""
+import sys
+import tempfile
+
+from .harness import count_queries, measure, print_table, seed_store, setup_django, test_database
+
+ITEMS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+CATEGORIES = 500
+PAGE_SIZE = 100
+
+
+def main():
+    setup_django()
+    from django.core.cache import caches
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+    from inventory.models import Category, Item
+
+    with test_database(), tempfile.TemporaryDirectory() as location:
+        store, user = seed_store(items=ITEMS)
+        Category.objects.bulk_create([Category(store=store, name=f'Category {i}') for i in range(CATEGORIES)])
+        categories = list(Category.objects.filter(store=store))
+        items = list(Item.objects.filter(store=store))
+        for i, item in enumerate(items):
+            item.category = categories[i % CATEGORIES]
+        Item.objects.bulk_update(items, ['category'], batch_size=1000)
+
+        client = APIClient()
+        client.force_authenticate(user)
+        endpoints = [
+            ('category list', f'/api/v1/stores/{store.id}/categories/', {}),
+            (f'item list ({PAGE_SIZE} rows)', f'/api/v1/stores/{store.id}/items/', {'page_size': PAGE_SIZE}),
+        ]
+        backends = {
+            'locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench'},
+            'file': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+        }
+
+        rows = []
+        for label, url, params in endpoints:
+            def get():
+                return client.get(url, params)
+
+            uncached = measure(get)
+            row = [label, uncached['p50_ms'], count_queries(get)]
+            for name, backend in backends.items():
+                with override_settings(CACHES={'default': backend}, CATALOG_CACHE='default'):
+                    caches['default'].clear()
+                    assert get()['X-Cache'] == 'MISS'
+                    assert get()['X-Cache'] == 'HIT'
+                    hit = measure(get)
+                    row += [hit['p50_ms'], uncached['p50_ms'] / hit['p50_ms']]
+                    if name == 'locmem':
+                        row.append(count_queries(get))
+            rows.append(tuple(row))
+
+        print_table(
+            f'catalog reads, {ITEMS} items, {CATEGORIES} categories (p50)',
+            ['endpoint', 'uncached ms', 'queries', 'locmem hit ms', 'speedup', 'hit queries', 'file hit ms',
+             'speedup'],
+            rows,
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Cost of a poll that finds nothing changed: full 200 response vs 304 Not Modified."""
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from .harness import count_queries, measure, print_table, seed_store, setup_django, test_database
+
+ITEMS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+PAGE_SIZE = 100
+
+
+def main():
+    setup_django()
+    from rest_framework.test import APIClient
+    from inventory.models import Item
+    from rentals.services import RentalService
+
+    with test_database():
+        store, user = seed_store(items=ITEMS, quantity=1_000)
+        items = list(Item.objects.filter(store=store).order_by('id')[:5])
+        rental = RentalService.create_rental(
+            store=store,
+            created_by=user,
+            customer_name='Bench',
+            due_date=date.today() + timedelta(days=3),
+            items=[{'item_id': item.id, 'qty': 1, 'per_day': Decimal('2.00')} for item in items],
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        base = f'/api/v1/stores/{store.id}'
+        endpoints = [
+            (f'item list ({PAGE_SIZE} rows)', f'{base}/items/', {'page_size': PAGE_SIZE}),
+            ('item detail', f'{base}/items/{items[0].id}/', {}),
+            (f'rental list ({PAGE_SIZE} rows)', f'{base}/rentals/', {'page_size': PAGE_SIZE}),
+            ('rental detail', f'{base}/rentals/{rental.id}/', {}),
+        ]
+
+        rows = []
+        for label, url, params in endpoints:
+            etag = client.get(url, params)['ETag']
+            assert client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+            def full():
+                return client.get(url, params)
+
+            def conditional():
+                return client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+            timings = []
+            for fn in (full, conditional):
+                wall = measure(fn, repeat=50)
+                started = time.process_time()
+                for _ in range(50):
+                    fn()
+                cpu_ms = (time.process_time() - started) * 1000 / 50
+                timings.append((wall['p50_ms'], cpu_ms, count_queries(fn)))
+            (full_ms, full_cpu, full_q), (cond_ms, cond_cpu, cond_q) = timings
+            rows.append((label, full_ms, full_cpu, full_q, cond_ms, cond_cpu, cond_q, full_cpu - cond_cpu))
+
+        print_table(
+            f'unchanged poll, {ITEMS} items in the store',
+            ['endpoint', '200 p50 ms', '200 cpu ms', '200 queries', '304 p50 ms', '304 cpu ms', '304 queries',
+             'cpu saved ms'],
+            rows,
+        )
+
+
+if __name__ == '__main__':
+    main()
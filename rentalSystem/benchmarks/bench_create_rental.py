@@ -0,0 +1,47 @@
+"""Per-rental latency and query count of RentalService.create_rental by cart size."""
+from datetime import timedelta
+from decimal import Decimal
+
+from .harness import count_queries, measure, print_table, seed_store, setup_django, test_database
+
+CART_SIZES = [1, 5, 10, 30, 100]
+
+
+def main():
+    setup_django()
+    from django.utils import timezone
+    from inventory.models import Item
+    from rentals.services import RentalService
+
+    with test_database():
+        store, user = seed_store(items=max(CART_SIZES))
+        item_ids = list(Item.objects.filter(store=store).values_list('id', flat=True))
+        due_date = timezone.now().date() + timedelta(days=3)
+
+        rows = []
+        for size in CART_SIZES:
+            cart = [{'item_id': item_id, 'qty': 1, 'per_day': Decimal('2.00')} for item_id in item_ids[:size]]
+
+            def create():
+                RentalService.create_rental(
+                    store=store,
+                    created_by=user,
+                    customer_name='Bench',
+                    due_date=due_date,
+                    items=cart,
+                )
+
+            queries = count_queries(create)
+            stats = measure(create)
+            rows.append((size, queries, stats['mean_ms'], stats['p50_ms'], stats['p95_ms'],
+                         stats['mean_ms'] / size))
+
+        print_table(
+            'create_rental latency by cart size',
+            ['lines', 'queries', 'mean ms', 'p50 ms', 'p95 ms', 'ms/line'],
+            rows,
+        )
+
+
+if __name__ == '__main__':
+    main()
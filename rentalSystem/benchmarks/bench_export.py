@@ -0,0 +1,81 @@
+"""Full rental history: streaming export vs paging through the rental list endpoint."""
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+
+from .harness import print_table, seed_store, setup_django, test_database
+
+RENTALS = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+LINES_PER_RENTAL = 3
+PAGE_SIZE = 100
+# Paging the whole history is quadratic; time this many pages and extrapolate
+PAGED_SAMPLE = 50
+
+
+def main():
+    setup_django()
+    from django.utils import timezone
+    from rest_framework.test import APIClient
+    from inventory.models import Item
+    from rentals.models import Rental, RentalItem
+
+    with test_database():
+        store, user = seed_store(items=200, quantity=1_000)
+        item_ids = list(Item.objects.filter(store=store).values_list('id', flat=True))
+        due = timezone.now().date() + timedelta(days=3)
+        for offset in range(0, RENTALS, 5_000):
+            rentals = Rental.objects.bulk_create([
+                Rental(store=store, created_by=user, customer_name=f'Customer {offset + i}', due_date=due)
+                for i in range(min(5_000, RENTALS - offset))
+            ])
+            RentalItem.objects.bulk_create([
+                RentalItem(rental=rental, item_id=item_ids[(rental.id + n) % len(item_ids)], qty=1, per_day=Decimal('2.00'))
+                for rental in rentals
+                for n in range(LINES_PER_RENTAL)
+            ])
+
+        client = APIClient()
+        client.force_authenticate(user)
+        base = f'/api/v1/stores/{store.id}/rentals/'
+
+        def export(output):
+            tracemalloc.start()
+            started = time.perf_counter()
+            response = client.get(base + 'export/', {'output': output})
+            size = lines = 0
+            for chunk in response.streaming_content:
+                size += len(chunk)
+                lines += chunk.count(b'\n')
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+            return elapsed, peak, lines, size
+
+        results = []
+        for output in ('ndjson', 'csv'):
+            elapsed, peak, lines, size = export(output)
+            results.append((f'export {output}', elapsed, peak, lines, f'{size / 2**20:.1f} MB'))
+
+        pages = RENTALS // PAGE_SIZE
+        tracemalloc.start()
+        started = time.perf_counter()
+        for number in range(1, PAGED_SAMPLE + 1):
+            # Sample pages spread over the whole history
+            page = 1 + (number - 1) * pages // PAGED_SAMPLE
+            assert client.get(base, {'page': page, 'page_size': PAGE_SIZE}).status_code == 200
+        elapsed = (time.perf_counter() - started) / PAGED_SAMPLE * pages
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+        results.insert(0, (f'page_size={PAGE_SIZE} pages (extrapolated)', elapsed, peak, RENTALS, '-'))
+
+        print_table(
+            f'full rental history, {RENTALS} rentals x {LINES_PER_RENTAL} lines',
+            ['path', 'seconds', 'peak MiB', 'records/lines', 'size'],
+            results,
+        )
+
+
+if __name__ == '__main__':
+    main()
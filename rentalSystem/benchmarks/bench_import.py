@@ -0,0 +1,72 @@
+"""Bulk item import vs one create_item call per row."""
+import os
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+from .harness import print_table, seed_store, setup_django, test_database
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+PER_ROW_SAMPLE = 2_000
+CATEGORIES = 50
+
+
+def write_csv(path, rows, *, offset=0):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('name,sku,description,price,rental_rate,quantity,category\n')
+        for i in range(offset, offset + rows):
+            f.write(f'Item {i},SKU{i:07d},Imported item {i},{10 + i % 90}.00,2.50,{i % 25},Category {i % CATEGORIES}\n')
+
+
+def main():
+    setup_django()
+    from inventory.models import Category, Item
+    from inventory.services import InventoryService
+
+    with test_database(), tempfile.TemporaryDirectory() as tmp:
+        store, _ = seed_store()
+        path = os.path.join(tmp, 'items.csv')
+        write_csv(path, ROWS)
+
+        def timed_import():
+            started = time.perf_counter()
+            with open(path, 'rb') as stream:
+                report = InventoryService.import_items(store=store, stream=stream, fmt='csv')
+            return report, time.perf_counter() - started
+
+        created, create_seconds = timed_import()
+        assert created.created == ROWS and created.error_count == 0, created.as_dict()
+        updated, update_seconds = timed_import()
+        assert updated.updated == ROWS, updated.as_dict()
+
+        # The old path, extrapolated from a sample
+        categories = {c.name: c for c in Category.objects.filter(store=store)}
+        started = time.perf_counter()
+        for i in range(ROWS, ROWS + PER_ROW_SAMPLE):
+            InventoryService.create_item(
+                store=store,
+                category=categories[f'Category {i % CATEGORIES}'],
+                name=f'Item {i}',
+                sku=f'SKU{i:07d}',
+                description=f'Imported item {i}',
+                price=Decimal('10.00'),
+                rental_rate=Decimal('2.50'),
+                quantity=i % 25,
+            )
+        per_row_seconds = (time.perf_counter() - started) / PER_ROW_SAMPLE * ROWS
+        assert Item.objects.filter(store=store).count() == ROWS + PER_ROW_SAMPLE
+
+        print_table(
+            f'item import, {ROWS} rows',
+            ['path', 'seconds', 'rows/s'],
+            [
+                ('create_item per row (extrapolated)', per_row_seconds, ROWS / per_row_seconds),
+                ('bulk import, new SKUs', create_seconds, ROWS / create_seconds),
+                ('bulk import, existing SKUs', update_seconds, ROWS / update_seconds),
+            ],
+        )
+
+
+if __name__ == '__main__':
+    main()
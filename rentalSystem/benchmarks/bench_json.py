@@ -0,0 +1,88 @@
+"""Rendering and parsing v1 payloads with DRF's stdlib JSON classes vs the orjson-backed ones."""
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+
+from .harness import measure, print_table, seed_store, setup_django, test_database
+
+PAGE_SIZES = (20, 100, 1000)
+
+
+def main():
+    setup_django()
+    from django.utils import timezone
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from api.v1.serializers.inventory import ItemSerializer
+    from api.v1.serializers.rentals import RentalSerializer
+    from core.parsers import FastJSONParser
+    from core.renderers import FastJSONRenderer, orjson
+    from inventory.models import Item
+    from inventory.selectors import list_items
+    from rentals.models import Rental, RentalItem
+    from rentals.selectors import list_rentals
+
+    if orjson is None:
+        print('orjson is not installed; FastJSONRenderer falls back to the stdlib')
+
+    with test_database():
+        size = max(PAGE_SIZES)
+        store, user = seed_store(items=size, quantity=1_000)
+        rentals = Rental.objects.bulk_create([
+            Rental(store=store, created_by=user, customer_name=f'Customer {i}', due_date=date.today() + timedelta(days=3),
+                   total=Decimal('12.00'))
+            for i in range(size)
+        ])
+        item_ids = list(Item.objects.filter(store=store).values_list('id', flat=True))
+        RentalItem.objects.bulk_create([
+            RentalItem(rental=rental, item_id=item_ids[(i + line) % size], qty=1, per_day=Decimal('2.00'))
+            for i, rental in enumerate(rentals)
+            for line in range(3)
+        ])
+
+        stdlib, fast = JSONRenderer(), FastJSONRenderer()
+        payloads = []
+        for page_size in PAGE_SIZES:
+            payloads.append((f'item page ({page_size})', {
+                'count': size, 'next': None, 'previous': None,
+                'results': ItemSerializer(list_items(store=store)[:page_size], many=True).data,
+            }))
+        for page_size in PAGE_SIZES:
+            payloads.append((f'rental page ({page_size})', {
+                'count': size, 'next': None, 'previous': None,
+                'results': RentalSerializer(list_rentals(store=store)[:page_size], many=True).data,
+            }))
+        # Selector rows as report and low-stock views return them: raw Decimals, dates and datetimes
+        now = timezone.now()
+        payloads.append(('raw values rows (1000)', {'days': [
+            {'day': date.today() - timedelta(days=i), 'revenue': Decimal('123.45'), 'units_out': i,
+             'created_at': now - timedelta(minutes=i)}
+            for i in range(1000)
+        ]}))
+
+        rows = []
+        for label, data in payloads:
+            assert fast.render(data) == stdlib.render(data)
+            repeat = 20 if 'raw' in label or '1000' in label else 100
+            stdlib_ms = measure(lambda: stdlib.render(data), repeat=repeat)['p50_ms']
+            fast_ms = measure(lambda: fast.render(data), repeat=repeat)['p50_ms']
+            rows.append((label, len(stdlib.render(data)), stdlib_ms, fast_ms, stdlib_ms / fast_ms))
+        print_table('render', ['payload', 'bytes', 'stdlib p50 ms', 'orjson p50 ms', 'speedup'], rows)
+
+        bodies = [(label, stdlib.render(data)) for label, data in payloads if label.endswith('(100)')]
+        bodies.append(('rental create', stdlib.render({
+            'customer_name': 'Jane Doe', 'due_date': date.today(),
+            'items': [{'item_id': item_id, 'qty': 1, 'per_day': 2.5} for item_id in item_ids[:20]],
+        })))
+        context = {'encoding': 'utf-8'}
+        rows = []
+        for label, body in bodies:
+            stdlib_ms = measure(lambda: JSONParser().parse(io.BytesIO(body), parser_context=context), repeat=200)
+            fast_ms = measure(lambda: FastJSONParser().parse(io.BytesIO(body), parser_context=context), repeat=200)
+            rows.append((label, len(body), stdlib_ms['p50_ms'], fast_ms['p50_ms'],
+                         stdlib_ms['p50_ms'] / fast_ms['p50_ms']))
+        print_table('parse', ['body', 'bytes', 'stdlib p50 ms', 'orjson p50 ms', 'speedup'], rows)
+
+
+if __name__ == '__main__':
+    main()
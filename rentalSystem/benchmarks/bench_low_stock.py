@@ -0,0 +1,66 @@
+"""Low-stock polling: the per-threshold catalog scan vs the maintained alert set, by catalog size."""
+import random
+import sys
+import time
+
+from .harness import count_queries, measure, print_table, seed_store, setup_django, test_database
+
+SIZES = [int(size) for size in sys.argv[1:]] or [1_000, 10_000, 100_000]
+LOW_ITEMS = 50
+
+
+def main():
+    setup_django()
+    from django.db.models import F
+    from inventory.models import Item
+    from inventory.selectors import get_low_stock_alerts, get_low_stock_changes, get_low_stock_cursor
+    from inventory.services import InventoryService
+
+    rng = random.Random(14)
+    rows = []
+    with test_database():
+        for size in SIZES:
+            store, _ = seed_store(name=f'Store {size}', items=size, quantity=50)
+            ids = list(Item.objects.filter(store=store).values_list('id', flat=True))
+            low = rng.sample(ids, LOW_ITEMS)
+            Item.objects.filter(id__in=low).update(quantity=2)
+            started = time.perf_counter()
+            InventoryService.reconcile_low_stock(items=Item.objects.filter(store=store))
+            reconciled = time.perf_counter() - started
+
+            # Without the maintained set, per-item thresholds mean comparing every row to its own
+            def scan():
+                return [item.quantity for item in Item.objects.filter(
+                    store=store, status='active', quantity__lt=F('low_stock_threshold'),
+                )]
+
+            # A steady-state poll: the current alerts and the (few) changes since the last cursor
+            cursor = get_low_stock_cursor(store=store)
+
+            def poll():
+                alerts = [alert.item.quantity for alert in get_low_stock_alerts(store=store)]
+                changes = list(get_low_stock_changes(store=store, after=cursor)[:1000])
+                return alerts, changes
+
+            assert len(scan()) == len(poll()[0]) == LOW_ITEMS
+            scanned = measure(scan, repeat=30)
+            polled = measure(poll, repeat=30)
+            item = Item.objects.get(id=ids[0])
+            adjust = measure(
+                lambda: InventoryService.adjust_stock(item=item, delta=1, reason=InventoryService.REASON_ADJUSTMENT),
+                repeat=30,
+            )
+            rows.append((
+                size, len(low), reconciled * 1000, scanned['p50_ms'], polled['p50_ms'], count_queries(poll),
+                adjust['p50_ms'],
+            ))
+
+    print_table(
+        f'low-stock polling, {LOW_ITEMS} items low',
+        ['items', 'alerts', 'reconcile ms', 'scan p50 ms', 'poll p50 ms', 'poll queries', 'adjust_stock p50 ms'],
+        rows,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Cost of operation metrics, and what they report under write contention.
+
+1. ``adjust_stock`` with and without ``track_operation``, keeping metrics in
+   memory only and also flushing them to ``METRICS_DIR``.
+2. Forked workers loop ``create_rental`` + ``process_return`` on a SQLite
+   file with ``METRICS_DIR`` set; the parent then reads the merged figures,
+   as a scrape of ``/metrics`` would, including the lock wait at ``BEGIN IMMEDIATE``.
+"""
+import multiprocessing
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from .harness import measure, print_table, seed_store, setup_django, test_database
+
+OPERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+WORKERS = 8
+
+
+def worker(seed, store_id, item_ids, directory):
+    from django.core.exceptions import ValidationError
+    from django.db import OperationalError, connections
+    from django.test import override_settings
+    from core.metrics import REGISTRY
+    from rentals.services import RentalService
+    from stores.models import Store
+
+    rng = random.Random(seed)
+    store = Store(id=store_id)
+    with override_settings(METRICS_DIR=directory):
+        for _ in range(OPERATIONS):
+            try:
+                rental = RentalService.create_rental(
+                    store=store,
+                    created_by=None,
+                    customer_name='Bench',
+                    due_date=date.today() + timedelta(days=3),
+                    items=[{'item_id': item_id, 'qty': 1, 'per_day': Decimal('2.00')}
+                           for item_id in rng.sample(item_ids, 2)],
+                )
+                RentalService.process_return(rental_id=rental.id, return_all=True)
+            except (OperationalError, ValidationError):
+                pass
+        # Pool workers leave with os._exit, which skips the atexit flush
+        REGISTRY.flush()
+    connections.close_all()
+
+
+def overhead(store, user):
+    from django.test import override_settings
+    from inventory.models import Item
+    from inventory.services import InventoryService
+
+    item = Item.objects.filter(store=store).first()
+    calls = [
+        ('untracked', InventoryService.adjust_stock.__wrapped__, {}),
+        ('tracked', InventoryService.adjust_stock, {}),
+        ('tracked, METRICS_DIR', InventoryService.adjust_stock, {'METRICS_DIR': tempfile.mkdtemp()}),
+    ]
+    rows = []
+    baseline = None
+    for label, adjust, overrides in calls:
+        with override_settings(**overrides):
+            p50 = measure(
+                lambda: adjust(item=item, delta=1, reason=InventoryService.REASON_ADJUSTMENT, actor=user),
+                repeat=2000, warmup=100,
+            )['p50_ms']
+        baseline = baseline or p50
+        rows.append((label, p50 * 1000, f'{(p50 - baseline) / baseline * 100:+.1f}%'))
+    print_table('adjust_stock p50', ['', 'us', 'overhead'], rows)
+
+
+def contention(store):
+    from django.db import connections
+    from django.test import override_settings
+    from core.metrics import REGISTRY
+
+    item_ids = list(store.items.values_list('id', flat=True))
+    REGISTRY.reset()
+    with tempfile.TemporaryDirectory() as directory:
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(WORKERS) as pool:
+            pool.starmap(worker, [(seed, store.id, item_ids, directory) for seed in range(WORKERS)])
+        with override_settings(METRICS_DIR=directory):
+            collected = REGISTRY.collect()
+
+    def samples(name):
+        return {tuple(labels): value for labels, value in collected[name]['samples']}
+
+    durations = samples('service_operation_duration_seconds')
+    waits = samples('service_operation_lock_wait_seconds')
+    outcomes = samples('service_operations_total')
+    rows = []
+    for (operation,), (_, total, count) in sorted(durations.items()):
+        _, waited, _ = waits[(operation,)]
+        failed = sum(value for (name, outcome), value in outcomes.items() if name == operation and outcome != 'success')
+        rows.append((operation, count, failed, total / count * 1000, waited / count * 1000, f'{waited / total * 100:.0f}%'))
+    print_table(
+        f'{WORKERS} forked workers x {OPERATIONS} create + return, merged from METRICS_DIR',
+        ['operation', 'calls', 'failed', 'mean ms', 'lock wait ms', 'of latency'],
+        rows,
+    )
+
+
+def main():
+    setup_django()
+
+    with tempfile.TemporaryDirectory() as tmp, test_database(path=Path(tmp) / 'bench.sqlite3'):
+        store, user = seed_store(items=200, quantity=1_000_000)
+        overhead(store, user)
+        contention(store)
+
+
+if __name__ == '__main__':
+    main()
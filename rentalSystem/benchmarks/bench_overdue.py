@@ -0,0 +1,78 @@
+"""Overdue sweep over a 1M-rental table: set-based chunks vs saving rentals one by one."""
+import random
+import sys
+import time
+from datetime import timedelta
+
+from .harness import measure, print_table, setup_django, test_database
+
+RENTALS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+STORES = 50
+ZONES = ['UTC', 'America/New_York', 'America/Los_Angeles', 'Europe/Berlin', 'Asia/Tokyo']
+PER_ROW_SAMPLE = 2_000
+
+
+def main():
+    setup_django()
+    from django.utils import timezone
+    from rentals import selectors
+    from rentals.models import Rental
+    from rentals.services import RentalService
+    from stores.models import Store
+
+    rng = random.Random(13)
+    with test_database():
+        stores = Store.objects.bulk_create([
+            Store(name=f'Store {i}', slug=f'store-{i}', timezone=ZONES[i % len(ZONES)]) for i in range(STORES)
+        ])
+        today = timezone.now().date()
+        started = time.perf_counter()
+        for offset in range(0, RENTALS, 10_000):
+            Rental.objects.bulk_create([
+                Rental(
+                    store=rng.choice(stores),
+                    customer_name='Bench',
+                    due_date=today + timedelta(days=rng.randint(-60, 30)),
+                    # Most history is returned; about 10% of the table is active and past due
+                    status=Rental.STATUS_ACTIVE if rng.random() < 0.15 else Rental.STATUS_RETURNED,
+                )
+                for _ in range(min(10_000, RENTALS - offset))
+            ])
+        print(f'seeded {RENTALS} rentals in {time.perf_counter() - started:.1f}s')
+
+        def reset():
+            Rental.objects.filter(status=Rental.STATUS_OVERDUE).update(status=Rental.STATUS_ACTIVE)
+
+        rows = []
+        for chunk_size in (1_000, 5_000, 20_000):
+            sweep = RentalService.mark_overdue(chunk_size=chunk_size)
+            rows.append((f'set-based, chunk {chunk_size}', sweep.rentals_marked, sweep.chunks, sweep.duration_ms / 1000))
+            reset()
+        marked = sweep.rentals_marked
+
+        # What clients did before: pull active rentals and save the late ones one at a time
+        late = list(Rental.objects.filter(status=Rental.STATUS_ACTIVE, due_date__lt=today)[:PER_ROW_SAMPLE])
+        started = time.perf_counter()
+        for rental in late:
+            rental.status = Rental.STATUS_OVERDUE
+            rental.save(update_fields=['status'])
+        per_row = (time.perf_counter() - started) / len(late) * marked
+        rows.insert(0, ('save() per rental (extrapolated)', marked, marked, per_row))
+        reset()
+
+        RentalService.mark_overdue()
+        noop = RentalService.mark_overdue()
+        rows.append(('repeat sweep, nothing to do', noop.rentals_marked, noop.chunks, noop.duration_ms / 1000))
+
+        print_table(
+            f'overdue sweep, {RENTALS} rentals in {STORES} stores over {len(ZONES)} timezones',
+            ['method', 'rows changed', 'UPDATEs', 'seconds'],
+            rows,
+        )
+
+        listing = measure(lambda: list(selectors.list_rentals(store=stores[0], status=Rental.STATUS_OVERDUE)[:20]))
+        print(f"\nlist_rentals(status=overdue) first page: p50 {listing['p50_ms']:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Page-number vs keyset pagination latency on deep pages of the item list."""
+import sys
+
+from .harness import measure, print_table, seed_store, setup_django, test_database
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+PAGE_SIZE = 20
+DEPTHS = [0, 1_000, 10_000, 50_000, ROWS - PAGE_SIZE]
+
+
+def main():
+    setup_django()
+    from rest_framework.test import APIClient
+    from core.pagination import KeysetPagination
+    from inventory.selectors import list_items
+
+    with test_database():
+        store, user = seed_store(items=ROWS)
+        client = APIClient()
+        client.force_authenticate(user)
+        url = f'/api/v1/stores/{store.id}/items/'
+        ordered = list_items(store=store)
+
+        keyset = KeysetPagination()
+        keyset.ordering = ('-created_at', '-id')
+
+        rows = []
+        for depth in DEPTHS:
+            page = depth // PAGE_SIZE + 1
+            page_number = measure(lambda: client.get(url, {'page': page, 'page_size': PAGE_SIZE}), repeat=10)
+
+            params = {'pagination': 'keyset', 'page_size': PAGE_SIZE}
+            if depth:
+                params['cursor'] = keyset.encode_cursor(ordered[depth - 1])
+            cursor = measure(lambda: client.get(url, params), repeat=10)
+
+            rows.append((depth, page_number['p50_ms'], cursor['p50_ms']))
+
+        print_table(
+            f'item list p50 latency by depth ({ROWS} rows, page size {PAGE_SIZE})',
+            ['offset', 'page-number ms', 'keyset ms'],
+            rows,
+        )
+
+
+if __name__ == '__main__':
+    main()
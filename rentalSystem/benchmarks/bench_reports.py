@@ -0,0 +1,106 @@
+"""Dashboard queries from the daily rollups vs aggregating the raw rental and ledger rows."""
+import random
+import sys
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from .harness import measure, print_table, seed_store, setup_django, test_database
+
+LEDGER_ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+RENTALS = LEDGER_ROWS // 5
+ITEMS = 500
+DAYS = 365
+
+
+def main():
+    setup_django()
+    from django.db.models import Count, Sum
+    from django.db.models.functions import TruncDate
+    from django.utils import timezone
+    from inventory.models import InventoryTransaction, Item
+    from inventory.services import InventoryService
+    from rentals.models import Rental, RentalItem
+    from reports.selectors import ReportsSelectors
+    from reports.services import ReportsService
+
+    rng = random.Random(12)
+    with test_database():
+        store, user = seed_store(items=ITEMS, quantity=1_000)
+        item_ids = list(Item.objects.filter(store=store).values_list('id', flat=True))
+        now = timezone.now()
+        started = time.perf_counter()
+        for offset in range(0, RENTALS, 5_000):
+            rentals = Rental.objects.bulk_create([
+                Rental(store=store, created_by=user, customer_name='Bench', due_date=now.date(),
+                       total=Decimal(rng.randint(5, 500)))
+                for _ in range(min(5_000, RENTALS - offset))
+            ])
+            RentalItem.objects.bulk_create([
+                RentalItem(rental=rental, item_id=rng.choice(item_ids), qty=1, per_day=Decimal('2.00'))
+                for rental in rentals
+                for _ in range(2)
+            ])
+            Rental.objects.bulk_update([
+                Rental(id=rental.id, start_date=now - timedelta(days=rng.randrange(DAYS), seconds=rng.randrange(86_400)))
+                for rental in rentals
+            ], ['start_date'], batch_size=1_000)
+        for offset in range(0, LEDGER_ROWS, 10_000):
+            rows = InventoryTransaction.objects.bulk_create([
+                InventoryTransaction(item_id=rng.choice(item_ids), delta=rng.choice([-1, -1, 1, 2]), reason='rental')
+                for _ in range(min(10_000, LEDGER_ROWS - offset))
+            ])
+            InventoryTransaction.objects.bulk_update([
+                InventoryTransaction(id=row.id, created_at=now - timedelta(days=rng.randrange(DAYS), seconds=rng.randrange(86_400)))
+                for row in rows
+            ], ['created_at'], batch_size=1_000)
+        print(f'seeded {RENTALS} rentals and {LEDGER_ROWS} ledger rows in {time.perf_counter() - started:.1f}s')
+
+        started = time.perf_counter()
+        folded = ReportsService.refresh()
+        catch_up = time.perf_counter() - started
+        print(f'catch-up folded {folded} in {catch_up:.1f}s')
+
+        item = Item.objects.get(id=item_ids[0])
+        # Outside a transaction the on-commit refresh runs straight away
+        incremental = measure(lambda: InventoryService.adjust_stock(item=item, delta=-1, reason='rental'), repeat=50)
+        noop = measure(ReportsService.refresh, repeat=50)
+
+        end = now.date()
+        rows = []
+        for span in (30, 365):
+            start = end - timedelta(days=span - 1)
+
+            def raw():
+                day_start = now - timedelta(days=span)
+                list(Rental.objects.filter(store=store, start_date__gte=day_start)
+                     .annotate(day=TruncDate('start_date')).values('day')
+                     .annotate(rentals=Count('id'), revenue=Sum('total')))
+                list(InventoryTransaction.objects.filter(item__store=store, created_at__gte=day_start)
+                     .annotate(day=TruncDate('created_at')).values('day').annotate(stock_delta=Sum('delta')))
+
+            def rollup():
+                ReportsSelectors.daily_store_stats(store=store, start=start, end=end)
+
+            raw_stats = measure(raw, repeat=5, warmup=1)
+            rollup_stats = measure(rollup, repeat=50)
+            rows.append((f'daily, {span} days', raw_stats['p50_ms'], rollup_stats['p50_ms'],
+                         raw_stats['p50_ms'] / rollup_stats['p50_ms']))
+
+        print_table(
+            f'reports, {RENTALS} rentals + {LEDGER_ROWS} ledger rows over {DAYS} days',
+            ['query', 'raw p50 ms', 'rollup p50 ms', 'speedup'],
+            rows,
+        )
+        print_table(
+            'rollup maintenance',
+            ['operation', 'p50 ms', 'p95 ms'],
+            [
+                ('adjust_stock with on-commit refresh', incremental['p50_ms'], incremental['p95_ms']),
+                ('refresh with nothing new', noop['p50_ms'], noop['p95_ms']),
+            ],
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Overhead of RequestTimingMiddleware: not installed, installed but not sampling, and timing every request."""
+import io
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+
+from .harness import measure, print_table, seed_store, setup_django, test_database
+
+ITEMS = 1_000
+RENTALS = 200
+
+
+def main():
+    setup_django()
+    from django.conf import settings
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+    from inventory.models import Item
+    from rentals.models import Rental, RentalItem
+
+    without = [name for name in settings.MIDDLEWARE if name != 'core.timing.RequestTimingMiddleware']
+    configurations = [
+        ('not installed', {'MIDDLEWARE': without}),
+        ('sample rate 0', {'REQUEST_TIMING_SAMPLE_RATE': 0}),
+        ('sample rate 1', {'REQUEST_TIMING_SAMPLE_RATE': 1, 'REQUEST_TIMING_LOG_MIN_MS': 0}),
+    ]
+
+    # Timed requests log to memory, so formatting the line is part of the cost
+    logger = logging.getLogger('core.timing')
+    logger.setLevel(logging.INFO)
+    logger.addHandler(logging.StreamHandler(io.StringIO()))
+    logger.propagate = False
+
+    with test_database():
+        store, user = seed_store(items=ITEMS)
+        item_ids = list(Item.objects.filter(store=store).values_list('id', flat=True))
+        rentals = Rental.objects.bulk_create([
+            Rental(store=store, created_by=user, customer_name=f'Customer {i}', due_date=date.today() + timedelta(days=3),
+                   total=Decimal('12.00'))
+            for i in range(RENTALS)
+        ])
+        RentalItem.objects.bulk_create([
+            RentalItem(rental=rental, item_id=item_ids[(i + line) % ITEMS], qty=1, per_day=Decimal('2.00'))
+            for i, rental in enumerate(rentals)
+            for line in range(3)
+        ])
+        endpoints = [
+            ('item detail', f'/api/v1/stores/{store.id}/items/{item_ids[0]}/'),
+            ('item list (20)', f'/api/v1/stores/{store.id}/items/'),
+            ('item list (100)', f'/api/v1/stores/{store.id}/items/?page_size=100'),
+            ('rental list (100)', f'/api/v1/stores/{store.id}/rentals/?page_size=100'),
+        ]
+
+        rows = []
+        for label, url in endpoints:
+            row = [label]
+            baseline = None
+            for _, overrides in configurations:
+                with override_settings(**overrides):
+                    client = APIClient()
+                    client.force_authenticate(user)
+                    p50 = measure(lambda: client.get(url), repeat=200, warmup=20)['p50_ms']
+                baseline = baseline or p50
+                row += [p50, f'{(p50 - baseline) / baseline * 100:+.1f}%']
+            rows.append(tuple(row))
+
+        headers = ['endpoint']
+        for name, _ in configurations:
+            headers += [f'{name} ms', 'overhead']
+        print_table('GET p50 by middleware configuration', headers, rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Item search latency: icontains scan vs the FTS5 index, first page plus count."""
+import random
+import sys
+import time
+from decimal import Decimal
+from unittest import mock
+
+from .harness import measure, print_table, seed_store, setup_django, test_database
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+# A few thousand pseudo-words, so terms are about as selective as in a real catalogue
+SYLLABLES = 'ka te ro mi lu pa sen dor vik tal gro ben fi nu sha mar'.split()
+WORDS = sorted({a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES})
+QUERIES = ['kateben', 'vikta', 'kateben rodorfi', 'SKU00123', 'zzz']
+
+
+def main():
+    setup_django()
+    from inventory import search
+    from inventory.models import Item
+    from inventory.selectors import list_items
+
+    rng = random.Random(7)
+    with test_database():
+        store, _ = seed_store()
+        batch = []
+        for i in range(ROWS):
+            name = ' '.join(rng.choices(WORDS, k=3)).title()
+            batch.append(Item(store=store, name=f'{name} {i}', sku=f'SKU{i:07d}', price=Decimal('10.00'),
+                              description=' '.join(rng.choices(WORDS, k=8))))
+            if len(batch) == 10_000:
+                Item.objects.bulk_create(batch)
+                batch = []
+        Item.objects.bulk_create(batch)
+
+        started = time.perf_counter()
+        search.rebuild(store=store, batch_size=10_000)
+        print(f'indexed {ROWS} items in {time.perf_counter() - started:.1f}s')
+
+        def first_page(text):
+            qs = list_items(store=store, search=text)
+            qs.count()
+            list(qs[:20])
+
+        rows = []
+        for text in QUERIES:
+            fts = measure(lambda: first_page(text), repeat=5, warmup=1)
+            with mock.patch.object(search, 'is_available', return_value=False):
+                scan = measure(lambda: first_page(text), repeat=3, warmup=1)
+            rows.append((repr(text), scan['p50_ms'], fts['p50_ms'], scan['p50_ms'] / fts['p50_ms']))
+
+        print_table(
+            f'search first page + count, {ROWS} items',
+            ['query', 'icontains ms', 'fts ms', 'speedup'],
+            rows,
+        )
+
+
+if __name__ == '__main__':
+    main()
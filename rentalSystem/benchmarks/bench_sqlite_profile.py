@@ -0,0 +1,119 @@
+"""
+Rental write throughput on a SQLite file: Django's default connection vs the production profile.
+
+Workers loop ``create_rental`` + ``process_return`` from threads and forked
+processes. Profiles:
+
+- ``default``: rollback journal, synchronous=FULL, deferred transactions and
+  a new connection per operation (``CONN_MAX_AGE = 0``)
+- ``pragmas``: ``core.db`` pragmas (WAL, synchronous=NORMAL, ...) but deferred
+  transactions, on a persistent connection
+- ``production``: pragmas plus BEGIN IMMEDIATE, as in settings
+"""
+import multiprocessing
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from .harness import print_table, seed_store, setup_django, test_database
+
+OPERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+RUNS = [('threads', 1), ('threads', 8), ('processes', 8)]
+
+
+def profiles():
+    from core.db import sqlite_options
+
+    # WAL is stored in the file, so the default profile has to switch it back
+    return [
+        ('default', {'init_command': 'PRAGMA journal_mode=DELETE'}, False),
+        ('pragmas', sqlite_options(transaction_mode='DEFERRED'), True),
+        ('production', sqlite_options(), True),
+    ]
+
+
+def worker(seed, store_id, item_ids, operations, persistent):
+    from django.core.exceptions import ValidationError
+    from django.db import OperationalError, connections
+    from rentals.services import RentalService
+    from stores.models import Store
+
+    rng = random.Random(seed)
+    store = Store(id=store_id)
+    latencies = []
+    errors = 0
+    for _ in range(operations):
+        started = time.perf_counter()
+        try:
+            rental = RentalService.create_rental(
+                store=store,
+                created_by=None,
+                customer_name='Bench',
+                due_date=date.today() + timedelta(days=3),
+                items=[{'item_id': item_id, 'qty': 1, 'per_day': Decimal('2.00')}
+                       for item_id in rng.sample(item_ids, 2)],
+            )
+            RentalService.process_return(rental_id=rental.id, return_all=True)
+            latencies.append((time.perf_counter() - started) * 1000)
+        except (OperationalError, ValidationError):
+            # "database is locked"; the transaction was rolled back
+            errors += 1
+        if not persistent:
+            connections.close_all()
+    connections.close_all()
+    return latencies, errors
+
+
+def run(kind, workers, store, item_ids, persistent):
+    from django.db import connections
+
+    args = [(seed, store.id, item_ids, OPERATIONS, persistent) for seed in range(workers)]
+    connections.close_all()
+    started = time.perf_counter()
+    if kind == 'threads':
+        with ThreadPoolExecutor(workers) as pool:
+            results = list(pool.map(lambda arg: worker(*arg), args))
+    else:
+        with multiprocessing.get_context('fork').Pool(workers) as pool:
+            results = pool.starmap(worker, args)
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for result in results for latency in result[0])
+    errors = sum(result[1] for result in results)
+    return latencies, errors, elapsed
+
+
+def main():
+    setup_django()
+    from django.db import connection
+
+    with tempfile.TemporaryDirectory() as tmp, test_database(path=Path(tmp) / 'bench.sqlite3'):
+        store, _ = seed_store(items=200, quantity=1_000_000)
+        item_ids = list(store.items.values_list('id', flat=True))
+
+        rows = []
+        for name, options, persistent in profiles():
+            connection.close()
+            connection.settings_dict['OPTIONS'] = options
+            for kind, workers in RUNS:
+                latencies, errors, elapsed = run(kind, workers, store, item_ids, persistent)
+                done = len(latencies)
+                rows.append((
+                    name, kind, workers, done, errors, done / elapsed,
+                    latencies[done // 2] if done else None,
+                    latencies[min(done - 1, int(done * 0.95))] if done else None,
+                ))
+
+        print_table(
+            f'create_rental + process_return, {OPERATIONS} per worker',
+            ['profile', 'workers', 'n', 'completed', 'locked errors', 'ops/s', 'p50 ms', 'p95 ms'],
+            rows,
+        )
+
+
+if __name__ == '__main__':
+    main()
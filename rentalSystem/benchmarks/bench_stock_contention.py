@@ -0,0 +1,150 @@
+"""
+Concurrent stock decrements from threads and processes on a SQLite file.
+
+Workers try to take twice the available stock one unit at a time. Every run
+checks that exactly the available stock was sold, the quantity never went
+negative and the ledger still sums to the quantity, and reports throughput.
+``legacy`` is the old read, check in Python, then save path, for comparison.
+The after-commit report refresh is off, so only the stock path is timed.
+"""
+import math
+import multiprocessing
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from pathlib import Path
+
+from .harness import print_table, setup_django, test_database
+
+STOCK = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+CART_SIZE = 3
+WORKERS = (1, 4, 16)
+
+
+def take_one(item_ids):
+    """adjust_stock for a single item, adjust_stock_many for a cart; the item instances are never read."""
+    from inventory.models import Item
+    from inventory.services import InventoryService
+
+    if len(item_ids) == 1:
+        InventoryService.adjust_stock(item=Item(id=item_ids[0]), delta=-1, reason=InventoryService.REASON_SALE)
+    else:
+        InventoryService.adjust_stock_many(
+            adjustments=[(Item(id=item_id), -1) for item_id in item_ids], reason=InventoryService.REASON_RENTAL,
+        )
+
+
+def take_one_legacy(item_ids):
+    """The previous adjust_stock: lock (a no-op on SQLite), check in Python, save."""
+    from django.db import transaction
+    from core.cache import bump_catalog_version_on_commit
+    from inventory import low_stock
+    from inventory.models import InventoryTransaction, Item
+
+    with transaction.atomic():
+        item = Item.objects.select_for_update().get(id=item_ids[0])
+        if item.quantity - 1 < 0:
+            raise ValueError("Insufficient stock")
+        old_quantity = item.quantity
+        item.quantity -= 1
+        item.save(update_fields=['quantity', 'updated_at'])
+        low_stock.record_crossings([(item, old_quantity)])
+        bump_catalog_version_on_commit([item.store_id])
+        InventoryTransaction.objects.create(item=item, delta=-1, reason=InventoryTransaction.REASON_SALE)
+
+
+def worker(mode, item_ids, attempts):
+    from django.db import OperationalError, connections
+
+    take = take_one_legacy if mode == 'legacy' else take_one
+    sold = refused = errors = 0
+    try:
+        for _ in range(attempts):
+            try:
+                take(item_ids)
+                sold += 1
+            except ValueError:
+                refused += 1
+            except OperationalError:
+                # "database is locked": the attempt failed and nothing was written
+                errors += 1
+    finally:
+        connections.close_all()
+    return sold, refused, errors
+
+
+def run(mode, kind, workers, item_ids):
+    from django.db import connections
+
+    attempts = math.ceil(2 * STOCK / workers)
+    args = [(mode, item_ids, attempts)] * workers
+    started = time.perf_counter()
+    if kind == 'threads':
+        with ThreadPoolExecutor(workers) as pool:
+            results = list(pool.map(lambda arg: worker(*arg), args))
+    else:
+        # Children must not share the parent's SQLite connection
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(workers) as pool:
+            results = pool.starmap(worker, args)
+    elapsed = time.perf_counter() - started
+    sold, refused, errors = (sum(column) for column in zip(*results))
+    return sold, refused, errors, elapsed, attempts * workers
+
+
+def main():
+    setup_django()
+    from django.test import override_settings
+    from inventory.models import Item
+    from inventory.services import InventoryService
+    from stores.models import Store
+
+    with (
+        tempfile.TemporaryDirectory() as tmp,
+        test_database(path=Path(tmp) / 'bench.sqlite3'),
+        override_settings(REPORTS_REFRESH_ON_COMMIT=False),
+    ):
+        store = Store.objects.create(name='Bench Store', slug='bench-store')
+        counter = 0
+
+        def fresh_items(count):
+            nonlocal counter
+            items = []
+            for _ in range(count):
+                counter += 1
+                items.append(InventoryService.create_item(
+                    store=store, name=f'Item {counter}', sku=f'SKU{counter:05d}', price=Decimal('10.00'),
+                    quantity=STOCK,
+                ).id)
+            return items
+
+        rows = []
+        cases = [('conditional', 1), (f'conditional cart x{CART_SIZE}', CART_SIZE), ('legacy', 1)]
+        for mode, size in cases:
+            for kind in ('threads', 'processes'):
+                for workers in WORKERS:
+                    item_ids = fresh_items(size)
+                    sold, refused, errors, elapsed, attempts = run(mode, kind, workers, item_ids)
+                    items = list(Item.objects.filter(id__in=item_ids))
+                    ledger_ok = all(
+                        sum(item.transactions.values_list('delta', flat=True)) == item.quantity for item in items
+                    )
+                    oversold = max(0, sold - STOCK) + sum(max(0, -item.quantity) for item in items)
+                    assert mode == 'legacy' or (sold == STOCK and oversold == 0 and ledger_ok), (mode, kind, workers)
+                    rows.append((
+                        mode, kind, workers, attempts, sold, refused, errors, min(item.quantity for item in items),
+                        oversold, 'yes' if ledger_ok else 'NO', sold / elapsed, attempts / elapsed,
+                    ))
+
+        print_table(
+            f'{STOCK} units per item, 2x as many attempts',
+            ['path', 'workers', 'n', 'attempts', 'sold', 'refused', 'db errors', 'final qty', 'oversold',
+             'ledger ok', 'sold/s', 'attempts/s'],
+            rows,
+        )
+
+
+if __name__ == '__main__':
+    main()
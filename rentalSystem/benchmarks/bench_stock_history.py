@@ -0,0 +1,78 @@
+"""Stock-at-time and stock-over-range queries with and without ledger checkpoints."""
+import random
+import sys
+import time
+from datetime import timedelta
+
+from .harness import measure, print_table, seed_store, setup_django, test_database
+
+LEDGER_ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+CHECKPOINT_EVERY = 1_000
+
+
+def main():
+    setup_django()
+    from django.utils import timezone
+    from inventory.models import InventoryTransaction, Item, StockCheckpoint
+    from inventory.selectors import get_stock_at, get_stock_over_range
+    from inventory.services import InventoryService
+
+    rng = random.Random(9)
+    with test_database():
+        store, _ = seed_store(items=1, quantity=0)
+        item = Item.objects.get(store=store)
+        start = timezone.now() - timedelta(days=365)
+        step = timedelta(days=365) / LEDGER_ROWS
+
+        started = time.perf_counter()
+        for offset in range(0, LEDGER_ROWS, 10_000):
+            InventoryTransaction.objects.bulk_create([
+                InventoryTransaction(
+                    item=item,
+                    delta=rng.randint(-3, 4),
+                    reason=InventoryTransaction.REASON_ADJUSTMENT,
+                )
+                for _ in range(min(10_000, LEDGER_ROWS - offset))
+            ])
+        # created_at is auto_now_add, so spread the timestamps over the year afterwards
+        ids = list(InventoryTransaction.objects.filter(item=item).order_by('id').values_list('id', flat=True))
+        for offset in range(0, len(ids), 10_000):
+            chunk = ids[offset:offset + 10_000]
+            InventoryTransaction.objects.bulk_update(
+                [InventoryTransaction(id=pk, created_at=start + step * (offset + i)) for i, pk in enumerate(chunk)],
+                ['created_at'],
+            )
+        print(f'seeded {LEDGER_ROWS} ledger rows in {time.perf_counter() - started:.1f}s')
+
+        def random_moment():
+            return start + step * rng.randrange(LEDGER_ROWS)
+
+        def day_range():
+            moment = random_moment()
+            return dict(start=moment, end=moment + timedelta(days=1))
+
+        def run():
+            at = measure(lambda: get_stock_at(item=item, at=random_moment()), repeat=30)
+            over = measure(lambda: get_stock_over_range(item=item, **day_range()), repeat=30)
+            return at, over
+
+        plain_at, plain_range = run()
+        started = time.perf_counter()
+        written = InventoryService.write_checkpoints(every=CHECKPOINT_EVERY)
+        print(f'wrote {written} checkpoints in {time.perf_counter() - started:.1f}s')
+        assert StockCheckpoint.objects.count() == written
+        fast_at, fast_range = run()
+
+        print_table(
+            f'stock history, {LEDGER_ROWS} ledger rows, checkpoint every {CHECKPOINT_EVERY}',
+            ['query', 'ledger p50 ms', 'checkpoint p50 ms', 'speedup'],
+            [
+                ('stock at time', plain_at['p50_ms'], fast_at['p50_ms'], plain_at['p50_ms'] / fast_at['p50_ms']),
+                ('stock over 1 day', plain_range['p50_ms'], fast_range['p50_ms'],
+                 plain_range['p50_ms'] / fast_range['p50_ms']),
+            ],
+        )
+
+
+if __name__ == '__main__':
+    main()
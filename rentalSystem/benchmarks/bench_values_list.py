@@ -0,0 +1,70 @@
+"""Item and rental list pages rendered through the DRF serializers vs the values_list fast path."""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from .harness import count_queries, measure, print_table, seed_store, setup_django, test_database
+
+PAGE_SIZES = (20, 100, 1000)
+LINES_PER_RENTAL = 3
+
+
+def main():
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from api.v1.serializers.inventory import ItemSerializer
+    from api.v1.serializers.rentals import RentalSerializer
+    from core.values import values_serializer_for
+    from inventory.models import Category, Item
+    from inventory.selectors import list_items
+    from rentals.models import Rental, RentalItem
+    from rentals.selectors import list_rentals
+
+    with test_database():
+        size = max(PAGE_SIZES)
+        store, user = seed_store(items=size, quantity=1_000)
+        category = Category.objects.create(store=store, name='Tents')
+        Item.objects.filter(store=store, sku__endswith='0').update(category=category)
+        rentals = Rental.objects.bulk_create([
+            Rental(store=store, created_by=user, customer_name=f'Customer {i}', due_date=date.today() + timedelta(days=3),
+                   total=Decimal('12.00'))
+            for i in range(size)
+        ])
+        item_ids = list(Item.objects.filter(store=store).values_list('id', flat=True))
+        RentalItem.objects.bulk_create([
+            RentalItem(rental=rental, item_id=item_ids[(i + line) % size], qty=1, per_day=Decimal('2.00'))
+            for i, rental in enumerate(rentals)
+            for line in range(LINES_PER_RENTAL)
+        ])
+
+        renderer = JSONRenderer()
+        cases = [
+            ('items', ItemSerializer, lambda: list_items(store=store)),
+            (f'rentals ({LINES_PER_RENTAL} lines)', RentalSerializer, lambda: list_rentals(store=store)),
+        ]
+        rows = []
+        for label, serializer_class, queryset in cases:
+            values = values_serializer_for(serializer_class)
+            for page_size in PAGE_SIZES:
+                def drf():
+                    return renderer.render(serializer_class(queryset()[:page_size], many=True).data)
+
+                def fast():
+                    qs = queryset()
+                    return renderer.render(values.serialize(values.values(qs)[:page_size], queryset=qs))
+
+                assert drf() == fast()
+                repeat = 10 if page_size >= 1000 else 50
+                drf_ms = measure(drf, repeat=repeat)['p50_ms']
+                fast_ms = measure(fast, repeat=repeat)['p50_ms']
+                rows.append((label, page_size, drf_ms, count_queries(drf), fast_ms, count_queries(fast),
+                             drf_ms / fast_ms))
+
+        print_table(
+            'list page: fetch + serialize + render JSON',
+            ['list', 'rows', 'serializer p50 ms', 'queries', 'values p50 ms', 'queries', 'speedup'],
+            rows,
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Shared setup and timing helpers for the benchmark scripts."""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rentalSystem.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database(*, path=None):
+    """
+    Create a throwaway test database for the duration of the block.
+
+    Args:
+        path: SQLite file to create it in, for benchmarks whose other threads or
+            processes must see it (the default test database is in memory)
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    if path is not None:
+        connection.settings_dict['TEST']['NAME'] = str(path)
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def seed_store(*, name='Bench Store', items: int = 0, quantity: int = 1_000_000):
+    """Create a store, a member user and ``items`` rentable items."""
+    from accounts.models import StoreUser, User
+    from inventory.models import Item
+    from stores.models import Store
+
+    store = Store.objects.create(name=name, slug=name.lower().replace(' ', '-'))
+    user = User.objects.create_user(username=f'{store.slug}-user', password='bench')
+    StoreUser.objects.create(user=user, store=store, role=StoreUser.ROLE_ADMIN)
+    Item.objects.bulk_create([
+        Item(
+            store=store,
+            name=f'Item {i}',
+            sku=f'SKU{i:07d}',
+            price=Decimal('10.00'),
+            rental_rate=Decimal('2.00'),
+            quantity=quantity,
+        )
+        for i in range(items)
+    ])
+    return store, user
+
+
+def measure(fn, *, repeat: int = 20, warmup: int = 2):
+    """Call ``fn`` repeatedly and return timing stats in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'mean_ms': statistics.fmean(samples),
+        'p50_ms': samples[len(samples) // 2],
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def count_queries(fn):
+    """Return the number of SQL queries issued by ``fn``."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as ctx:
+        fn()
+    return len(ctx.captured_queries)
+
+
+def print_table(title, headers, rows):
+    print(f"\n{title}")
+    widths = [max(len(str(h)), *(len(_fmt(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print('  '.join(str(h).rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print('  '.join(_fmt(v).rjust(w) for v, w in zip(row, widths)))
+
+
+def _fmt(value):
+    if isinstance(value, float):
+        return f'{value:.3f}'
+    return str(value)
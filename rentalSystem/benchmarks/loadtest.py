@@ -0,0 +1,514 @@
+"""
+Load test for the v1 API: browse, search, create-rental and return workloads.
+
+    python -m benchmarks.loadtest [--mode inprocess|server] [--concurrency 8] [--requests 400]
+                                  [--workloads browse,search,create-rental,return] [--seed 1]
+                                  [--items 5000] [--rentals 2000] [--output FILE] [--compare FILE]
+
+A dataset generated from ``--seed`` is written to a throwaway SQLite file, so
+two runs with the same arguments send the same requests against the same rows.
+Each of ``--concurrency`` workers logs in with a session and sends its share of
+``--requests`` per workload, after a short warmup:
+
+- ``inprocess``: worker threads call the WSGI handler through ``django.test.Client``
+- ``server``: Django's threaded WSGI server on a free local port, one keep-alive
+  HTTP connection per worker (the request handler and socket I/O are included)
+
+Workloads run one after another. Per workload it reports p50/p95/p99 latency,
+throughput, non-2xx responses and SQL queries per request (all connections,
+session and user lookups included). Results are saved as JSON with the commit
+and settings (``benchmarks/results/<commit>-<mode>-c<concurrency>.json`` unless
+``--output`` is given); ``--compare`` prints the change against an earlier file.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from http.cookies import SimpleCookie
+from pathlib import Path
+
+from .harness import print_table, seed_store, setup_django, test_database
+
+WORKLOADS = ('browse', 'search', 'create-rental', 'return')
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+PASSWORD = 'bench'
+SYLLABLES = 'ka te ro mi lu pa sen dor vik tal gro ben fi nu sha mar'.split()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.loadtest', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--mode', choices=('inprocess', 'server'), default='inprocess')
+    parser.add_argument('--concurrency', type=int, default=8, help='workers sending requests at once')
+    parser.add_argument('--requests', type=int, default=400, help='timed requests per workload, over all workers')
+    parser.add_argument('--warmup', type=int, default=5, help='untimed requests per worker before each workload')
+    parser.add_argument('--workloads', default=','.join(WORKLOADS), help='comma-separated subset of workloads')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--items', type=int, default=5_000)
+    parser.add_argument('--categories', type=int, default=50)
+    parser.add_argument('--rentals', type=int, default=2_000, help='rentals in the history before the run')
+    parser.add_argument('--output', type=Path, help='where to save the results as JSON')
+    parser.add_argument('--compare', type=Path, help='earlier results file to compare against')
+    args = parser.parse_args(argv)
+    args.workloads = [name.strip() for name in args.workloads.split(',') if name.strip()]
+    unknown = set(args.workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(sorted(unknown))}")
+    return args
+
+
+# Dataset
+
+class Dataset:
+    """Ids and terms the workloads draw from; ``open_rentals`` is refilled before the return workload."""
+
+    def __init__(self, *, store, user, item_ids, words):
+        self.store_id = store.id
+        self.store = store
+        self.user = user
+        self.username = user.get_username()
+        self.item_ids = item_ids
+        self.words = words
+        self.item_pages = max(1, len(item_ids) // 20)
+        self.rental_ids = []
+        self.open_rentals = []
+
+
+def seed_dataset(args):
+    """Create the store, its catalogue and rental history from ``args.seed``."""
+    from inventory import search
+    from inventory.models import Category, Item
+    from rentals.models import Rental, RentalItem
+
+    rng = random.Random(args.seed)
+    words = sorted({a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES})
+    store, user = seed_store(name='Load Store')
+
+    categories = Category.objects.bulk_create([
+        Category(store=store, name=f'{rng.choice(words).title()} {i}') for i in range(args.categories)
+    ])
+    Item.objects.bulk_create([
+        Item(
+            store=store,
+            category=rng.choice(categories) if categories else None,
+            name=f"{' '.join(rng.choices(words, k=3)).title()} {i}",
+            sku=f'SKU{i:07d}',
+            description=' '.join(rng.choices(words, k=8)),
+            price=Decimal(rng.randint(500, 50_000)) / 100,
+            rental_rate=Decimal(rng.randint(100, 5_000)) / 100,
+            quantity=rng.randint(1_000, 5_000),
+        )
+        for i in range(args.items)
+    ], batch_size=1_000)
+    item_ids = list(Item.objects.filter(store=store).order_by('id').values_list('id', flat=True))
+
+    today = date.today()
+    rentals = Rental.objects.bulk_create([
+        Rental(
+            store=store,
+            created_by=user,
+            customer_name=f'Customer {rng.randint(1, args.rentals // 4 + 1)}',
+            starts_on=today - timedelta(days=rng.randint(0, 365)),
+            due_date=today + timedelta(days=rng.randint(-30, 14)),
+            status=Rental.STATUS_RETURNED if rng.random() < 0.8 else Rental.STATUS_ACTIVE,
+            total=Decimal(rng.randint(1_000, 20_000)) / 100,
+        )
+        for _ in range(args.rentals)
+    ], batch_size=1_000)
+    lines = []
+    for rental in rentals:
+        for item_id in rng.sample(item_ids, rng.randint(1, 3)):
+            qty = rng.randint(1, 3)
+            lines.append(RentalItem(
+                rental=rental, item_id=item_id, qty=qty, per_day=Decimal('2.00'),
+                returned_qty=qty if rental.status == Rental.STATUS_RETURNED else 0,
+            ))
+    RentalItem.objects.bulk_create(lines, batch_size=1_000)
+
+    if search.is_available():
+        search.rebuild(store=store)
+    dataset = Dataset(store=store, user=user, item_ids=item_ids, words=words)
+    dataset.rental_ids = [rental.id for rental in rentals]
+    return dataset
+
+
+def open_rentals(dataset, count):
+    """Create ``count`` active rentals through the service for the return workload to close."""
+    from rentals.services import RentalService
+
+    rng = random.Random(count)
+    due_date = date.today() + timedelta(days=3)
+    dataset.open_rentals = [
+        RentalService.create_rental(
+            store=dataset.store,
+            created_by=dataset.user,
+            customer_name='Load Return',
+            due_date=due_date,
+            items=[{'item_id': item_id, 'qty': 1, 'per_day': Decimal('2.00')}
+                   for item_id in rng.sample(dataset.item_ids, 2)],
+        ).id
+        for _ in range(count)
+    ]
+
+
+# Workloads: each returns the next (method, path, body) for a worker
+
+def browse(rng, dataset):
+    prefix = f'/api/v1/stores/{dataset.store_id}'
+    roll = rng.random()
+    if roll < 0.35:
+        return 'GET', f'{prefix}/items/?page={rng.randint(1, min(dataset.item_pages, 50))}', None
+    if roll < 0.60:
+        return 'GET', f'{prefix}/items/{rng.choice(dataset.item_ids)}/', None
+    if roll < 0.70:
+        return 'GET', f'{prefix}/categories/', None
+    if roll < 0.85:
+        return 'GET', f'{prefix}/rentals/', None
+    return 'GET', f'{prefix}/rentals/{rng.choice(dataset.rental_ids)}/', None
+
+
+def search(rng, dataset):
+    roll = rng.random()
+    if roll < 0.6:
+        term = rng.choice(dataset.words)
+    elif roll < 0.8:
+        # Prefix of a word, as typed in a search box
+        term = rng.choice(dataset.words)[:4]
+    else:
+        term = f'SKU{rng.randrange(len(dataset.item_ids)):07d}'
+    return 'GET', f'/api/v1/stores/{dataset.store_id}/items/?search={term}', None
+
+
+def create_rental(rng, dataset):
+    return 'POST', f'/api/v1/stores/{dataset.store_id}/rentals/', {
+        'customer_name': f'Customer {rng.randint(1, 10_000)}',
+        'due_date': (date.today() + timedelta(days=rng.randint(1, 14))).isoformat(),
+        'items': [
+            {'item_id': item_id, 'qty': rng.randint(1, 2), 'per_day': 2.5}
+            for item_id in rng.sample(dataset.item_ids, rng.randint(1, 3))
+        ],
+    }
+
+
+def return_rental(rng, dataset):
+    rental_id = dataset.open_rentals.pop()
+    return 'POST', f'/api/v1/stores/{dataset.store_id}/rentals/{rental_id}/return/', {'return_all': True}
+
+
+REQUEST_MAKERS = {
+    'browse': browse,
+    'search': search,
+    'create-rental': create_rental,
+    'return': return_rental,
+}
+
+
+# Clients
+
+class InProcessClient:
+    """Requests through the WSGI handler, without a socket."""
+
+    def __init__(self, username):
+        from django.test import Client
+
+        self.client = Client()
+        if not self.client.login(username=username, password=PASSWORD):
+            raise RuntimeError(f'Could not log in as {username}')
+
+    def request(self, method, path, body):
+        data = json.dumps(body) if body is not None else None
+        response = self.client.generic(method, path, data=data or '', content_type='application/json',
+                                       HTTP_ACCEPT='application/json')
+        if response.streaming:
+            b''.join(response.streaming_content)
+        else:
+            response.content
+        return response.status_code
+
+
+class HTTPClient:
+    """Requests over one keep-alive connection, authenticated like a browser: session cookie plus CSRF header."""
+
+    def __init__(self, address, username):
+        self.connection = http.client.HTTPConnection(*address, timeout=60)
+        self.headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
+        status, response = self._send('POST', '/api/v1/auth/login/', {'username': username, 'password': PASSWORD})
+        if status != 200:
+            raise RuntimeError(f'Could not log in as {username}: {status}')
+        cookies = SimpleCookie()
+        for header in response.headers.get_all('Set-Cookie') or ():
+            cookies.load(header)
+        self.headers['Cookie'] = '; '.join(f'{name}={morsel.value}' for name, morsel in cookies.items())
+        self.headers['X-CSRFToken'] = cookies['csrftoken'].value
+
+    def request(self, method, path, body):
+        return self._send(method, path, body)[0]
+
+    def _send(self, method, path, body):
+        payload = json.dumps(body).encode() if body is not None else None
+        for attempt in range(2):
+            try:
+                self.connection.request(method, path, body=payload, headers=self.headers)
+                response = self.connection.getresponse()
+                response.read()
+                return response.status, response
+            except (http.client.RemoteDisconnected, ConnectionError):
+                # The server closed the idle connection; reconnect once
+                self.connection.close()
+                if attempt:
+                    raise
+
+
+def start_server():
+    """Serve the project's WSGI application from a daemon thread; returns (server, address)."""
+    from django.conf import settings
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+
+    class QuietHandler(WSGIRequestHandler):
+        def setup(self):
+            super().setup()
+            # Headers and body go out in separate writes; without this, a keep-alive
+            # client's delayed ACK holds the body back for 40 ms (gunicorn sets it too)
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def log_message(self, format, *args):
+            pass
+
+    # The test environment only allows "testserver", as LiveServerTestCase does
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, '127.0.0.1']
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler, allow_reuse_address=False)
+    server.set_app(get_internal_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address
+
+
+# Measurement
+
+class QueryCounter:
+    """Counts SQL statements on every connection, including ones opened by worker and server threads."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self, sender=None, connection=None, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of sorted ``samples``."""
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else None
+
+
+def run_workload(name, args, dataset, make_client, counter):
+    make_request = REQUEST_MAKERS[name]
+    share, extra = divmod(args.requests, args.concurrency)
+    quotas = [share + (index < extra) for index in range(args.concurrency)]
+    ready = threading.Barrier(args.concurrency + 1)
+    go = threading.Event()
+    results = [None] * args.concurrency
+
+    def worker(index):
+        from django.db import connections
+
+        rng = random.Random(f'{args.seed}-{name}-{index}')
+        latencies, errors = [], 0
+        try:
+            client = make_client()
+            for _ in range(args.warmup):
+                client.request(*make_request(rng, dataset))
+        finally:
+            ready.wait()
+        go.wait()
+        try:
+            for _ in range(quotas[index]):
+                request = make_request(rng, dataset)
+                started = time.perf_counter()
+                try:
+                    status = client.request(*request)
+                except Exception:
+                    status = None
+                latencies.append((time.perf_counter() - started) * 1000)
+                if status is None or status >= 400:
+                    errors += 1
+        finally:
+            connections.close_all()
+        results[index] = (latencies, errors)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    counter.count = 0
+    started = time.perf_counter()
+    go.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    queries = counter.count
+
+    if any(result is None for result in results):
+        raise RuntimeError(f'{name}: a worker failed before sending its requests')
+    latencies = sorted(latency for result in results for latency in result[0])
+    done = len(latencies)
+    return {
+        'requests': done,
+        'errors': sum(result[1] for result in results),
+        'duration_s': elapsed,
+        'throughput_rps': done / elapsed,
+        'mean_ms': sum(latencies) / done,
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'max_ms': latencies[-1],
+        'queries_per_request': queries / done,
+    }
+
+
+# Results
+
+def environment(args):
+    import django
+    from django.conf import settings
+    from django.db import connection
+
+    return {
+        'commit': _git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'cpus': os.cpu_count(),
+        'mode': args.mode,
+        'concurrency': args.concurrency,
+        'requests': args.requests,
+        'warmup': args.warmup,
+        'seed': args.seed,
+        'dataset': {'items': args.items, 'categories': args.categories, 'rentals': args.rentals},
+        'settings': {
+            'transaction_mode': connection.settings_dict['OPTIONS'].get('transaction_mode'),
+            'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            'catalog_cache': getattr(settings, 'CATALOG_CACHE', None),
+        },
+    }
+
+
+def _git(*command):
+    try:
+        return subprocess.run(
+            ['git', *command], capture_output=True, text=True, check=True, cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(meta, results):
+    print_table(
+        f"{meta['mode']}, {meta['concurrency']} workers, {meta['requests']} requests per workload "
+        f"(commit {meta['commit']}{'+' if meta['dirty'] else ''})",
+        ['workload', 'requests', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'queries/req'],
+        [
+            (name, result['requests'], result['errors'], result['throughput_rps'], result['p50_ms'],
+             result['p95_ms'], result['p99_ms'], result['queries_per_request'])
+            for name, result in results.items()
+        ],
+    )
+
+
+def print_comparison(baseline, meta, results):
+    """Change of each workload against ``baseline``, an earlier results file."""
+    different = [
+        key for key in ('mode', 'concurrency', 'requests', 'seed', 'dataset') if baseline['meta'].get(key) != meta[key]
+    ]
+    if different:
+        print(f"\nwarning: baseline differs in {', '.join(different)}; numbers are not directly comparable")
+
+    def change(old, new):
+        return f'{(new - old) / old * 100:+.1f}%' if old else 'n/a'
+
+    rows = []
+    for name, result in results.items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        rows.append((
+            name,
+            old['throughput_rps'], result['throughput_rps'], change(old['throughput_rps'], result['throughput_rps']),
+            old['p95_ms'], result['p95_ms'], change(old['p95_ms'], result['p95_ms']),
+            old['queries_per_request'], result['queries_per_request'],
+        ))
+    print_table(
+        f"against {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})",
+        ['workload', 'base req/s', 'req/s', 'change', 'base p95 ms', 'p95 ms', 'change', 'base q/req', 'q/req'],
+        rows,
+    )
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_django()
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    counter = QueryCounter()
+    connection_created.connect(counter.install, weak=False)
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+
+    with tempfile.TemporaryDirectory() as tmp, test_database(path=Path(tmp) / 'load.sqlite3') as connection:
+        counter.install(connection=connection)
+        started = time.perf_counter()
+        dataset = seed_dataset(args)
+        print(f'seeded {args.items} items and {args.rentals} rentals in {time.perf_counter() - started:.1f}s')
+
+        server = None
+        if args.mode == 'server':
+            server, address = start_server()
+
+            def make_client():
+                return HTTPClient(address, dataset.username)
+        else:
+            def make_client():
+                return InProcessClient(dataset.username)
+
+        results = {}
+        try:
+            for name in args.workloads:
+                if name == 'return':
+                    open_rentals(dataset, args.requests + args.warmup * args.concurrency)
+                # Worker threads open their own connections to the file
+                connections.close_all()
+                results[name] = run_workload(name, args, dataset, make_client, counter)
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+        meta = environment(args)
+
+    print_results(meta, results)
+    output = args.output or RESULTS_DIR / f"{meta['commit'] or 'unknown'}-{args.mode}-c{args.concurrency}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({'meta': meta, 'results': results}, indent=2) + '\n')
+    print(f'\nsaved {output}')
+    if baseline is not None:
+        print_comparison(baseline, meta, results)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,204 @@
+"""
+Async GET handlers for DRF views, for the read path under ASGI.
+
+DRF views are synchronous: under ASGI Django runs each of them through
+``sync_to_async``, holding a thread for the whole request. An async view
+built here stays on the event loop for GET. Authentication, permissions,
+the store and membership lookups, pagination and serialization all await
+the async ORM and the async cache API, so a thread is only held for the
+length of a query (Django's async ORM still runs queries in threads). Every other method (and HEAD and
+OPTIONS) goes to the class's ordinary DRF view, so one class serves both.
+
+An async view subclasses the sync one::
+
+    class ItemListAsyncAPIView(AsyncReadMixin, ItemListCreateAPIView, AsyncListMixin):
+        async def aget_validator(self): ...
+
+``AsyncReadMixin`` goes first and replaces ``as_view``; ``AsyncListMixin``
+or ``AsyncRetrieveMixin`` goes last and ends the ``aget``/``alist`` chain
+that ``ConditionalGetMixin``, ``CatalogCacheMixin`` and ``ValuesListMixin``
+extend, as ``ListModelMixin`` ends the sync one. Nothing in the chain may
+query synchronously: permissions implement ``ahas_permission`` (plain
+``has_permission`` is called as is, so it must not query) and serializers
+must only read relations the queryset loads.
+
+Responses are JSON only (no browsable API) and are rendered before they
+are returned; Django would render a DRF ``Response`` in a thread.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth import aauthenticate as aauthenticate_credentials, get_user_model
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from django.shortcuts import aget_object_or_404
+from django.utils.translation import gettext_lazy as _
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from rest_framework.response import Response
+
+from .renderers import FastJSONRenderer
+
+
+class _BasicCredentials(BasicAuthentication):
+    """Parses the header as ``BasicAuthentication`` does, returning the credentials unchecked."""
+
+    def authenticate_credentials(self, userid, password, request=None):
+        return userid, password
+
+
+async def _abasic_authenticate(request):
+    credentials = _BasicCredentials().authenticate(request)
+    if credentials is None:
+        return None
+    userid, password = credentials
+    user = await aauthenticate_credentials(
+        request=request, **{get_user_model().USERNAME_FIELD: userid, 'password': password},
+    )
+    if user is None:
+        raise exceptions.AuthenticationFailed(_('Invalid username/password.'))
+    if not user.is_active:
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+    return user, None
+
+
+async def aauthenticate(request):
+    """
+    Authenticate a DRF request as ``Request._authenticate`` would.
+
+    Session and basic authentication use Django's async auth API; other
+    authentication classes run in a thread. Session authentication skips
+    the CSRF check, which only applies to unsafe methods.
+    """
+    for authenticator in request.authenticators:
+        try:
+            if isinstance(authenticator, SessionAuthentication):
+                user = await request._request.auser()
+                user_auth = (user, None) if user and user.is_active else None
+            elif isinstance(authenticator, BasicAuthentication):
+                user_auth = await _abasic_authenticate(request)
+            else:
+                user_auth = await sync_to_async(authenticator.authenticate)(request)
+        except exceptions.APIException:
+            request._not_authenticated()
+            raise
+        if user_auth is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = user_auth
+            return
+    request._not_authenticated()
+
+
+class AsyncReadMixin:
+    """GET on an async handler, other methods on the DRF view; goes first in the bases."""
+
+    async_renderer_classes = (FastJSONRenderer,)
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        sync_view = sync_to_async(super().as_view(**initkwargs))
+
+        async def view(request, *args, **kwargs):
+            if request.method != 'GET':
+                return await sync_view(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            self.setup(request, *args, **kwargs)
+            return await self.adispatch(request, *args, **kwargs)
+
+        view.cls = cls
+        view.initkwargs = initkwargs
+        # Like APIView; session authentication checks CSRF itself
+        return csrf_exempt(view)
+
+    @classmethod
+    def sync_view_class(cls):
+        """The DRF view this one serves GETs for: the class after this mixin."""
+        mro = cls.__mro__
+        return mro[mro.index(AsyncReadMixin) + 1]
+
+    async def adispatch(self, request, *args, **kwargs):
+        """``dispatch`` with authentication, permissions and the handler awaited."""
+        self.args = args
+        self.kwargs = kwargs
+        self.renderer_classes = self.async_renderer_classes
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            response = await self.aget(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.render_now(self.response)
+
+    async def ainitial(self, request, *args, **kwargs):
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        request.accepted_renderer, request.accepted_media_type = self.perform_content_negotiation(request)
+        request.version, request.versioning_scheme = self.determine_version(request, *args, **kwargs)
+        await aauthenticate(request)
+        await self.acheck_permissions(request)
+        self.check_throttles(request)
+
+    async def acheck_permissions(self, request):
+        """``check_permissions``, awaiting ``ahas_permission`` where a permission has one."""
+        for permission in self.get_permissions():
+            check = getattr(permission, 'ahas_permission', None)
+            allowed = await check(request, self) if check is not None else permission.has_permission(request, self)
+            if not allowed:
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, 'message', None),
+                    code=getattr(permission, 'code', None),
+                )
+
+    @staticmethod
+    def render_now(response):
+        if not isinstance(response, Response):
+            return response
+        response.render()
+        rendered = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            rendered[header] = value
+        return rendered
+
+
+class AsyncListMixin:
+    """``aget`` of list views, ending the ``alist`` chain; goes last in the bases."""
+
+    async def aget(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer([row async for row in queryset], many=True).data)
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+
+
+class AsyncRetrieveMixin:
+    """``aget`` of detail views; goes last in the bases."""
+
+    async def aget(self, request, *args, **kwargs):
+        return await self.aretrieve(request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return Response(self.get_serializer(await self.aget_object()).data)
+
+    async def aget_object(self):
+        """``get_object`` on the async ORM."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await aget_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
@@ -0,0 +1,152 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+def get_store_access_cache():
+    """
+    Cache used for cross-request store and membership lookups.
+    
+    Returns None unless ``settings.STORE_ACCESS_CACHE`` names a cache alias.
+    """
+    alias = getattr(settings, 'STORE_ACCESS_CACHE', None)
+    if not alias:
+        return None
+    return caches[alias]
+
+
+def get_store_access_timeout() -> int:
+    return getattr(settings, 'STORE_ACCESS_CACHE_TIMEOUT', 300)
+
+
+def store_key(store_id) -> str:
+    return f"store-access:store:{store_id}"
+
+
+def membership_key(user_id, store_id) -> str:
+    return f"store-access:member:{store_id}:{user_id}"
+
+
+def invalidate_store(store_id):
+    cache = get_store_access_cache()
+    if cache is not None:
+        cache.delete(store_key(store_id))
+
+
+def invalidate_membership(user_id, store_id):
+    cache = get_store_access_cache()
+    if cache is not None:
+        cache.delete(membership_key(user_id, store_id))
+
+
+def get_catalog_cache():
+    """
+    Cache for versioned catalog responses (category and item lists).
+    
+    Returns None unless ``settings.CATALOG_CACHE`` names a cache alias.
+    """
+    alias = getattr(settings, 'CATALOG_CACHE', None)
+    if not alias:
+        return None
+    return caches[alias]
+
+
+def get_catalog_cache_timeout() -> int:
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+
+
+def catalog_version_key(store_id) -> str:
+    return f"catalog:version:{store_id}"
+
+
+def catalog_response_key(store_id, version, view_name, origin, params) -> str:
+    """Key of a cached list response; ``origin`` (scheme and host) because pagination links are absolute."""
+    digest = hashlib.md5(repr((origin, params)).encode(), usedforsecurity=False).hexdigest()
+    return f"catalog:response:{store_id}:{version}:{view_name}:{digest}"
+
+
+def get_catalog_version(cache, store_id) -> str:
+    """
+    The store's current catalog version, created on first use.
+    
+    Versions are random tokens rather than counters, so a version key lost
+    to eviction can never come back as a value some old entry was stored under.
+    """
+    key = catalog_version_key(store_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_catalog_version(cache, store_id) -> str:
+    """``get_catalog_version`` through the cache's async API."""
+    key = catalog_version_key(store_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, uuid.uuid4().hex, None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_catalog_version(store_id):
+    """Move the store to a new catalog version; entries under the old one are never read again."""
+    cache = get_catalog_cache()
+    if cache is not None and store_id is not None:
+        cache.set(catalog_version_key(store_id), uuid.uuid4().hex, None)
+
+
+def bump_catalog_version_on_commit(store_ids):
+    """
+    Bump the catalog versions of ``store_ids`` once the current transaction commits.
+    
+    Bumping before the commit would let a concurrent request cache the old
+    rows under the new version.
+    """
+    if get_catalog_cache() is None:
+        return
+    for store_id in set(store_ids):
+        if store_id is not None:
+            transaction.on_commit(lambda store_id=store_id: bump_catalog_version(store_id))
+
+
+CATALOG_STAT_KEYS = {'hits': 'catalog:stats:hits', 'misses': 'catalog:stats:misses'}
+
+
+def record_catalog_lookup(cache, *, hit: bool):
+    """Count a catalog cache hit or miss in the cache itself, so every worker sharing it adds up."""
+    key = CATALOG_STAT_KEYS['hits' if hit else 'misses']
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+async def arecord_catalog_lookup(cache, *, hit: bool):
+    """``record_catalog_lookup`` through the cache's async API."""
+    key = CATALOG_STAT_KEYS['hits' if hit else 'misses']
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        if not await cache.aadd(key, 1, None):
+            await cache.aincr(key)
+
+
+def catalog_cache_stats() -> dict:
+    """Hits and misses counted since the last reset (zeros when the cache is disabled)."""
+    cache = get_catalog_cache()
+    if cache is None:
+        return {'hits': 0, 'misses': 0}
+    return {name: cache.get(key, 0) for name, key in CATALOG_STAT_KEYS.items()}
+
+
+def reset_catalog_cache_stats():
+    cache = get_catalog_cache()
+    if cache is not None:
+        cache.delete_many(list(CATALOG_STAT_KEYS.values()))
+
@@ -1,3 +1,20 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import exceptions, views
+from rest_framework.fields import get_error_detail
+
+
 class ApplicationError(Exception):
     """Base exception for application-specific errors."""
     pass
+
+
+def exception_handler(exc, context):
+    """
+    DRF's exception handler, also turning Django ``ValidationError`` into 400.
+
+    Services raise Django's ``ValidationError`` (invalid transitions, short
+    stock or availability); DRF would leave it unhandled, as a 500.
+    """
+    if isinstance(exc, DjangoValidationError):
+        exc = exceptions.ValidationError(get_error_detail(exc))
+    return views.exception_handler(exc, context)
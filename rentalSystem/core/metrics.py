@@ -0,0 +1,408 @@
+"""
+Process-wide counters and histograms, exposed in the Prometheus text format.
+
+Values live in memory in each process. With ``METRICS_DIR`` set, each process
+also writes a snapshot of its values to ``<METRICS_DIR>/<pid>-<token>.json``
+on an update at least ``METRICS_FLUSH_INTERVAL`` seconds after the last
+write, and at exit. ``render()`` adds its own live values to every other
+process's snapshot in the directory, so one scrape of ``/metrics`` covers
+all workers on the host, at most one flush interval behind. Snapshots of
+exited workers are kept so that counters never go backwards; clear the
+directory when deploying. Without ``METRICS_DIR`` each process reports only
+itself.
+
+Service operations are wrapped in ``track_operation``, which records
+``service_operations_total`` by outcome (``success`` or a failure reason),
+``service_operation_duration_seconds`` and
+``service_operation_lock_wait_seconds``. Lock wait is time spent in
+statements that wait for a database lock: ``BEGIN IMMEDIATE`` /
+``BEGIN EXCLUSIVE`` on SQLite and ``SELECT ... FOR UPDATE``. Both stop at
+the operation's commit, so ``on_commit`` callbacks are not counted.
+"""
+import atexit
+import bisect
+import functools
+import hmac
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import DatabaseError, connections, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, registry, name: str, documentation: str, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def _key(self, labels):
+        if labels.keys() != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {', '.join(self.labelnames) or 'none'}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def definition(self) -> dict:
+        return {'kind': self.kind, 'documentation': self.documentation, 'labelnames': list(self.labelnames)}
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.updated()
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # Per-bucket counts, the last one for values above every bound; made cumulative when rendered
+        index = bisect.bisect_left(self.buckets, value)
+        with self.registry.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+        self.registry.updated()
+
+    def definition(self) -> dict:
+        return {**super().definition(), 'buckets': list(self.buckets)}
+
+
+class Registry:
+    """Metrics of this process, plus the snapshots other processes wrote to ``METRICS_DIR``."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self._new_process()
+
+    def _new_process(self):
+        self.token = uuid.uuid4().hex[:12]
+        self._flushed_at = 0.0
+        self._flush_at_exit = False
+        # Separate from ``lock``, which ``snapshot`` takes while a flush holds this one
+        self._flush_lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            if existing.definition() != metric.definition():
+                raise ValueError(f"Metric {metric.name} is already registered differently")
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def reset(self):
+        """Forget every value of this process; a forked child starts from zero too."""
+        with self.lock:
+            for metric in self.metrics.values():
+                metric.values.clear()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                name: {**metric.definition(), 'samples': [[list(key), _copy(value)] for key, value in metric.values.items()]}
+                for name, metric in self.metrics.items()
+            }
+
+    # Sharing between processes
+
+    def updated(self):
+        directory = getattr(settings, 'METRICS_DIR', None)
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0)
+        if not directory or time.monotonic() - self._flushed_at < interval:
+            return
+        # Another thread is flushing: skip, these values go out with the next flush
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - self._flushed_at >= interval:
+                self._write(directory)
+        finally:
+            self._flush_lock.release()
+
+    def snapshot_path(self, directory) -> Path:
+        return Path(directory) / f'{os.getpid()}-{self.token}.json'
+
+    def flush(self, directory=None):
+        """Write this process's snapshot for the others to read; atomic, so readers never see half a file."""
+        directory = directory or getattr(settings, 'METRICS_DIR', None)
+        if not directory:
+            return
+        with self._flush_lock:
+            self._write(directory)
+
+    def _write(self, directory):
+        self._flushed_at = time.monotonic()
+        if not self._flush_at_exit:
+            self._flush_at_exit = True
+            atexit.register(self.flush, directory)
+        path = self.snapshot_path(directory)
+        temporary = path.with_suffix('.tmp')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary.write_text(json.dumps(self.snapshot()))
+            os.replace(temporary, path)
+        except OSError:
+            # Metrics must never fail the operation they measure; the next flush tries again
+            logger.warning("Could not write metrics snapshot to %s", path, exc_info=True)
+
+    def collect(self) -> dict:
+        """Snapshot of this process merged with every other process's latest one."""
+        merged = self.snapshot()
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if not directory:
+            return merged
+        own = self.snapshot_path(directory)
+        for path in sorted(Path(directory).glob('*.json')):
+            if path == own:
+                continue
+            try:
+                _merge(merged, json.loads(path.read_text()))
+            except (OSError, ValueError):
+                # Unreadable or from an incompatible version: skip it rather than fail the scrape
+                continue
+        return merged
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {_escape(metric['documentation'])}")
+            lines.append(f"# TYPE {name} {metric['kind']}")
+            labelnames = metric['labelnames']
+            for values, value in sorted(metric['samples'], key=lambda sample: sample[0]):
+                labels = list(zip(labelnames, values))
+                if metric['kind'] == 'counter':
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip([*metric['buckets'], math.inf], counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_labels([*labels, ('le', _number(bound))])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+
+def _copy(value):
+    return [list(value[0]), value[1], value[2]] if isinstance(value, list) else value
+
+
+def _merge(into, snapshot):
+    for name, metric in snapshot.items():
+        target = into.get(name)
+        if target is None or {k: v for k, v in metric.items() if k != 'samples'} != {
+            k: v for k, v in target.items() if k != 'samples'
+        }:
+            continue
+        samples = {tuple(values): value for values, value in target['samples']}
+        for values, value in metric['samples']:
+            key = tuple(values)
+            if key not in samples:
+                samples[key] = _copy(value)
+            elif target['kind'] == 'counter':
+                samples[key] += value
+            else:
+                current = samples[key]
+                current[0] = [a + b for a, b in zip(current[0], value[0])]
+                current[1] += value[1]
+                current[2] += value[2]
+        target['samples'] = [[list(key), value] for key, value in samples.items()]
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value)
+
+
+REGISTRY = Registry()
+os.register_at_fork(after_in_child=lambda: (REGISTRY.reset(), REGISTRY._new_process()))
+
+
+# Service operations
+
+OPERATIONS = REGISTRY.counter(
+    'service_operations_total', 'Service operations by outcome: success or the failure reason', ('operation', 'outcome'),
+)
+DURATION = REGISTRY.histogram(
+    'service_operation_duration_seconds', 'Service operation latency, failures included', ('operation',),
+)
+LOCK_WAIT = REGISTRY.histogram(
+    'service_operation_lock_wait_seconds', 'Time a service operation waited for database locks', ('operation',),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0),
+)
+RENTAL_LINES = REGISTRY.histogram(
+    'rental_lines_per_rental', 'Lines of each rental created', buckets=(1, 2, 3, 5, 10, 20, 50, 100),
+)
+
+
+class _Operation:
+    """Lock wait and commit time of the operation running in a context."""
+
+    def __init__(self, watch_commit: bool):
+        self.lock_wait = 0.0
+        # Only an operation that opens the transaction sees its commit, and its on_commit callbacks run inside it
+        self.watch_commit = watch_commit
+        self.committed_at = None
+
+    def committed(self):
+        self.committed_at = time.perf_counter()
+
+
+_operation = ContextVar('operation', default=None)
+
+
+def failure_reason(exc) -> str:
+    """Label for a failed operation: the ValidationError code, or the kind of error."""
+    if isinstance(exc, ValidationError):
+        codes = {error.code for error in exc.error_list} if hasattr(exc, 'error_list') else set()
+        return codes.pop() if len(codes) == 1 and None not in codes else 'invalid'
+    if isinstance(exc, ObjectDoesNotExist):
+        return 'not_found'
+    if isinstance(exc, ValueError):
+        return 'insufficient_stock' if str(exc).startswith('Insufficient stock') else 'invalid'
+    if isinstance(exc, DatabaseError):
+        return 'database_error'
+    return 'error'
+
+
+def track_operation(name: str):
+    """
+    Record count, outcome, latency and lock wait of each call.
+
+    Goes outside ``transaction.atomic``, so that the wait for the write lock
+    at ``BEGIN`` is part of both the latency and the lock wait. Both end at
+    the commit: ``on_commit`` callbacks run on the way out of the atomic
+    block but are not part of the operation.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for connection in connections.all(initialized_only=True):
+                install(connection)
+            operation = _Operation(watch_commit=not transaction.get_connection().in_atomic_block)
+            token = _operation.set(operation)
+            started = time.perf_counter()
+            outcome = 'success'
+            try:
+                return func(*args, **kwargs)
+            except Exception as exc:
+                outcome = failure_reason(exc)
+                raise
+            finally:
+                ended = operation.committed_at or time.perf_counter()
+                _operation.reset(token)
+                OPERATIONS.inc(operation=name, outcome=outcome)
+                DURATION.observe(ended - started, operation=name)
+                LOCK_WAIT.observe(operation.lock_wait, operation=name)
+        return wrapper
+    return decorator
+
+
+def _waits_for_lock(sql) -> bool:
+    return sql.startswith(('BEGIN IMMEDIATE', 'BEGIN EXCLUSIVE')) or ' FOR UPDATE' in sql
+
+
+def record_lock_wait(execute, sql, params, many, context):
+    """
+    Execute wrapper adding locking statements to the current operation's lock wait.
+
+    Its first query inside the transaction it opened registers the
+    operation's commit marker, ahead of any ``on_commit`` callback it adds.
+    """
+    operation = _operation.get()
+    if operation is None or operation.committed_at is not None:
+        return execute(sql, params, many, context)
+    connection = context['connection']
+    if operation.watch_commit and connection.in_atomic_block:
+        operation.watch_commit = False
+        connection.on_commit(operation.committed)
+    if not _waits_for_lock(sql):
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        operation.lock_wait += time.perf_counter() - started
+
+
+def install(connection):
+    if record_lock_wait not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_lock_wait)
+
+
+@receiver(connection_created)
+def _install_on_connect(sender, connection, **kwargs):
+    install(connection)
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint; wants ``Authorization: Bearer <METRICS_TOKEN>``.
+
+    Without a token it is only served with ``DEBUG`` on, and refused otherwise.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse("Set METRICS_TOKEN to serve metrics", status=403, content_type='text/plain')
+    elif not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        response = HttpResponse(status=401)
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
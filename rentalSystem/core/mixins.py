@@ -1,8 +1,93 @@
+import hashlib
+
 from django.db import models
-from django.shortcuts import get_object_or_404
+from django.db.models import Count, Max
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from rest_framework import permissions
 from stores.models import Store
 
+from rest_framework.response import Response
+
+from .cache import (
+    aget_catalog_version, arecord_catalog_lookup, catalog_response_key, get_catalog_cache, get_catalog_cache_timeout,
+    get_catalog_version, get_store_access_cache, get_store_access_timeout, membership_key, record_catalog_lookup,
+    store_key,
+)
+from .timing import serializing
+from .values import values_serializer_for
+
+# Cached value for "user is not an active member"; None means a cache miss
+NOT_A_MEMBER = ''
+
+
+def resolve_store(store_id):
+    """Get a store by id, via the store access cache when it is enabled."""
+    cache = get_store_access_cache()
+    if cache is None:
+        return get_object_or_404(Store, id=store_id)
+    
+    key = store_key(store_id)
+    store = cache.get(key)
+    if store is None:
+        store = get_object_or_404(Store, id=store_id)
+        cache.set(key, store, get_store_access_timeout())
+    return store
+
+
+def get_membership_role(*, user, store):
+    """Role of an active member of the store, or None if the user is not one."""
+    from accounts.models import StoreUser
+    
+    cache = get_store_access_cache()
+    key = membership_key(user.pk, store.pk)
+    role = cache.get(key) if cache is not None else None
+    if role is None:
+        role = StoreUser.objects.filter(
+            user=user, store=store, is_active=True
+        ).values_list('role', flat=True).first() or NOT_A_MEMBER
+        if cache is not None:
+            cache.set(key, role, get_store_access_timeout())
+    return role or None
+
+
+async def aresolve_store(store_id):
+    """``resolve_store`` on the async ORM and the cache's async API."""
+    cache = get_store_access_cache()
+    if cache is None:
+        return await aget_object_or_404(Store, id=store_id)
+    
+    key = store_key(store_id)
+    store = await cache.aget(key)
+    if store is None:
+        store = await aget_object_or_404(Store, id=store_id)
+        await cache.aset(key, store, get_store_access_timeout())
+    return store
+
+
+async def aget_membership_role(*, user, store):
+    """``get_membership_role`` on the async ORM and the cache's async API."""
+    from accounts.models import StoreUser
+    
+    cache = get_store_access_cache()
+    key = membership_key(user.pk, store.pk)
+    role = await cache.aget(key) if cache is not None else None
+    if role is None:
+        role = await StoreUser.objects.filter(
+            user=user, store=store, is_active=True
+        ).values_list('role', flat=True).afirst() or NOT_A_MEMBER
+        if cache is not None:
+            await cache.aset(key, role, get_store_access_timeout())
+    return role or None
+
+
+def view_key(view) -> str:
+    """Name of the view in ETags and cache keys; an async view shares its sync view's."""
+    if hasattr(view, 'sync_view_class'):
+        return view.sync_view_class().__name__
+    return type(view).__name__
+
 
 class ServiceResult:
     def __init__(self, success: bool, data=None, error: str | None = None):
@@ -23,14 +108,45 @@ class TenancyMixin:
     """
     Mixin to enforce store-scoped data access.
     Ensures users can only access data from stores they belong to.
+    
+    The store and the user's role are resolved at most once per request.
     """
     
     def get_store(self):
         """Get store from URL parameters or request context."""
-        store_id = self.kwargs.get('store')
-        if store_id:
-            return get_object_or_404(Store, id=store_id)
-        return None
+        if not hasattr(self, '_store'):
+            store_id = self.kwargs.get('store')
+            self._store = resolve_store(store_id) if store_id else None
+        return self._store
+    
+    def get_membership_role(self):
+        """Get the requesting user's role in the store, or None if not a member."""
+        if not hasattr(self, '_membership_role'):
+            store = self.get_store()
+            user = self.request.user
+            if store and user.is_authenticated:
+                self._membership_role = get_membership_role(user=user, store=store)
+            else:
+                self._membership_role = None
+        return self._membership_role
+    
+    async def aget_store(self):
+        """``get_store`` for async views; ``get_store`` then answers from the same lookup."""
+        if not hasattr(self, '_store'):
+            store_id = self.kwargs.get('store')
+            self._store = await aresolve_store(store_id) if store_id else None
+        return self._store
+    
+    async def aget_membership_role(self):
+        """``get_membership_role`` for async views."""
+        if not hasattr(self, '_membership_role'):
+            store = await self.aget_store()
+            user = self.request.user
+            if store and user.is_authenticated:
+                self._membership_role = await aget_membership_role(user=user, store=store)
+            else:
+                self._membership_role = None
+        return self._membership_role
     
     def get_queryset(self):
         """Filter queryset by store if store-scoped."""
@@ -51,6 +167,201 @@ class TenancyMixin:
             serializer.save()
 
 
+def updated_at_validator(queryset):
+    """
+    Conditional-GET validator of a queryset: its row count and newest ``updated_at``.
+    
+    One aggregate query; the count catches deletions and rows leaving the
+    filter, which the newest ``updated_at`` alone would miss.
+    """
+    stats = queryset.order_by().aggregate(count=Count('pk'), last=Max('updated_at'))
+    return stats['count'], stats['last']
+
+
+async def aupdated_at_validator(queryset):
+    """``updated_at_validator`` on the async ORM."""
+    stats = await queryset.order_by().aaggregate(count=Count('pk'), last=Max('updated_at'))
+    return stats['count'], stats['last']
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified for GET, with 304 Not Modified answered before the
+    queryset is evaluated or serialized.
+    
+    Views implement ``get_validator()`` returning ``(version, last_modified)``
+    from a cheap query, or None to serve the request normally (e.g. to 404).
+    The ETag also covers the view, query string, renderer and the store's own
+    ``updated_at``, so pages, filters and formats never share one.
+    """
+    
+    def get_validator(self):
+        raise NotImplementedError
+    
+    async def aget_validator(self):
+        """``get_validator`` for async views."""
+        raise NotImplementedError
+    
+    def get(self, request, *args, **kwargs):
+        validator = self.get_validator()
+        if validator is None:
+            return super().get(request, *args, **kwargs)
+        
+        etag, timestamp = self.get_conditional_tags(request, validator)
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return self.finish_conditional_response(response, etag, timestamp)
+    
+    async def aget(self, request, *args, **kwargs):
+        validator = await self.aget_validator()
+        if validator is None:
+            return await super().aget(request, *args, **kwargs)
+        
+        etag, timestamp = self.get_conditional_tags(request, validator)
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = await super().aget(request, *args, **kwargs)
+        return self.finish_conditional_response(response, etag, timestamp)
+    
+    def get_conditional_tags(self, request, validator):
+        """ETag and Last-Modified timestamp of the response for ``validator``."""
+        version, last_modified = validator
+        store = self.get_store()
+        stamps = [stamp for stamp in (last_modified, store.updated_at if store else None) if stamp]
+        last_modified = max(stamps) if stamps else None
+        parts = (
+            view_key(self),
+            version,
+            last_modified.isoformat() if last_modified else '',
+            sorted(request.query_params.lists()),
+            request.accepted_renderer.format,
+        )
+        etag = 'W/"%s"' % hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return etag, timestamp
+    
+    def finish_conditional_response(self, response, etag, timestamp):
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            # Store-private data: clients may keep it but must revalidate
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+def request_origin(request) -> str:
+    return f"{request.scheme}://{request.get_host()}"
+
+
+class CatalogCacheMixin:
+    """
+    Cache list responses per store under the store's catalog version.
+    
+    Catalog writes bump the version (``core.cache.bump_catalog_version_on_commit``),
+    so stale entries are never read again and simply expire; nothing is purged.
+    Enabled by ``settings.CATALOG_CACHE``. Views can narrow what is cached
+    with ``is_catalog_cacheable()``. Responses carry ``X-Cache: HIT`` or ``MISS``.
+    Entries are kept per scheme and host, as pagination links are absolute.
+    """
+    
+    def is_catalog_cacheable(self) -> bool:
+        return True
+    
+    def list(self, request, *args, **kwargs):
+        cache = get_catalog_cache()
+        store = self.get_store()
+        if cache is None or store is None or not self.is_catalog_cacheable():
+            return super().list(request, *args, **kwargs)
+        
+        key = catalog_response_key(
+            store.id, get_catalog_version(cache, store.id), view_key(self), request_origin(request),
+            sorted(request.query_params.lists()),
+        )
+        data = cache.get(key)
+        record_catalog_lookup(cache, hit=data is not None)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, get_catalog_cache_timeout())
+        response['X-Cache'] = 'MISS'
+        return response
+    
+    async def alist(self, request, *args, **kwargs):
+        cache = get_catalog_cache()
+        store = self.get_store()
+        if cache is None or store is None or not self.is_catalog_cacheable():
+            return await super().alist(request, *args, **kwargs)
+        
+        key = catalog_response_key(
+            store.id, await aget_catalog_version(cache, store.id), view_key(self), request_origin(request),
+            sorted(request.query_params.lists()),
+        )
+        data = await cache.aget(key)
+        await arecord_catalog_lookup(cache, hit=data is not None)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        
+        response = await super().alist(request, *args, **kwargs)
+        if response.status_code == 200:
+            await cache.aset(key, response.data, get_catalog_cache_timeout())
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class ValuesListMixin:
+    """
+    Serve list GETs from ``values_list`` rows instead of model instances.
+    
+    The view's read serializer is compiled into a ``core.values.ValuesSerializer``,
+    which selects only the columns the serializer reads and renders the same
+    JSON without building models or walking fields per row. Views opt in with
+    ``use_values_list = True``; the serializer must only use fields the fast path
+    supports, which is checked when it is first compiled.
+    """
+    use_values_list = False
+    
+    def list(self, request, *args, **kwargs):
+        if not self.use_values_list:
+            return super().list(request, *args, **kwargs)
+        
+        values = values_serializer_for(self.get_serializer_class())
+        queryset = self.filter_queryset(self.get_queryset())
+        # Keyset cursors are encoded from the row, so its sort key must be selected
+        also = [field.lstrip('-') for field in getattr(self, 'keyset_ordering', ())]
+        rows = values.values(queryset, also=also)
+        page = self.paginate_queryset(rows)
+        with serializing():
+            data = values.serialize(page if page is not None else rows, queryset=queryset)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+    
+    async def alist(self, request, *args, **kwargs):
+        if not self.use_values_list:
+            return await super().alist(request, *args, **kwargs)
+        
+        values = values_serializer_for(self.get_serializer_class())
+        queryset = self.filter_queryset(self.get_queryset())
+        also = [field.lstrip('-') for field in getattr(self, 'keyset_ordering', ())]
+        rows = values.values(queryset, also=also)
+        page = await self.apaginate_queryset(rows)
+        if page is None:
+            rows = [row async for row in rows]
+        with serializing():
+            data = await values.aserialize(page if page is not None else rows, queryset=queryset)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
 class IsStoreMember(permissions.BasePermission):
     """
     Permission class to check if user is a member of the store.
@@ -66,7 +377,14 @@ class IsStoreMember(permissions.BasePermission):
         if not store:
             return False
         
-        return store.members.filter(user=request.user, is_active=True).exists()
+        return view.get_membership_role() is not None
+    
+    async def ahas_permission(self, request, view):
+        if not request.user.is_authenticated:
+            return False
+        if not await view.aget_store():
+            return False
+        return await view.aget_membership_role() is not None
 
 
 class IsStoreAdmin(permissions.BasePermission):
@@ -84,8 +402,11 @@ class IsStoreAdmin(permissions.BasePermission):
         if not store:
             return False
         
-        return store.members.filter(
-            user=request.user, 
-            is_active=True,
-            role__in=['owner', 'admin']
-        ).exists()
+        return view.get_membership_role() in ('owner', 'admin')
+    
+    async def ahas_permission(self, request, view):
+        if not request.user.is_authenticated:
+            return False
+        if not await view.aget_store():
+            return False
+        return await view.aget_membership_role() in ('owner', 'admin')
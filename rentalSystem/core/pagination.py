@@ -1,6 +1,196 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
 
 class DefaultPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = "page_size"
     max_page_size = 100
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` on the async ORM: the count and the page's rows are awaited."""
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator.count is a cached property; filling it keeps page() from counting synchronously
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [row async for row in self.page.object_list]
+        return list(self.page)
+
+
+def _cursor_value(value):
+    # Full precision: DjangoJSONEncoder truncates datetimes to milliseconds,
+    # which would skip rows created within the same millisecond
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def keyset_filter(ordering, values):
+    """Rows strictly after ``values`` in ``ordering``, as a Q object."""
+    condition = Q()
+    for position in reversed(range(len(ordering))):
+        name = ordering[position].lstrip('-')
+        lookup = 'lt' if ordering[position].startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[position]})
+        if position < len(ordering) - 1:
+            step |= Q(**{name: values[position]}) & condition
+        condition = step
+    # Redundant bound on the leading key so the database can seek the index
+    # instead of evaluating the OR over every row
+    name = ordering[0].lstrip('-')
+    lookup = 'lte' if ordering[0].startswith('-') else 'gte'
+    return Q(**{f'{name}__{lookup}': values[0]}) & condition
+
+
+def encode_cursor(ordering, row):
+    """Opaque cursor for ``row``, a model instance or a dict of the ordering fields."""
+    if isinstance(row, dict):
+        values = [row[field.lstrip('-')] for field in ordering]
+    else:
+        values = [getattr(row, field.lstrip('-')) for field in ordering]
+    payload = json.dumps([_cursor_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(ordering, model, cursor):
+    """Ordering values of an ``encode_cursor`` cursor; raises ValueError if it is invalid."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise ValueError(cursor)
+        return [
+            model._meta.get_field(field.lstrip('-')).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a compound, unique sort key such as ``(-start_date, -id)``.
+    
+    Each page is fetched with ``WHERE key < last_key ORDER BY key LIMIT n``, so
+    cost does not grow with depth. Cursors are opaque. The total count costs a
+    ``COUNT(*)`` and is only included when requested with ``?count=true``.
+    Views set ``keyset_ordering``; the last field must be unique (usually ``id``).
+    """
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    ordering = ('-id',)
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = queryset.count() if self._start(queryset, request, view) else None
+        return self._set_page(list(self._page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` on the async ORM."""
+        self.count = await queryset.acount() if self._start(queryset, request, view) else None
+        return self._set_page([row async for row in self._page_queryset(queryset, request)])
+
+    def _start(self, queryset, request, view) -> bool:
+        """Set up for a page of ``queryset``; True if the request asks for the total count."""
+        self.request = request
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.ordering))
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+
+    def _page_queryset(self, queryset, request):
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.get_keyset_filter(self.decode_cursor(cursor)))
+        return queryset[:self.page_size + 1]
+
+    def _set_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_keyset_filter(self, values):
+        """Rows strictly after ``values`` in ``self.ordering``, as a Q object."""
+        return keyset_filter(self.ordering, values)
+
+    def encode_cursor(self, row):
+        return encode_cursor(self.ordering, row)
+
+    def decode_cursor(self, cursor):
+        try:
+            return decode_cursor(self.ordering, self.model, cursor)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        fields = [('next', self.get_next_link())]
+        if self.count is not None:
+            fields.insert(0, ('count', self.count))
+        fields.append(('results', data))
+        return Response(OrderedDict(fields))
+
+
+class SelectablePagination(BasePagination):
+    """
+    Page-number pagination by default; keyset pagination when the request
+    passes ``?pagination=keyset`` or a ``cursor``, so existing clients keep working.
+    """
+    mode_query_param = "pagination"
+
+    def get_paginator(self, request):
+        mode = request.query_params.get(self.mode_query_param)
+        if mode == 'keyset' or KeysetPagination.cursor_query_param in request.query_params:
+            return KeysetPagination()
+        return DefaultPagination()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return self.paginator.paginate_queryset(queryset, request, view=view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return await self.paginator.apaginate_queryset(queryset, request, view=view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return DefaultPagination().get_paginated_response_schema(schema)
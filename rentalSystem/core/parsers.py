@@ -0,0 +1,30 @@
+"""
+JSON parser backed by orjson, when it is installed.
+
+``FastJSONParser`` parses UTF-8 bodies with orjson. Bodies orjson rejects
+(syntax errors, NaN, integers over 64 bits, other charsets) are re-parsed
+by DRF's ``JSONParser``, so what is accepted and the ``ParseError``
+messages are unchanged.
+"""
+import io
+
+from django.conf import settings
+from rest_framework import parsers
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(parsers.JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
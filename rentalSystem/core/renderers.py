@@ -0,0 +1,53 @@
+"""
+JSON renderer backed by orjson, when it is installed.
+
+``FastJSONRenderer`` is a drop-in for DRF's ``JSONRenderer``: same media
+type, same compact UTF-8 output, same ``\\u2028``/``\\u2029`` escaping,
+and types orjson does not know (Decimal, lazy strings, querysets, ...)
+go through DRF's own encoder, so existing payloads render the same bytes.
+Anything orjson refuses outright (non-string keys, integers over 64 bits,
+indented output for the browsable API) is handed to the stdlib renderer.
+Without orjson it is the stdlib renderer.
+
+Known difference: floats in exponent form (``1e+16`` vs ``1e16``) and
+NaN/Infinity, which orjson writes as ``null`` instead of failing.
+"""
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+from .timing import serializing
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Fallback for types orjson can't encode itself; Decimals stay floats, as with DRF
+_encode_default = encoders.JSONEncoder().default
+
+if orjson is not None:
+    OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with serializing():
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type, renderer_context):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_encode_default, option=OPTIONS)
+        except orjson.JSONEncodeError:
+            # The stdlib encoder either manages or raises the error callers expect
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,68 @@
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin for asserting an upper bound on the queries a block runs.
+    
+    Unlike ``assertNumQueries`` the budget is a ceiling, so unrelated query
+    savings do not break tests, while N+1 regressions still fail them.
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, budget: int, using: str = 'default'):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(
+                f"{i}. {query['sql']}" for i, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(f"{executed} queries executed, budget is {budget}\nCaptured queries were:\n{queries}")
+
+    def assertQueriesConstant(self, func, *, grow, using: str = 'default'):
+        """
+        Assert that ``func`` runs the same number of queries before and after ``grow``.
+        
+        Args:
+            func: Callable issuing the queries under test, e.g. an API request
+            grow: Callable adding more rows that ``func`` will read
+        """
+        with CaptureQueriesContext(connections[using]) as before:
+            func()
+        grow()
+        with CaptureQueriesContext(connections[using]) as after:
+            func()
+        self.assertEqual(
+            len(before.captured_queries), len(after.captured_queries),
+            "Query count grew with the number of rows (likely an N+1)"
+        )
+
+
+class QueryPlanMixin:
+    """
+    TestCase mixin for asserting that a queryset is served by an index.
+    
+    Reads SQLite's ``EXPLAIN QUERY PLAN``; on other backends the check is skipped.
+    """
+
+    def assertUsesIndex(self, queryset, index_name: str = None):
+        from django.db import connection
+
+        if connection.vendor != 'sqlite':
+            self.skipTest("Query plan assertions need SQLite")
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        plan = queryset.explain()
+        table = queryset.model._meta.db_table
+        steps = [line for line in plan.splitlines() if f' {table} ' in f'{line} ']
+        self.assertTrue(steps, f"{table} not found in plan:\n{plan}")
+        for step in steps:
+            self.assertIn('INDEX', step, f"Full scan of {table}:\n{plan}")
+        self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan, f"Sort not served by an index:\n{plan}")
+        if index_name:
+            self.assertIn(index_name, plan)
@@ -0,0 +1,217 @@
+"""
+Per-request timing: SQL query count, DB time, serialization time and view time.
+
+``RequestTimingMiddleware`` samples ``REQUEST_TIMING_SAMPLE_RATE`` of requests.
+For a sampled request it sends a ``Server-Timing`` header (unless
+``REQUEST_TIMING_HEADER`` is False) and logs one line to ``core.timing``,
+keyed by URL pattern and store, for requests of at least
+``REQUEST_TIMING_LOG_MIN_MS``::
+
+    request method=GET route=api/v1/stores/<int:store>/rentals/ store=3 status=200 queries=4 db_ms=1.9 ...
+
+The figures are also passed to log handlers as ``record.timing``, for JSON
+formatters.
+
+- ``db``: time inside ``cursor.execute`` for every query, on all connections
+- ``serialize``: rendering the response body, plus values fast path rows (DRF
+  serializer fields run inside the view and count as ``view``)
+- ``view``: the view and response rendering, less the DB and serialize time in it
+- ``total``: everything from this middleware down, including the other middleware
+
+Queries are counted by an execute wrapper installed once on every connection,
+which looks the request up in a context variable. Requests that are not
+sampled cost a random draw plus one context variable lookup per query. The
+context variable follows the request into ``sync_to_async`` threads, and the
+middleware runs natively in both WSGI and ASGI mode. Streaming
+bodies are produced after the response leaves the middleware and are not timed.
+"""
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    """Figures of one sampled request; times in seconds."""
+
+    __slots__ = ('queries', 'db', 'serialize', 'view', 'total', '_view_mark')
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.view = None
+        self.total = None
+        self._view_mark = None
+
+    def view_started(self):
+        self._view_mark = (time.perf_counter(), self.db, self.serialize)
+
+    def view_finished(self):
+        if self._view_mark is not None:
+            started, db, serialize = self._view_mark
+            self.view = (time.perf_counter() - started) - (self.db - db) - (self.serialize - serialize)
+
+    def as_dict(self) -> dict:
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db * 1000, 3),
+            'serialize_ms': round(self.serialize * 1000, 3),
+            'view_ms': round(self.view * 1000, 3) if self.view is not None else None,
+            'total_ms': round(self.total * 1000, 3) if self.total is not None else None,
+        }
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value."""
+        metrics = [
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serialize * 1000:.1f}',
+        ]
+        if self.view is not None:
+            metrics.append(f'view;dur={self.view * 1000:.1f}')
+        if self.total is not None:
+            metrics.append(f'total;dur={self.total * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+@contextmanager
+def serializing():
+    """Count the block, less its queries, as serialization time of the current request if it is sampled."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    started, db = time.perf_counter(), timing.db
+    try:
+        yield
+    finally:
+        timing.serialize += (time.perf_counter() - started) - (timing.db - db)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the current request's figures."""
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.db += time.perf_counter() - started
+        timing.queries += 1
+
+
+def install(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def _install_on_connect(sender, connection, **kwargs):
+    install(connection)
+
+
+def _view_started():
+    timing = _current.get()
+    if timing is not None:
+        timing.view_started()
+
+
+class RequestTimingMiddleware:
+    """Sample requests and report their timing; goes first in ``MIDDLEWARE`` so ``total`` covers the rest."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # A sync process_view would cost every ASGI request a thread hop
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timing = self.start()
+        if timing is None:
+            return self.get_response(request)
+
+        token = _current.set(timing)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            timing.view_finished()
+        finally:
+            timing.total = time.perf_counter() - started
+            _current.reset(token)
+        return self.report(request, response, timing)
+
+    async def __acall__(self, request):
+        timing = self.start()
+        if timing is None:
+            return await self.get_response(request)
+
+        token = _current.set(timing)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+            timing.view_finished()
+        finally:
+            timing.total = time.perf_counter() - started
+            _current.reset(token)
+        return self.report(request, response, timing)
+
+    def start(self):
+        """Figures for a sampled request, or None for one that is not sampled."""
+        rate = getattr(settings, 'REQUEST_TIMING_SAMPLE_RATE', 0)
+        if not rate or (rate < 1 and random.random() >= rate):
+            return None
+        # Connections opened before this module was loaded don't have the wrapper yet
+        for connection in connections.all(initialized_only=True):
+            install(connection)
+        return RequestTiming()
+
+    def report(self, request, response, timing):
+        if getattr(settings, 'REQUEST_TIMING_HEADER', True):
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = f'{existing}, {timing.server_timing()}' if existing else timing.server_timing()
+        if timing.total * 1000 >= getattr(settings, 'REQUEST_TIMING_LOG_MIN_MS', 0):
+            self.log(request, response, timing)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _view_started()
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        _view_started()
+
+    def log(self, request, response, timing):
+        match = request.resolver_match
+        route = match.route if match is not None else None
+        store = None
+        if match is not None:
+            store = match.kwargs.get('store', match.kwargs.get('store_id'))
+        figures = timing.as_dict()
+        logger.info(
+            "request method=%s route=%s store=%s status=%s queries=%d db_ms=%.1f serialize_ms=%.1f "
+            "view_ms=%s total_ms=%.1f",
+            request.method, route or '-', store if store is not None else '-', response.status_code,
+            figures['queries'], figures['db_ms'], figures['serialize_ms'],
+            f"{figures['view_ms']:.1f}" if figures['view_ms'] is not None else '-', figures['total_ms'],
+            extra={'timing': {
+                'method': request.method, 'route': route, 'store': store, 'status': response.status_code, **figures,
+            }},
+        )
@@ -0,0 +1,271 @@
+"""
+Read-only serialization from ``values_list`` rows.
+
+A ``ValuesSerializer`` is compiled once from a DRF serializer class: it
+works out which columns the serializer reads, fetches only those as
+tuples, and builds each output dict with precomputed tuple positions. No
+model instances are created and no per-field ``get_attribute`` runs, yet
+the output is the same dict, in the same key order and with the same
+values, as ``serializer_class(instances, many=True).data``; fields whose
+representation is not the raw column value (decimals, dates) still go
+through the field's own ``to_representation``.
+
+Supported fields: model fields, ``source='fk.attr'`` fields, primary-key
+related fields, nested serializers of a forward FK, and ``many=True``
+nested serializers of a reverse FK (one extra query per page). Anything
+else raises ImproperlyConfigured when compiled, so a serializer change
+can't silently diverge from the fast path.
+"""
+from functools import cache
+from operator import itemgetter
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import Prefetch
+from rest_framework import ISO_8601, serializers
+from rest_framework.fields import empty
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField, RelatedField
+from rest_framework.settings import api_settings
+
+# Fields whose representation of a non-null column value is the value itself
+PASSTHROUGH_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField,
+                      serializers.ReadOnlyField)
+
+# Fields that need more than the column value
+UNSUPPORTED_FIELDS = (serializers.SerializerMethodField, serializers.HiddenField, serializers.FileField,
+                      ManyRelatedField)
+
+
+@cache
+def values_serializer_for(serializer_class):
+    """The compiled ``ValuesSerializer`` of a serializer class, built on first use."""
+    return ValuesSerializer(serializer_class)
+
+
+class ValuesSerializer:
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.lookups = []
+        self._positions = {}
+        # (field name, child ValuesSerializer, FK name on the child, relation name)
+        self.many = []
+        self.pk_index = self._column(self.model._meta.pk.name)
+        self._make_build = self._compile(serializer_class(), self.model, prefix='')
+
+    def values(self, queryset, *, also=()):
+        """
+        ``queryset`` as named ``values_list`` rows of the columns this serializer reads.
+
+        Args:
+            also: Extra columns to select, e.g. the fields a keyset paginator encodes
+        """
+        extra = [lookup for lookup in dict.fromkeys(also) if lookup not in self._positions]
+        return queryset.prefetch_related(None).values_list(*self.lookups, *extra, named=True)
+
+    def serialize(self, rows, *, queryset=None):
+        """
+        Representations of ``rows`` from ``values()``.
+
+        Args:
+            queryset: The model queryset the rows came from; its ``Prefetch``
+                orderings order nested ``many=True`` lists as the serializer would see them
+        """
+        rows = list(rows)
+        build = self._make_build()
+        data = [build(row) for row in rows]
+        pks = [row[self.pk_index] for row in rows]
+        for many in self.many:
+            child_rows = list(self._children(many, pks, queryset)) if pks else []
+            self._attach(data, pks, many[0], child_rows, many[1].serialize(child_rows))
+        return data
+
+    async def aserialize(self, rows, *, queryset=None):
+        """``serialize`` with the rows of nested ``many=True`` lists fetched on the async ORM."""
+        rows = list(rows)
+        build = self._make_build()
+        data = [build(row) for row in rows]
+        pks = [row[self.pk_index] for row in rows]
+        for many in self.many:
+            child_rows = [row async for row in self._children(many, pks, queryset)] if pks else []
+            self._attach(data, pks, many[0], child_rows, await many[1].aserialize(child_rows))
+        return data
+
+    def _children(self, many, pks, queryset):
+        """Rows of a nested ``many=True`` list for the parents ``pks``, each ending with its parent's pk."""
+        _, child, fk, relation = many
+        ordering = _prefetch_ordering(queryset, relation) or child.model._meta.ordering or ('pk',)
+        return (
+            child.model._default_manager.filter(**{f'{fk}__in': pks})
+            .order_by(*ordering)
+            .values_list(*child.lookups, fk)
+        )
+
+    @staticmethod
+    def _attach(data, pks, name, child_rows, child_records):
+        groups = {pk: [] for pk in pks}
+        for child_row, record in zip(child_rows, child_records):
+            groups[child_row[-1]].append(record)
+        for record, pk in zip(data, pks):
+            record[name] = groups[pk]
+
+    def _column(self, lookup):
+        if lookup not in self._positions:
+            self._positions[lookup] = len(self.lookups)
+            self.lookups.append(lookup)
+        return self._positions[lookup]
+
+    def _compile(self, serializer, model, *, prefix):
+        names = []
+        positions = []
+        converted = []
+        nested = []
+        # Fields whose source passes through nullable relations, with those relations' columns
+        guarded = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                if prefix:
+                    raise self._unsupported(name, "many=True serializers are only supported at the top level")
+                relation = self._reverse_relation(model, name, field.source)
+                self.many.append((name, values_serializer_for(type(field.child)), relation.field.name, field.source))
+                position = self.pk_index
+                hops = ()
+            elif isinstance(field, serializers.BaseSerializer):
+                lookup, target, hops = self._lookup(model, name, field.source)
+                if not target.many_to_one and not target.one_to_one:
+                    raise self._unsupported(name, "nested serializers must follow a forward relation")
+                position = self._column(prefix + lookup)
+                nested.append((name, self._compile(field, target.related_model, prefix=f'{prefix}{lookup}__')))
+            elif isinstance(field, (RelatedField,) + UNSUPPORTED_FIELDS) and not (
+                isinstance(field, PrimaryKeyRelatedField) and field.pk_field is None
+            ):
+                raise self._unsupported(name, f"{type(field).__name__} needs model instances")
+            else:
+                lookup, target, hops = self._lookup(model, name, field.source)
+                position = self._column(prefix + lookup)
+                if isinstance(field, serializers.DateTimeField):
+                    converted.append((name, _datetime_representation(field)))
+                elif not isinstance(field, PASSTHROUGH_FIELDS + (PrimaryKeyRelatedField,)):
+                    converted.append((name, lambda field=field: field.to_representation))
+            if hops:
+                guarded.append((name, [self._column(prefix + hop) for hop in hops], field))
+            names.append(name)
+            positions.append(position)
+
+        if len(positions) == 1:
+            index = positions[0]
+            getter = lambda row: (row[index],)  # noqa: E731
+        else:
+            getter = itemgetter(*positions)
+
+        def make_build():
+            conversions = [(name, make_converter()) for name, make_converter in converted]
+            nested_builds = [(name, make_nested()) for name, make_nested in nested]
+
+            def build(row):
+                record = dict(zip(names, getter(row)))
+                for name, to_representation in conversions:
+                    value = record[name]
+                    if value is not None:
+                        record[name] = to_representation(value)
+                for name, build_nested in nested_builds:
+                    if record[name] is not None:
+                        record[name] = build_nested(row)
+                for name, hops, field in guarded:
+                    if any(row[hop] is None for hop in hops):
+                        _missing_source(record, name, field)
+                return record
+
+            return build
+
+        # Converters are bound per call, so per-request state such as the active timezone is read once
+        return make_build
+
+    def _lookup(self, model, name, source):
+        """
+        The ORM lookup of a dotted ``source``, the model field it ends on, and
+        the lookups of the nullable relations it passes through.
+        """
+        if source == '*':
+            raise self._unsupported(name, "source='*' needs model instances")
+        parts = source.split('.')
+        hops = []
+        for depth, part in enumerate(parts):
+            try:
+                target = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                raise self._unsupported(name, f"{model.__name__}.{part} is not a model field")
+            last = depth == len(parts) - 1
+            if target.is_relation:
+                # Reverse and many-to-many hops would multiply rows
+                if not (target.many_to_one or target.one_to_one) or not target.concrete:
+                    raise self._unsupported(name, f"{model.__name__}.{part} is not a forward relation")
+                if not last:
+                    if target.null:
+                        hops.append('__'.join(parts[:depth + 1]))
+                    model = target.related_model
+            elif not last:
+                raise self._unsupported(name, f"{model.__name__}.{part} is not a relation")
+        return '__'.join(parts), target, hops
+
+    def _reverse_relation(self, model, name, source):
+        try:
+            relation = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            raise self._unsupported(name, f"{model.__name__}.{source} is not a relation")
+        if not relation.one_to_many:
+            raise self._unsupported(name, "many=True serializers must follow a reverse foreign key")
+        return relation
+
+    def _unsupported(self, name, reason):
+        return ImproperlyConfigured(f"{self.serializer_class.__name__}.{name} has no values fast path: {reason}")
+
+
+def _missing_source(record, name, field):
+    """Mirror ``Field.get_attribute`` when a relation on the source path is None."""
+    if field.default is not empty:
+        record[name] = field.get_default()
+    elif field.allow_null:
+        record[name] = None
+    elif not field.required:
+        # DRF skips the field, dropping the key from the output
+        del record[name]
+    else:
+        raise AttributeError(f"{name}: a relation on its source {field.source!r} is None")
+
+
+def _datetime_representation(field):
+    """
+    ``field.to_representation`` with the output timezone resolved once per
+    call instead of once per value; ISO output of aware values is inlined.
+    """
+    def make_converter():
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        if output_format is None or output_format.lower() != ISO_8601:
+            return field.to_representation
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if field_timezone is None:
+            return field.to_representation
+
+        def to_representation(value):
+            if isinstance(value, str) or value.utcoffset() is None:
+                return field.to_representation(value)
+            try:
+                value = value.astimezone(field_timezone).isoformat()
+            except OverflowError:
+                return field.to_representation(value)
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+
+        return to_representation
+
+    return make_converter
+
+
+def _prefetch_ordering(queryset, relation):
+    for lookup in getattr(queryset, '_prefetch_related_lookups', ()):
+        if isinstance(lookup, Prefetch) and lookup.prefetch_to == relation and lookup.queryset is not None:
+            return lookup.queryset.query.order_by
+    return None
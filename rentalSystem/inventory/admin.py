@@ -1,17 +1,17 @@
 from django.contrib import admin
-from .models import Category, Item, ItemImage, InventoryTransaction
+from .models import Category, Item, ItemImage, InventoryTransaction, LowStockAlert, LowStockEvent, StockCheckpoint
 
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'store')
+    list_display = ('id', 'name', 'store', 'reorder_point')
     search_fields = ('name', 'store__name')
     list_filter = ('store',)
 
 
 @admin.register(Item)
 class ItemAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'sku', 'store', 'category', 'quantity', 'price', 'status')
+    list_display = ('id', 'name', 'sku', 'store', 'category', 'quantity', 'low_stock_threshold', 'price', 'status')
     search_fields = ('name', 'sku', 'store__name')
     list_filter = ('store', 'category', 'is_rentable', 'is_sellable', 'status')
     prepopulated_fields = {'sku': ('name',)}
@@ -29,3 +29,26 @@ class InventoryTransactionAdmin(admin.ModelAdmin):
     search_fields = ('item__name', 'item__sku', 'reason')
     list_filter = ('reason', 'created_at')
     readonly_fields = ('created_at',)
+
+
+@admin.register(StockCheckpoint)
+class StockCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('id', 'item', 'quantity', 'as_of', 'last_transaction')
+    search_fields = ('item__name', 'item__sku')
+    readonly_fields = ('created_at',)
+
+
+@admin.register(LowStockAlert)
+class LowStockAlertAdmin(admin.ModelAdmin):
+    list_display = ('id', 'item', 'store', 'raised_at')
+    search_fields = ('item__name', 'item__sku')
+    list_filter = ('store',)
+    readonly_fields = ('raised_at',)
+
+
+@admin.register(LowStockEvent)
+class LowStockEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'item', 'store', 'kind', 'quantity', 'threshold', 'created_at')
+    search_fields = ('item__name', 'item__sku')
+    list_filter = ('store', 'kind')
+    readonly_fields = ('created_at',)
@@ -0,0 +1,290 @@
+"""
+Bulk item import from CSV or NDJSON.
+
+Rows are read lazily and processed in batches, so memory stays bounded by
+the batch size whatever the file size. Each batch costs a fixed number of
+queries: one category lookup (plus one insert for new names), one lookup
+of existing SKUs, a bulk insert of new items, one prepared UPDATE run for
+existing ones and a bulk insert of their ledger entries.
+
+Rows are keyed by ``(store, sku)``. New SKUs are created with a
+``REASON_INITIAL`` transaction for their quantity; existing SKUs are
+updated, and a quantity change is recorded as a ``REASON_ADJUSTMENT`` so
+the ledger keeps adding up to ``Item.quantity``.
+"""
+import codecs
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from core.cache import bump_catalog_version_on_commit
+from reports.services import ReportsService
+
+from . import low_stock, search
+from .models import Category, InventoryTransaction, Item
+
+FORMAT_CSV = 'csv'
+FORMAT_NDJSON = 'ndjson'
+FORMATS = (FORMAT_CSV, FORMAT_NDJSON)
+
+# Columns copied onto Item; ``category`` is resolved by name separately
+FIELDS = ('name', 'sku', 'description', 'is_rentable', 'is_sellable', 'price', 'rental_rate', 'quantity', 'status',
+          'reorder_point')
+REQUIRED = ('name', 'sku', 'price')
+
+MAX_REPORTED_ERRORS = 1000
+
+_TRUE = {'1', 'true', 'yes', 'y', 't'}
+_FALSE = {'0', 'false', 'no', 'n', 'f'}
+
+
+def detect_format(filename: str = '', content_type: str = ''):
+    """Guess the format from a file name or content type; None if unknown."""
+    filename = (filename or '').lower()
+    content_type = (content_type or '').lower()
+    if filename.endswith('.csv') or 'csv' in content_type:
+        return FORMAT_CSV
+    if filename.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return FORMAT_NDJSON
+    return None
+
+
+def read_rows(stream, fmt: str):
+    """
+    Yield (row_number, dict) pairs from a binary or text stream.
+
+    Row numbers are 1-based data rows; the CSV header is not counted.
+    A line that is not a JSON object yields a string error instead of a dict.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format: {fmt}")
+    if isinstance(stream.read(0), bytes):
+        stream = codecs.getreader('utf-8-sig')(stream)
+
+    if fmt == FORMAT_CSV:
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            yield number, row
+        return
+
+    number = 0
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, f"Invalid JSON: {e}"
+            continue
+        yield number, row if isinstance(row, dict) else "Each line must be a JSON object"
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, row_number, messages):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': messages})
+
+    def as_dict(self) -> dict:
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+
+class ItemImporter:
+    def __init__(self, *, store, actor=None, batch_size: int = 1000, update_existing: bool = True):
+        """
+        Args:
+            store: Store the items belong to
+            actor: User recorded on ledger entries (optional)
+            batch_size: Rows per batch and per transaction
+            update_existing: Update items whose SKU already exists instead of reporting an error
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        self.store = store
+        self.actor = actor
+        self.batch_size = batch_size
+        self.update_existing = update_existing
+        self.report = ImportReport()
+        self._categories = {}
+        self._seen_skus = set()
+
+    def run(self, rows) -> ImportReport:
+        """Import ``read_rows`` output; returns the report."""
+        batch = []
+        for number, row in rows:
+            cleaned = self.clean_row(number, row)
+            if cleaned is None:
+                continue
+            batch.append(cleaned)
+            if len(batch) >= self.batch_size:
+                self._write_batch(batch)
+                batch = []
+        if batch:
+            self._write_batch(batch)
+        # Once for the whole file rather than after every batch
+        ReportsService.refresh_on_commit()
+        bump_catalog_version_on_commit([self.store.id])
+        return self.report
+
+    def clean_row(self, number, row):
+        """Validate one row; returns (number, fields, category_name) or None after reporting errors."""
+        if isinstance(row, str):
+            self.report.add_error(number, {'row': [row]})
+            return None
+
+        errors = {}
+        fields = {}
+        for name in FIELDS:
+            value = row.get(name)
+            if isinstance(value, str):
+                value = value.strip()
+            if value in (None, ''):
+                if name in REQUIRED:
+                    errors[name] = ["This field is required."]
+                continue
+            model_field = Item._meta.get_field(name)
+            try:
+                if name in ('is_rentable', 'is_sellable'):
+                    value = _parse_bool(value)
+                fields[name] = model_field.clean(value, None)
+            except ValidationError as e:
+                errors[name] = e.messages
+        if 'quantity' in fields and fields['quantity'] < 0:
+            errors['quantity'] = ["Quantity cannot be negative."]
+
+        sku = fields.get('sku')
+        if sku is not None:
+            if sku in self._seen_skus:
+                errors['sku'] = [f"Duplicate SKU {sku} in file."]
+            else:
+                self._seen_skus.add(sku)
+
+        if errors:
+            self.report.add_error(number, errors)
+            return None
+        category_name = row.get('category')
+        category_name = str(category_name).strip() if category_name not in (None, '') else ''
+        return number, fields, category_name
+
+    @transaction.atomic
+    def _write_batch(self, batch):
+        categories = self._resolve_categories({name for _, _, name in batch if name})
+        existing = {
+            item.sku: item
+            for item in Item.objects.select_for_update().select_related('category').filter(
+                store=self.store, sku__in=[fields['sku'] for _, fields, _ in batch]
+            )
+        }
+
+        new_items = []
+        changed = []
+        renamed = []
+        adjustments = []
+        now = timezone.now()
+        for number, fields, category_name in batch:
+            category = categories.get(category_name) if category_name else None
+            item = existing.get(fields['sku'])
+            if item is None:
+                new_items.append(Item(store=self.store, category=category, **fields))
+                continue
+            if not self.update_existing:
+                self.report.add_error(number, {'sku': [f"SKU {fields['sku']} already exists."]})
+                continue
+            old_quantity = item.quantity
+            if item.name != fields['name']:
+                renamed.append(item.id)
+            for name, value in fields.items():
+                setattr(item, name, value)
+            if category_name:
+                item.category = category
+            item.updated_at = now
+            if item.quantity != old_quantity:
+                adjustments.append(InventoryTransaction(
+                    item=item,
+                    delta=item.quantity - old_quantity,
+                    reason=InventoryTransaction.REASON_ADJUSTMENT,
+                    actor=self.actor,
+                ))
+            changed.append(item)
+
+        Item.objects.bulk_create(new_items)
+        _update_items(changed, list(FIELDS) + ['category', 'updated_at'])
+        InventoryTransaction.objects.bulk_create(adjustments + [
+            InventoryTransaction(
+                item=item,
+                delta=item.quantity,
+                reason=InventoryTransaction.REASON_INITIAL,
+                actor=self.actor,
+            )
+            for item in new_items
+            if item.quantity > 0
+        ])
+        search.index_items(new_items + changed)
+        if renamed:
+            from rentals.services import RentalService
+            RentalService.touch_rentals_of_items(item_ids=renamed)
+        low_stock.reconcile(Item.objects.filter(store=self.store, sku__in=[fields['sku'] for _, fields, _ in batch]))
+
+        self.report.created += len(new_items)
+        self.report.updated += len(changed)
+
+    def _resolve_categories(self, names):
+        """Map category names to Category rows, creating missing ones; cached across batches."""
+        missing = names - self._categories.keys()
+        if missing:
+            found = {c.name: c for c in Category.objects.filter(store=self.store, name__in=missing)}
+            to_create = [Category(store=self.store, name=name) for name in missing - found.keys()]
+            if to_create:
+                Category.objects.bulk_create(to_create)
+                search.index_categories(to_create)
+                found.update((c.name, c) for c in to_create)
+            self._categories.update(found)
+        return self._categories
+
+
+def _update_items(items, field_names, using: str = 'default'):
+    """
+    Write ``field_names`` of ``items`` with one prepared UPDATE run per row.
+
+    ``bulk_update`` builds a CASE WHEN per field over the whole batch, and
+    compiling that expression costs more than the writes themselves.
+    """
+    if not items:
+        return
+    connection = connections[using]
+    fields = [Item._meta.get_field(name) for name in field_names]
+    assignments = ', '.join(f'{connection.ops.quote_name(field.column)} = %s' for field in fields)
+    sql = f'UPDATE {connection.ops.quote_name(Item._meta.db_table)} SET {assignments} WHERE id = %s'
+    params = [
+        [field.get_db_prep_save(getattr(item, field.attname), connection) for field in fields] + [item.pk]
+        for item in items
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValidationError("Must be true or false.")
+
@@ -0,0 +1,140 @@
+"""
+Maintained low-stock alerts.
+
+An item's reorder point is its own ``reorder_point``, else its category's,
+else the store default ``Store.settings['low_stock_threshold']`` (5 if unset).
+The resolved value is kept on ``Item.low_stock_threshold``, so stock changes
+can tell whether an item crossed its threshold from the locked row alone,
+with no extra reads.
+
+``LowStockAlert`` holds one row per active item below its threshold, and
+``LowStockEvent`` logs every raise and clear. Both are written only when an
+item crosses its threshold, so polling the alerts costs O(alerts + changes),
+not O(catalog).
+"""
+from django.utils import timezone
+
+from .models import Item, LowStockAlert, LowStockEvent
+
+SETTINGS_KEY = 'low_stock_threshold'
+DEFAULT_THRESHOLD = 5
+
+
+def store_default(settings) -> int:
+    """The store-wide reorder point from ``Store.settings``."""
+    try:
+        return int((settings or {}).get(SETTINGS_KEY, DEFAULT_THRESHOLD))
+    except (TypeError, ValueError):
+        return DEFAULT_THRESHOLD
+
+
+def resolve(*, item_point, category_point, default) -> int:
+    if item_point is not None:
+        return item_point
+    if category_point is not None:
+        return category_point
+    return default
+
+
+def is_low(*, quantity, threshold, status) -> bool:
+    return status == 'active' and quantity < threshold
+
+
+def record_crossings(changes):
+    """
+    Raise or clear alerts for items whose stock moved across their threshold.
+
+    Args:
+        changes: Iterable of (item, old_quantity) with ``item.quantity`` already updated;
+            old_quantity is None for a new item
+
+    Costs no queries unless an item crossed.
+    """
+    raised = []
+    cleared = []
+    for item, old_quantity in changes:
+        was = old_quantity is not None and is_low(
+            quantity=old_quantity, threshold=item.low_stock_threshold, status=item.status,
+        )
+        now = is_low(quantity=item.quantity, threshold=item.low_stock_threshold, status=item.status)
+        if now and not was:
+            raised.append(item)
+        elif was and not now:
+            cleared.append(item)
+    _write(raised=raised, cleared=cleared)
+
+
+def reconcile(items):
+    """
+    Re-resolve thresholds and alerts of ``items`` (an Item queryset) from scratch.
+
+    Used when reorder points, categories, statuses or store defaults change,
+    and after writes that bypass ``record_crossings``. Costs a fixed number of
+    queries plus one UPDATE per distinct changed threshold.
+    """
+    from stores.models import Store
+
+    rows = list(items.values_list(
+        'id', 'store_id', 'quantity', 'status', 'reorder_point', 'category__reorder_point', 'low_stock_threshold',
+    ))
+    if not rows:
+        return
+    defaults = {
+        store_id: store_default(settings)
+        for store_id, settings in Store.objects.filter(id__in={row[1] for row in rows}).values_list('id', 'settings')
+    }
+
+    retarget = {}
+    resolved = []
+    for item_id, store_id, quantity, status, item_point, category_point, current in rows:
+        threshold = resolve(
+            item_point=item_point, category_point=category_point, default=defaults.get(store_id, DEFAULT_THRESHOLD),
+        )
+        if threshold != current:
+            retarget.setdefault(threshold, []).append(item_id)
+        item = Item(id=item_id, store_id=store_id, quantity=quantity, status=status, low_stock_threshold=threshold)
+        resolved.append((item, is_low(quantity=quantity, threshold=threshold, status=status)))
+    for threshold, ids in retarget.items():
+        Item.objects.filter(id__in=ids).update(low_stock_threshold=threshold, updated_at=timezone.now())
+
+    alerted = set(
+        LowStockAlert.objects.filter(item_id__in=[item.id for item, _ in resolved]).values_list('item_id', flat=True)
+    )
+    _write(
+        raised=[item for item, low in resolved if low and item.id not in alerted],
+        cleared=[item for item, low in resolved if not low and item.id in alerted],
+    )
+
+
+def reconcile_store_default(store_id):
+    """Reconcile the store's items that inherit the store default, where it no longer matches."""
+    from stores.models import Store
+
+    settings = Store.objects.filter(id=store_id).values_list('settings', flat=True).first()
+    if settings is None:
+        return
+    stale = Item.objects.filter(
+        store_id=store_id, reorder_point__isnull=True, category__reorder_point__isnull=True,
+    ).exclude(low_stock_threshold=store_default(settings))
+    reconcile(stale)
+
+
+def _write(*, raised, cleared):
+    # Alerts belong to a store; legacy items without one are not tracked
+    raised = [item for item in raised if item.store_id is not None]
+    cleared = [item for item in cleared if item.store_id is not None]
+    if cleared:
+        LowStockAlert.objects.filter(item_id__in=[item.id for item in cleared]).delete()
+    if raised:
+        LowStockAlert.objects.bulk_create(
+            [LowStockAlert(store_id=item.store_id, item_id=item.id) for item in raised],
+            ignore_conflicts=True,
+        )
+    events = [
+        LowStockEvent(store_id=item.store_id, item_id=item.id, kind=kind, quantity=item.quantity,
+                      threshold=item.low_stock_threshold)
+        for kind, batch in ((LowStockEvent.KIND_RAISED, raised), (LowStockEvent.KIND_CLEARED, cleared))
+        for item in batch
+    ]
+    if events:
+        LowStockEvent.objects.bulk_create(events)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.cache import catalog_cache_stats, get_catalog_cache, reset_catalog_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show hit and miss counts of the catalog response cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Zero the counters after printing them")
+
+    def handle(self, *args, **options):
+        if get_catalog_cache() is None:
+            self.stdout.write("Catalog cache is disabled (settings.CATALOG_CACHE)")
+            return
+        stats = catalog_cache_stats()
+        lookups = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / lookups if lookups else 0
+        self.stdout.write(f"hits={stats['hits']} misses={stats['misses']} hit_ratio={ratio:.2%}")
+        if options['reset']:
+            reset_catalog_cache_stats()
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.models import Item
+from inventory.services import InventoryService
+from stores.models import Store
+
+
+class Command(BaseCommand):
+    help = "Write stock checkpoints for ledger entries recorded since the last run."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', type=int, help="Only checkpoint this store's items")
+        parser.add_argument('--every', type=int, default=1000, help="Ledger entries between checkpoints")
+
+    def handle(self, *args, **options):
+        items = Item.objects.all()
+        if options['store']:
+            store = Store.objects.filter(id=options['store']).first()
+            if store is None:
+                raise CommandError(f"Store {options['store']} not found")
+            items = items.filter(store=store)
+
+        try:
+            written = InventoryService.write_checkpoints(items=items, every=options['every'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} checkpoints"))
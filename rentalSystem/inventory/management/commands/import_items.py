@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import importer
+from inventory.services import InventoryService
+from stores.models import Store
+
+
+class Command(BaseCommand):
+    help = "Import items into a store from a CSV or NDJSON file, creating or updating by SKU."
+
+    def add_arguments(self, parser):
+        parser.add_argument('store', type=int)
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=importer.FORMATS, help="Defaults to the file extension")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--no-update', action='store_true', help="Report existing SKUs as errors")
+
+    def handle(self, *args, **options):
+        store = Store.objects.filter(id=options['store']).first()
+        if store is None:
+            raise CommandError(f"Store {options['store']} not found")
+        fmt = options['format'] or importer.detect_format(options['path'])
+        if fmt is None:
+            raise CommandError("Cannot tell the file format from its name; pass --format")
+
+        try:
+            with open(options['path'], 'rb') as stream:
+                report = InventoryService.import_items(
+                    store=store,
+                    stream=stream,
+                    fmt=fmt,
+                    batch_size=options['batch_size'],
+                    update_existing=not options['no_update'],
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in report.errors:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        if report.error_count > len(report.errors):
+            self.stderr.write(f"... {report.error_count - len(report.errors)} more errors")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report.created}, updated {report.updated}, {report.error_count} rows rejected"
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import search
+from stores.models import Store
+
+
+class Command(BaseCommand):
+    help = "Rebuild the item and category full-text search index."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', type=int, help="Only rebuild this store's rows")
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError("Full-text search is not available on this database (SQLite with FTS5 required).")
+
+        store = None
+        if options['store']:
+            store = Store.objects.filter(id=options['store']).first()
+            if store is None:
+                raise CommandError(f"Store {options['store']} not found")
+
+        items, categories = search.rebuild(store=store, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {items} items and {categories} categories"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.models import Item
+from inventory.services import InventoryService
+from stores.models import Store
+
+
+class Command(BaseCommand):
+    help = "Recompute low-stock thresholds and alerts from item quantities and reorder points."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', type=int, help="Only reconcile this store's items")
+
+    def handle(self, *args, **options):
+        items = Item.objects.all()
+        if options['store']:
+            store = Store.objects.filter(id=options['store']).first()
+            if store is None:
+                raise CommandError(f"Store {options['store']} not found")
+            items = items.filter(store=store)
+
+        InventoryService.reconcile_low_stock(items=items)
+        self.stdout.write(self.style.SUCCESS("Low-stock alerts reconciled"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.selectors import verify_stock_checkpoints
+from stores.models import Store
+
+
+class Command(BaseCommand):
+    help = "Check stock checkpoints and item quantities against the raw inventory ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', type=int, help="Only verify this store's items")
+
+    def handle(self, *args, **options):
+        store = None
+        if options['store']:
+            store = Store.objects.filter(id=options['store']).first()
+            if store is None:
+                raise CommandError(f"Store {options['store']} not found")
+
+        problems = 0
+        for item_id, problem in verify_stock_checkpoints(store=store):
+            self.stderr.write(f"Item {item_id}: {problem}")
+            problems += 1
+        if problems:
+            raise CommandError(f"{problems} ledger mismatches found")
+        self.stdout.write(self.style.SUCCESS("Checkpoints and stock match the ledger"))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_rename_is_active_item_is_rentable_item_is_sellable_and_more'),
+        ('stores', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventorytransaction',
+            index=models.Index(fields=['item', 'created_at', 'id'], name='invtx_item_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['store', 'created_at', 'id'], name='item_store_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['store', 'quantity'], name='item_active_quantity_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+from inventory import search
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if not search.supports_fts(connection):
+        return
+    search.create_tables(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {search.ITEM_TABLE}(rowid, store_id, name, sku, description, category) "
+            "SELECT i.id, i.store_id, i.name, i.sku, i.description, COALESCE(c.name, '') "
+            "FROM inventory_item i LEFT JOIN inventory_category c ON c.id = i.category_id"
+        )
+        cursor.execute(
+            f"INSERT INTO {search.CATEGORY_TABLE}(rowid, store_id, name) "
+            "SELECT id, store_id, name FROM inventory_category"
+        )
+    search.reset_availability()
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {search.ITEM_TABLE}")
+        cursor.execute(f"DROP TABLE IF EXISTS {search.CATEGORY_TABLE}")
+    search.reset_availability()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_store_scoped_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_item_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateTimeField(help_text='created_at of last_transaction')),
+                ('quantity', models.IntegerField(help_text='Sum of all deltas up to and including last_transaction')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='inventory.item')),
+                ('last_transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.inventorytransaction')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item', 'as_of', 'last_transaction'], name='checkpoint_item_asof_idx')],
+            },
+        ),
+    ]
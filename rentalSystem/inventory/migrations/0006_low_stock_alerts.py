@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_low_stock(apps, schema_editor):
+    """Existing items have no reorder points yet, so they take their store's default."""
+    from inventory.low_stock import store_default
+
+    Store = apps.get_model('stores', 'Store')
+    Item = apps.get_model('inventory', 'Item')
+    LowStockAlert = apps.get_model('inventory', 'LowStockAlert')
+    for store_id, settings in Store.objects.values_list('id', 'settings'):
+        threshold = store_default(settings)
+        items = Item.objects.filter(store_id=store_id)
+        items.update(low_stock_threshold=threshold)
+        LowStockAlert.objects.bulk_create(
+            [
+                LowStockAlert(store_id=store_id, item_id=item_id)
+                for item_id in items.filter(status='active', quantity__lt=threshold).values_list('id', flat=True)
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_stock_checkpoints'),
+        ('stores', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='reorder_point',
+            field=models.IntegerField(blank=True, help_text='Low-stock threshold for items without their own; blank uses the store default', null=True),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='low_stock_threshold',
+            field=models.IntegerField(default=5, editable=False, help_text='Effective reorder point, maintained by inventory.low_stock'),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='reorder_point',
+            field=models.IntegerField(blank=True, help_text='Alert when quantity drops below this; blank uses the category or store default', null=True),
+        ),
+        migrations.CreateModel(
+            name='LowStockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('raised_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alert', to='inventory.item')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to='stores.store')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['store', 'raised_at', 'id'], name='lowstock_store_raised_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LowStockEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('raised', 'Raised'), ('cleared', 'Cleared')], max_length=16)),
+                ('quantity', models.IntegerField()),
+                ('threshold', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_events', to='inventory.item')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_events', to='stores.store')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['store', 'id'], name='lowstock_event_store_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_low_stock, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_low_stock_alerts'),
+        ('stores', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['store', 'updated_at'], name='item_store_updated_idx'),
+        ),
+    ]
@@ -4,6 +4,9 @@ from django.db import models
 class Category(models.Model):
     store = models.ForeignKey('stores.Store', on_delete=models.CASCADE, related_name='categories', null=True, blank=True)
     name = models.CharField(max_length=120)
+    reorder_point = models.IntegerField(
+        null=True, blank=True, help_text="Low-stock threshold for items without their own; blank uses the store default"
+    )
 
     class Meta:
         unique_together = [('store', 'name')]
@@ -25,11 +28,26 @@ class Item(models.Model):
     rental_rate = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     quantity = models.IntegerField(default=0)
     status = models.CharField(max_length=16, default='active')
+    reorder_point = models.IntegerField(
+        null=True, blank=True, help_text="Alert when quantity drops below this; blank uses the category or store default"
+    )
+    low_stock_threshold = models.IntegerField(
+        default=5, editable=False, help_text="Effective reorder point, maintained by inventory.low_stock"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = [('store', 'sku')]
+        indexes = [
+            models.Index(fields=['store', 'created_at', 'id'], name='item_store_created_idx'),
+            models.Index(fields=['store', 'updated_at'], name='item_store_updated_idx'),
+            models.Index(
+                fields=['store', 'quantity'],
+                name='item_active_quantity_idx',
+                condition=models.Q(status='active'),
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.name} ({self.sku})"
@@ -65,5 +83,73 @@ class InventoryTransaction(models.Model):
     actor = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['item', 'created_at', 'id'], name='invtx_item_created_idx'),
+        ]
+
     def __str__(self) -> str:
         return f"{self.item.name}: {self.delta} ({self.reason})"
+
+
+class StockCheckpoint(models.Model):
+    """
+    Snapshot of an item's stock after a given ledger entry.
+    
+    Stock at any moment is the latest checkpoint at or before it plus the
+    ledger entries between the two, instead of a sum over the whole ledger.
+    """
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='checkpoints')
+    last_transaction = models.ForeignKey(InventoryTransaction, on_delete=models.CASCADE, related_name='+')
+    as_of = models.DateTimeField(help_text='created_at of last_transaction')
+    quantity = models.IntegerField(help_text='Sum of all deltas up to and including last_transaction')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['item', 'as_of', 'last_transaction'], name='checkpoint_item_asof_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.item.name}: {self.quantity} @ {self.as_of}"
+
+
+class LowStockAlert(models.Model):
+    """An active item whose quantity is below its ``low_stock_threshold``; one row per item."""
+    store = models.ForeignKey('stores.Store', on_delete=models.CASCADE, related_name='low_stock_alerts')
+    item = models.OneToOneField(Item, on_delete=models.CASCADE, related_name='low_stock_alert')
+    raised_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['store', 'raised_at', 'id'], name='lowstock_store_raised_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Low stock: {self.item.name}"
+
+
+class LowStockEvent(models.Model):
+    """Append-only log of alerts raised and cleared; its id is the polling cursor."""
+    KIND_RAISED = 'raised'
+    KIND_CLEARED = 'cleared'
+
+    KIND_CHOICES = [
+        (KIND_RAISED, 'Raised'),
+        (KIND_CLEARED, 'Cleared'),
+    ]
+
+    store = models.ForeignKey('stores.Store', on_delete=models.CASCADE, related_name='low_stock_events')
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='low_stock_events')
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    quantity = models.IntegerField()
+    threshold = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['store', 'id'], name='lowstock_event_store_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.item.name} {self.kind} at {self.quantity}"
@@ -0,0 +1,226 @@
+"""
+Full-text search over items and categories.
+
+On SQLite with FTS5 the index lives in two virtual tables keyed by rowid =
+item/category id. Item rows hold name, SKU, description and category name;
+category rows hold the category name. Queries are tokenised and every
+token is prefix-matched, so "ten sk" finds "Tent" with SKU "SKU-001".
+Results are ranked by bm25.
+
+On other backends, or if FTS5 is missing, ``is_available()`` is False and
+callers fall back to ``icontains`` filters.
+"""
+import re
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+
+ITEM_TABLE = 'inventory_item_fts'
+CATEGORY_TABLE = 'inventory_category_fts'
+
+CREATE_ITEM_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {ITEM_TABLE} USING fts5("
+    "store_id UNINDEXED, name, sku, description, category, "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+CREATE_CATEGORY_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {CATEGORY_TABLE} USING fts5("
+    "store_id UNINDEXED, name, "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+
+# Column weights for bm25: name and SKU matter more than the description
+ITEM_RANK = f"bm25({ITEM_TABLE}, 0, 10.0, 8.0, 1.0, 3.0)"
+
+# The unary + keeps SQLite from probing the FTS table by rowid once per item,
+# which re-runs the full-text query for every row; it drives from MATCH instead
+JOIN_ON_ROWID = "{table}.id = +{fts}.rowid"
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_available = {}
+
+
+def supports_fts(connection) -> bool:
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any('ENABLE_FTS5' in row[0] for row in cursor.fetchall())
+
+
+def create_tables(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_ITEM_TABLE)
+        cursor.execute(CREATE_CATEGORY_TABLE)
+
+
+def _availability_key(using):
+    return using, str(connections[using].settings_dict['NAME'])
+
+
+def is_available(using: str = 'default') -> bool:
+    """True if the search tables exist on this database; checked once per database."""
+    key = _availability_key(using)
+    if key not in _available:
+        connection = connections[using]
+        _available[key] = (
+            connection.vendor == 'sqlite'
+            and ITEM_TABLE in connection.introspection.table_names(include_views=True)
+        )
+    return _available[key]
+
+
+async def ais_available(using: str = 'default') -> bool:
+    """
+    ``is_available`` for async code.
+
+    The first check on a database introspects it, so it runs in a thread;
+    async views call this before building a search queryset, whose
+    ``is_available`` then reads the cached answer.
+    """
+    key = _availability_key(using)
+    if key in _available:
+        return _available[key]
+    return await sync_to_async(is_available)(using)
+
+
+def reset_availability():
+    _available.clear()
+
+
+def build_match_query(text: str):
+    """FTS5 MATCH expression prefix-matching every token of ``text``, or None if it has none."""
+    tokens = _TOKEN_RE.findall(text or '')
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def filter_items(queryset, *, store, text: str):
+    """
+    Restrict an item queryset to search matches, ordered by relevance.
+
+    Returns None if the search index is unavailable.
+    """
+    if not is_available(queryset.db):
+        return None
+    match = build_match_query(text)
+    if match is None:
+        return queryset.none()
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        tables=[ITEM_TABLE],
+        where=[JOIN_ON_ROWID.format(table=table, fts=ITEM_TABLE), f'{ITEM_TABLE} MATCH %s', f'{ITEM_TABLE}.store_id = %s'],
+        params=[match, store.pk],
+        select={'search_rank': ITEM_RANK},
+        order_by=['search_rank', '-id'],
+    )
+
+
+def filter_categories(queryset, *, store, text: str):
+    """Category counterpart of ``filter_items``."""
+    if not is_available(queryset.db):
+        return None
+    match = build_match_query(text)
+    if match is None:
+        return queryset.none()
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        tables=[CATEGORY_TABLE],
+        where=[JOIN_ON_ROWID.format(table=table, fts=CATEGORY_TABLE), f'{CATEGORY_TABLE} MATCH %s',
+               f'{CATEGORY_TABLE}.store_id = %s'],
+        params=[match, store.pk],
+        select={'search_rank': f'{CATEGORY_TABLE}.rank'},
+        order_by=['search_rank', 'name'],
+    )
+
+
+def index_items(items, using: str = 'default'):
+    """Insert or replace the index rows of ``items``; category must be loaded or cheap to load."""
+    items = list(items)
+    if not items or not is_available(using):
+        return
+    rows = [
+        (item.id, item.store_id, item.name, item.sku, item.description or '',
+         item.category.name if item.category_id else '')
+        for item in items
+    ]
+    with connections[using].cursor() as cursor:
+        _delete_rows(cursor, ITEM_TABLE, [row[0] for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {ITEM_TABLE}(rowid, store_id, name, sku, description, category) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def index_categories(categories, using: str = 'default'):
+    categories = list(categories)
+    if not categories or not is_available(using):
+        return
+    rows = [(category.id, category.store_id, category.name) for category in categories]
+    with connections[using].cursor() as cursor:
+        _delete_rows(cursor, CATEGORY_TABLE, [row[0] for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {CATEGORY_TABLE}(rowid, store_id, name) VALUES (%s, %s, %s)",
+            rows,
+        )
+
+
+def remove_items(item_ids, using: str = 'default'):
+    if is_available(using):
+        with connections[using].cursor() as cursor:
+            _delete_rows(cursor, ITEM_TABLE, list(item_ids))
+
+
+def remove_categories(category_ids, using: str = 'default'):
+    if is_available(using):
+        with connections[using].cursor() as cursor:
+            _delete_rows(cursor, CATEGORY_TABLE, list(category_ids))
+
+
+def rebuild(*, store=None, batch_size: int = 2000, using: str = 'default'):
+    """Rebuild the index from the item and category tables; returns (items, categories) indexed."""
+    from .models import Category, Item
+
+    if not is_available(using):
+        return 0, 0
+
+    items = Item.objects.using(using).select_related('category').order_by('id')
+    categories = Category.objects.using(using).order_by('id')
+    with connections[using].cursor() as cursor:
+        if store is None:
+            cursor.execute(f"DELETE FROM {ITEM_TABLE}")
+            cursor.execute(f"DELETE FROM {CATEGORY_TABLE}")
+        else:
+            cursor.execute(f"DELETE FROM {ITEM_TABLE} WHERE store_id = %s", [store.pk])
+            cursor.execute(f"DELETE FROM {CATEGORY_TABLE} WHERE store_id = %s", [store.pk])
+    if store is not None:
+        items = items.filter(store=store)
+        categories = categories.filter(store=store)
+
+    item_count = 0
+    batch = []
+    for item in items.iterator(chunk_size=batch_size):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            index_items(batch, using=using)
+            item_count += len(batch)
+            batch = []
+    index_items(batch, using=using)
+    item_count += len(batch)
+
+    categories = list(categories)
+    index_categories(categories, using=using)
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {ITEM_TABLE}({ITEM_TABLE}) VALUES ('optimize')")
+    return item_count, len(categories)
+
+
+def _delete_rows(cursor, table, ids):
+    # Stay well under SQLite's bound-parameter limit
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cursor.execute(f"DELETE FROM {table} WHERE rowid IN ({placeholders})", chunk)
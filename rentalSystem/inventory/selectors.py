@@ -1,6 +1,6 @@
 from typing import Optional
 
-from django.db.models import Q, QuerySet
+from django.db.models import Q, QuerySet, Sum
 
 
 def get_item_by_id(*, store, item_id: int):
@@ -12,10 +12,15 @@ def list_items(*, store, search: Optional[str] = None, is_rentable: Optional[boo
                is_sellable: Optional[bool] = None, status: Optional[str] = None, 
                category: Optional[int] = None) -> QuerySet:
     from .models import Item
-    qs = Item.objects.filter(store=store).order_by('-created_at')
+    qs = Item.objects.filter(store=store).select_related('store', 'category').order_by('-created_at', '-id')
     
     if search:
-        qs = qs.filter(Q(name__icontains=search) | Q(sku__icontains=search))
+        from .search import filter_items
+        matched = filter_items(qs, store=store, text=search)
+        if matched is None:
+            qs = qs.filter(Q(name__icontains=search) | Q(sku__icontains=search))
+        else:
+            qs = matched
     if is_rentable is not None:
         qs = qs.filter(is_rentable=is_rentable)
     if is_sellable is not None:
@@ -38,27 +43,180 @@ def list_categories(*, store, search: Optional[str] = None) -> QuerySet:
     qs = Category.objects.filter(store=store).order_by('name')
     
     if search:
-        qs = qs.filter(name__icontains=search)
+        from .search import filter_categories
+        matched = filter_categories(qs, store=store, text=search)
+        qs = qs.filter(name__icontains=search) if matched is None else matched
     
     return qs
 
 
-def get_low_stock_items(*, store, threshold: int = 5) -> QuerySet:
-    """Get items with quantity below threshold."""
-    from .models import Item
-    return Item.objects.filter(
-        store=store,
-        quantity__lt=threshold,
-        status='active'
-    ).order_by('quantity')
+def get_low_stock_items(*, store, threshold: Optional[int] = None) -> QuerySet:
+    """
+    Get active items below their reorder point, lowest stock first.
+    
+    Reads the maintained alert set, so the cost follows the number of alerts
+    rather than the catalog size. Passing ``threshold`` scans for items
+    below that fixed quantity instead.
+    """
+    from .models import Item, LowStockAlert
+    if threshold is not None:
+        return Item.objects.filter(
+            store=store,
+            quantity__lt=threshold,
+            status='active'
+        ).order_by('quantity')
+    alerted = LowStockAlert.objects.filter(store=store).values('item_id')
+    return Item.objects.filter(id__in=alerted).order_by('quantity', 'id')
+
+
+def get_low_stock_alerts(*, store) -> QuerySet:
+    """Current low-stock alerts of a store with their items, oldest first."""
+    from .models import LowStockAlert
+    return LowStockAlert.objects.filter(store=store).select_related('item').order_by('raised_at', 'id')
+
+
+def get_low_stock_changes(*, store, after: int = 0) -> QuerySet:
+    """Alerts raised and cleared in a store after event id ``after``, oldest first."""
+    from .models import LowStockEvent
+    return LowStockEvent.objects.filter(store=store, id__gt=after).select_related('item').order_by('id')
+
+
+def get_low_stock_cursor(*, store) -> int:
+    """Id of the store's latest low-stock event (0 if none); changes after it are new."""
+    from .models import LowStockEvent
+    return LowStockEvent.objects.filter(store=store).order_by('-id').values_list('id', flat=True).first() or 0
 
 
 def get_item_transactions(*, item, limit: Optional[int] = None) -> QuerySet:
     """Get transaction history for a specific item."""
     from .models import InventoryTransaction
-    qs = InventoryTransaction.objects.filter(item=item).order_by('-created_at')
+    qs = InventoryTransaction.objects.filter(item=item).select_related('actor').order_by('-created_at', '-id')
     
     if limit:
         qs = qs[:limit]
     
     return qs
+
+
+TRANSACTION_EXPORT_ORDERING = ('id',)
+
+TRANSACTION_EXPORT_COLUMNS = ['id', 'item_id', 'item_sku', 'delta', 'reason', 'actor_id', 'created_at', 'cursor']
+
+
+def export_transactions(*, store, item_id: Optional[int] = None, reason: Optional[str] = None,
+                        date_from=None, date_to=None, after=None, chunk_size: int = 2000):
+    """
+    Yield the store's ledger entries as dicts, oldest first, ``chunk_size`` rows per query.
+    
+    Every record carries a ``cursor``; pass its decoded values as ``after``
+    to resume after that entry.
+    """
+    from core.export import iter_keyset_chunks, with_cursor
+    from .models import InventoryTransaction
+    
+    qs = InventoryTransaction.objects.filter(item__store=store)
+    if item_id:
+        qs = qs.filter(item_id=item_id)
+    if reason:
+        qs = qs.filter(reason=reason)
+    if date_from:
+        qs = qs.filter(created_at__date__gte=date_from)
+    if date_to:
+        qs = qs.filter(created_at__date__lte=date_to)
+    rows = qs.values('id', 'item_id', 'item__sku', 'delta', 'reason', 'actor_id', 'created_at')
+    
+    for chunk in iter_keyset_chunks(rows, TRANSACTION_EXPORT_ORDERING, after=after, chunk_size=chunk_size):
+        for row in chunk:
+            row['item_sku'] = row.pop('item__sku')
+            yield with_cursor(TRANSACTION_EXPORT_ORDERING, row, row)
+
+
+def _ledger_after(checkpoint):
+    """Q for ledger entries after a checkpoint, in (created_at, id) order."""
+    return Q(created_at__gte=checkpoint.as_of) & (
+        Q(created_at__gt=checkpoint.as_of) | Q(id__gt=checkpoint.last_transaction_id)
+    )
+
+
+def _stock_until(*, item, at, inclusive: bool = True) -> int:
+    from .models import InventoryTransaction, StockCheckpoint
+    
+    bound = 'lte' if inclusive else 'lt'
+    checkpoint = StockCheckpoint.objects.filter(
+        item=item, **{f'as_of__{bound}': at}
+    ).order_by('-as_of', '-last_transaction_id').first()
+    
+    tail = InventoryTransaction.objects.filter(item=item, **{f'created_at__{bound}': at})
+    if checkpoint:
+        tail = tail.filter(_ledger_after(checkpoint))
+    base = checkpoint.quantity if checkpoint else 0
+    return base + (tail.aggregate(total=Sum('delta'))['total'] or 0)
+
+
+def get_stock_at(*, item, at) -> int:
+    """Stock of an item right after every ledger entry created at or before ``at``."""
+    return _stock_until(item=item, at=at)
+
+
+def get_stock_over_range(*, item, start, end) -> dict:
+    """
+    Opening stock at ``start`` and every movement up to ``end``.
+    
+    Returns a dict with opening, closing, low, high and movements, a list of
+    dicts with created_at, delta, reason and the resulting quantity.
+    """
+    from .models import InventoryTransaction
+    
+    opening = _stock_until(item=item, at=start, inclusive=False)
+    quantity = low = high = opening
+    movements = []
+    rows = InventoryTransaction.objects.filter(
+        item=item, created_at__gte=start, created_at__lte=end
+    ).order_by('created_at', 'id').values_list('created_at', 'delta', 'reason')
+    for created_at, delta, reason in rows.iterator():
+        quantity += delta
+        low = min(low, quantity)
+        high = max(high, quantity)
+        movements.append({'created_at': created_at, 'delta': delta, 'reason': reason, 'quantity': quantity})
+    
+    return {'opening': opening, 'closing': quantity, 'low': low, 'high': high, 'movements': movements}
+
+
+def verify_stock_checkpoints(*, store=None):
+    """
+    Recompute checkpoints and current stock from the raw ledger.
+    
+    Yields (item_id, problem) tuples for every checkpoint whose quantity
+    differs from the ledger sum and every item whose ledger does not add
+    up to Item.quantity.
+    """
+    from .models import InventoryTransaction, Item, StockCheckpoint
+    
+    items = Item.objects.order_by('id')
+    if store is not None:
+        items = items.filter(store=store)
+    
+    for item_id, on_hand in items.values_list('id', 'quantity').iterator():
+        checkpoints = list(
+            StockCheckpoint.objects.filter(item_id=item_id)
+            .order_by('as_of', 'last_transaction_id')
+            .values_list('last_transaction_id', 'as_of', 'quantity')
+        )
+        running = 0
+        position = 0
+        ledger = InventoryTransaction.objects.filter(item_id=item_id).order_by(
+            'created_at', 'id'
+        ).values_list('id', 'created_at', 'delta')
+        for transaction_id, created_at, delta in ledger.iterator(chunk_size=5000):
+            running += delta
+            while position < len(checkpoints) and checkpoints[position][0] == transaction_id:
+                if checkpoints[position][2] != running:
+                    yield item_id, (
+                        f"checkpoint after transaction {transaction_id} says {checkpoints[position][2]}, "
+                        f"ledger says {running}"
+                    )
+                position += 1
+        for transaction_id, _, _ in checkpoints[position:]:
+            yield item_id, f"checkpoint after transaction {transaction_id} is out of ledger order"
+        if running != on_hand:
+            yield item_id, f"ledger sums to {running}, Item.quantity is {on_hand}"
@@ -1,5 +1,11 @@
 from django.db import transaction
-from .models import Item, InventoryTransaction
+from django.db.models import F, Q
+from django.utils import timezone
+from core.cache import bump_catalog_version_on_commit
+from core.metrics import track_operation
+from reports.services import ReportsService
+from . import importer, low_stock, search, stock
+from .models import Item, InventoryTransaction, StockCheckpoint
 
 
 class InventoryService:
@@ -15,7 +21,12 @@ class InventoryService:
     @staticmethod
     def create_item(*, store, category=None, name: str, sku: str, price, description: str = "", 
                    quantity: int = 0, is_rentable: bool = True, is_sellable: bool = True, 
-                   rental_rate=None, status: str = 'active'):
+                   rental_rate=None, status: str = 'active', reorder_point=None):
+        threshold = low_stock.resolve(
+            item_point=reorder_point,
+            category_point=category.reorder_point if category else None,
+            default=low_stock.store_default(store.settings if store else None),
+        )
         item = Item.objects.create(
             store=store,
             category=category,
@@ -28,6 +39,8 @@ class InventoryService:
             is_sellable=is_sellable,
             rental_rate=rental_rate,
             status=status,
+            reorder_point=reorder_point,
+            low_stock_threshold=threshold,
         )
         
         # Create initial transaction if quantity > 0
@@ -38,21 +51,62 @@ class InventoryService:
                 reason=InventoryTransaction.REASON_INITIAL,
                 actor=None
             )
+            ReportsService.refresh_on_commit()
         
+        low_stock.record_crossings([(item, None)])
+        search.index_items([item])
+        bump_catalog_version_on_commit([item.store_id])
         return item
 
+    @staticmethod
+    def import_items(*, store, stream, fmt: str, actor=None, batch_size: int = 1000,
+                     update_existing: bool = True):
+        """
+        Create or update items from a CSV or NDJSON stream, in batches.
+        
+        Args:
+            store: Store the items belong to
+            stream: Binary or text file object
+            fmt: importer.FORMAT_CSV or importer.FORMAT_NDJSON
+            actor: User recorded on ledger entries (optional)
+            batch_size: Rows per batch and per transaction
+            update_existing: Update items whose SKU exists instead of reporting an error
+        
+        Returns:
+            importer.ImportReport with created/updated counts and per-row errors.
+        """
+        item_importer = importer.ItemImporter(
+            store=store, actor=actor, batch_size=batch_size, update_existing=update_existing,
+        )
+        return item_importer.run(importer.read_rows(stream, fmt))
+
     @staticmethod
     def update_item(*, item, **fields):
+        renamed = any(
+            getattr(item, key) != fields[key] for key in ('name', 'sku') if key in fields
+        )
         for key, value in fields.items():
             setattr(item, key, value)
         item.save()
+        if renamed:
+            from rentals.services import RentalService
+            RentalService.touch_rentals_of_items(item_ids=[item.id])
+        # Reorder points, category, status or quantity may have changed
+        low_stock.reconcile(Item.objects.filter(id=item.id))
+        search.index_items([item])
+        bump_catalog_version_on_commit([item.store_id])
         return item
 
     @staticmethod
+    @track_operation('adjust_stock')
     @transaction.atomic
     def adjust_stock(*, item: Item, delta: int, reason: str, actor=None):
         """
-        Adjust item stock and create transaction record with row-level locking.
+        Adjust item stock and create transaction record.
+        
+        The stock check and the write are one conditional UPDATE
+        (``inventory.stock.apply_deltas``), so concurrent reductions can never
+        take the quantity below zero, with or without row locks.
         
         Args:
             item: Item instance
@@ -63,23 +117,126 @@ class InventoryService:
         if reason not in dict(InventoryTransaction.REASON_CHOICES):
             raise ValueError(f"Invalid reason: {reason}")
         
-        # Lock the item row to prevent race conditions
-        locked_item = Item.objects.select_for_update().get(id=item.id)
-        
-        # Check if reduction would result in negative stock
-        if delta < 0 and locked_item.quantity + delta < 0:
-            raise ValueError(f"Insufficient stock. Current: {locked_item.quantity}, requested reduction: {abs(delta)}")
-        
-        # Update item quantity
-        locked_item.quantity += delta
-        locked_item.save(update_fields=['quantity', 'updated_at'])
+        updated_item = stock.apply_deltas({item.id: delta})[item.id]
+        low_stock.record_crossings([(updated_item, updated_item.quantity - delta)])
+        bump_catalog_version_on_commit([updated_item.store_id])
         
         # Create transaction record
         transaction_record = InventoryTransaction.objects.create(
-            item=locked_item,
+            item=updated_item,
             delta=delta,
             reason=reason,
             actor=actor
         )
+        ReportsService.refresh_on_commit()
         
         return transaction_record
+
+    @staticmethod
+    @transaction.atomic
+    def adjust_stock_many(*, adjustments, reason: str, actor=None):
+        """
+        Apply several stock adjustments with conditional UPDATEs and bulk writes.
+        
+        Adjustments are netted per item and applied with one UPDATE per distinct
+        net delta; if any item is short, nothing is applied.
+        
+        Args:
+            adjustments: List of (item, delta) pairs; an item may appear more than once
+            reason: One of InventoryTransaction.REASON_* choices
+            actor: User performing the action (optional)
+        
+        Returns:
+            List of created InventoryTransaction records, one per adjustment.
+        """
+        if reason not in dict(InventoryTransaction.REASON_CHOICES):
+            raise ValueError(f"Invalid reason: {reason}")
+        
+        adjustments = [(item, delta) for item, delta in adjustments]
+        if not adjustments:
+            return []
+        
+        net = {}
+        for item, delta in adjustments:
+            net[item.id] = net.get(item.id, 0) + delta
+        
+        updated = stock.apply_deltas(net)
+        low_stock.record_crossings([(item, item.quantity - net[item_id]) for item_id, item in updated.items()])
+        bump_catalog_version_on_commit(item.store_id for item in updated.values())
+        
+        ReportsService.refresh_on_commit()
+        return InventoryTransaction.objects.bulk_create([
+            InventoryTransaction(
+                item=updated[item.id],
+                delta=delta,
+                reason=reason,
+                actor=actor
+            )
+            for item, delta in adjustments
+        ])
+
+    @staticmethod
+    def reconcile_low_stock(*, items=None, chunk_size: int = 5000) -> None:
+        """
+        Recompute low-stock thresholds and alerts from scratch.
+        
+        Normal writes keep alerts current; this repairs them after changes
+        that bypass the services (admin edits, raw SQL).
+        
+        Args:
+            items: Item queryset to reconcile (defaults to all items)
+            chunk_size: Items reconciled per transaction
+        """
+        items = Item.objects.all() if items is None else items
+        ids = list(items.order_by('id').values_list('id', flat=True))
+        for start in range(0, len(ids), chunk_size):
+            with transaction.atomic():
+                low_stock.reconcile(Item.objects.filter(id__in=ids[start:start + chunk_size]))
+
+    @staticmethod
+    def write_checkpoints(*, items=None, every: int = 1000) -> int:
+        """
+        Write a StockCheckpoint after every ``every`` ledger entries per item.
+        
+        Only entries after each item's latest checkpoint are read, so running
+        this periodically is incremental. Returns the number of checkpoints written.
+        
+        Args:
+            items: Item queryset to process (defaults to all items)
+            every: Ledger entries between checkpoints; bounds the tail scan of stock queries
+        """
+        if every <= 0:
+            raise ValueError("every must be positive")
+        
+        items = Item.objects.all() if items is None else items
+        written = 0
+        for item_id in items.order_by('id').values_list('id', flat=True).iterator():
+            latest = StockCheckpoint.objects.filter(item_id=item_id).order_by(
+                '-as_of', '-last_transaction_id'
+            ).first()
+            ledger = InventoryTransaction.objects.filter(item_id=item_id)
+            running = 0
+            if latest:
+                ledger = ledger.filter(
+                    Q(created_at__gte=latest.as_of)
+                    & (Q(created_at__gt=latest.as_of) | Q(id__gt=latest.last_transaction_id))
+                )
+                running = latest.quantity
+            
+            checkpoints = []
+            seen = 0
+            rows = ledger.order_by('created_at', 'id').values_list('id', 'created_at', 'delta')
+            for transaction_id, created_at, delta in rows.iterator(chunk_size=5000):
+                running += delta
+                seen += 1
+                if seen % every == 0:
+                    checkpoints.append(StockCheckpoint(
+                        item_id=item_id,
+                        last_transaction_id=transaction_id,
+                        as_of=created_at,
+                        quantity=running,
+                    ))
+            StockCheckpoint.objects.bulk_create(checkpoints, batch_size=1000)
+            written += len(checkpoints)
+        
+        return written
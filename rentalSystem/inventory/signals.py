@@ -0,0 +1,51 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.cache import bump_catalog_version_on_commit
+from stores.models import Store
+
+from . import low_stock, search
+from .models import Category, Item
+
+
+@receiver(post_save, sender=Category)
+def index_category(sender, instance, created, **kwargs):
+    search.index_categories([instance])
+    bump_catalog_version_on_commit([instance.store_id])
+    if not created:
+        # Items carry their category's name in the index
+        search.index_items(instance.items.select_related('category'))
+        # ...and may inherit its reorder point
+        low_stock.reconcile(instance.items.all())
+        # Item payloads embed the category, so their ETags must change
+        instance.items.update(updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=Category)
+def touch_category_items(sender, instance, **kwargs):
+    # Deleting the category sets their category to NULL without touching updated_at
+    instance.items.update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Category)
+def unindex_category(sender, instance, **kwargs):
+    search.remove_categories([instance.pk])
+    bump_catalog_version_on_commit([instance.store_id])
+    if instance.store_id is not None:
+        # Its items fall back to the store default
+        low_stock.reconcile_store_default(instance.store_id)
+
+
+@receiver(post_delete, sender=Item)
+def unindex_item(sender, instance, **kwargs):
+    search.remove_items([instance.pk])
+    bump_catalog_version_on_commit([instance.store_id])
+
+
+@receiver(post_save, sender=Store)
+def apply_store_threshold(sender, instance, created, **kwargs):
+    if not created:
+        low_stock.reconcile_store_default(instance.id)
+        # Item payloads show the store name
+        bump_catalog_version_on_commit([instance.id])
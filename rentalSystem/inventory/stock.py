@@ -0,0 +1,118 @@
+"""
+Conditional stock updates.
+
+Stock moves with ``UPDATE ... SET quantity = quantity + delta WHERE id IN (...)
+AND quantity + delta >= 0``: the availability check and the write are one
+statement, so no other writer can get between them, even on SQLite where
+``select_for_update`` is a no-op. Which rows the statement touched tells
+which items had enough stock; nothing is read or locked beforehand.
+
+On SQLite (3.35+) and PostgreSQL the statement returns the updated rows,
+so the new quantities for low-stock checks and the ledger cost no extra
+query. Other backends run one count-checked UPDATE per item, then a SELECT.
+"""
+from django.db import connections
+from django.utils import timezone
+
+from .models import Item
+
+# Loaded on the returned items, in model field order as ``Model.from_db`` expects; the rest are deferred
+RETURNED_FIELDS = tuple(
+    field.attname for field in Item._meta.concrete_fields
+    if field.attname in ('id', 'store_id', 'quantity', 'status', 'low_stock_threshold')
+)
+
+
+def apply_deltas(deltas, *, using: str = 'default'):
+    """
+    Add ``delta`` to each item's quantity unless that would take it below zero.
+
+    Must run inside a transaction: on failure earlier statements have already
+    been applied and are only undone by the rollback.
+
+    Args:
+        deltas: Dict of item id to (net) delta
+        using: Database alias
+
+    Returns:
+        Dict of item id to an Item with ``RETURNED_FIELDS`` as updated.
+
+    Raises:
+        Item.DoesNotExist: An item does not exist
+        ValueError: An item has less stock than a reduction asks for
+    """
+    now = timezone.now()
+    connection = connections[using]
+    update = _update_returning if _supports_update_returning(connection) else _update_counted
+    ids_by_delta = {}
+    for item_id, delta in deltas.items():
+        ids_by_delta.setdefault(delta, []).append(item_id)
+
+    updated = {}
+    # One statement per distinct delta; carts rarely have more than a few
+    for delta, ids in ids_by_delta.items():
+        items = update(connection, ids, delta, now)
+        if len(items) < len(ids):
+            _raise_shortfall([item_id for item_id in ids if item_id not in items], delta, using)
+        updated.update(items)
+    return updated
+
+
+def _supports_update_returning(connection) -> bool:
+    if connection.vendor == 'postgresql':
+        return True
+    # Django enables INSERT ... RETURNING on SQLite from 3.35, which added it for UPDATE too
+    return connection.vendor == 'sqlite' and connection.features.can_return_columns_from_insert
+
+
+def _update_sql(connection, count):
+    quote = connection.ops.quote_name
+    quantity = quote(Item._meta.get_field('quantity').column)
+    updated_at = quote(Item._meta.get_field('updated_at').column)
+    pk = quote(Item._meta.pk.column)
+    return (
+        f"UPDATE {quote(Item._meta.db_table)} SET {quantity} = {quantity} + %s, {updated_at} = %s "
+        f"WHERE {pk} IN ({', '.join(['%s'] * count)}) AND {quantity} + %s >= 0"
+    )
+
+
+def _update_returning(connection, ids, delta, now):
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(Item._meta.get_field(name).column) for name in RETURNED_FIELDS)
+    pk_index = RETURNED_FIELDS.index(Item._meta.pk.attname)
+    sql = f"{_update_sql(connection, len(ids))} RETURNING {columns}"
+    params = [delta, Item._meta.get_field('updated_at').get_db_prep_save(now, connection), *ids, delta]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return {row[pk_index]: _loaded(connection.alias, row, now) for row in rows}
+
+
+def _update_counted(connection, ids, delta, now):
+    sql = _update_sql(connection, 1)
+    updated_at = Item._meta.get_field('updated_at').get_db_prep_save(now, connection)
+    changed = []
+    with connection.cursor() as cursor:
+        for item_id in ids:
+            cursor.execute(sql, [delta, updated_at, item_id, delta])
+            if cursor.rowcount == 1:
+                changed.append(item_id)
+    items = Item.objects.using(connection.alias).filter(id__in=changed).only(
+        *(Item._meta.get_field(name).name for name in RETURNED_FIELDS)
+    )
+    return {item.id: item for item in items}
+
+
+def _loaded(using, row, now):
+    item = Item.from_db(using, RETURNED_FIELDS, row)
+    item.updated_at = now
+    return item
+
+
+def _raise_shortfall(item_ids, delta, using):
+    current = dict(Item.objects.using(using).filter(id__in=item_ids).values_list('id', 'quantity'))
+    for item_id in item_ids:
+        if item_id not in current:
+            raise Item.DoesNotExist(f"Item {item_id} does not exist")
+    quantity = current[item_ids[0]]
+    raise ValueError(f"Insufficient stock. Current: {quantity}, requested reduction: {abs(delta)}")
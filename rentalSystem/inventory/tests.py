@@ -1,3 +1,374 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+
+from core.testing import QueryBudgetMixin, QueryPlanMixin
+from inventory import importer, search, selectors, stock
+from inventory.models import Category, Item, InventoryTransaction, LowStockAlert, LowStockEvent, StockCheckpoint
+from inventory.services import InventoryService
+from stores.models import Store
+
+
+class SelectorQueryPlanTestCase(QueryPlanMixin, TestCase):
+    """Store-scoped selectors must be served by the composite indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.stores = [Store.objects.create(name=f'Store {i}', slug=f'store-{i}') for i in range(5)]
+        cls.store = cls.stores[0]
+        for store in cls.stores:
+            category = Category.objects.create(store=store, name='Tents')
+            Item.objects.bulk_create([
+                Item(
+                    store=store,
+                    category=category,
+                    name=f'Item {i}',
+                    sku=f'SKU{i:04d}',
+                    price=Decimal('10.00'),
+                    quantity=i % 20,
+                    status='active' if i % 10 else 'archived',
+                )
+                for i in range(200)
+            ])
+        cls.item = Item.objects.filter(store=cls.store).first()
+        InventoryTransaction.objects.bulk_create([
+            InventoryTransaction(item=item, delta=1, reason=InventoryTransaction.REASON_ADJUSTMENT)
+            for item in Item.objects.all()
+            for _ in range(3)
+        ])
+
+    def test_list_items(self):
+        self.assertUsesIndex(selectors.list_items(store=self.store), 'item_store_created_idx')
+
+    def test_list_items_filtered(self):
+        qs = selectors.list_items(store=self.store, is_rentable=True, status='active')
+        self.assertUsesIndex(qs, 'item_store_created_idx')
+
+    def test_get_low_stock_items(self):
+        self.assertUsesIndex(selectors.get_low_stock_items(store=self.store, threshold=5), 'item_active_quantity_idx')
+
+    def test_get_low_stock_alerts(self):
+        self.assertUsesIndex(selectors.get_low_stock_alerts(store=self.store), 'lowstock_store_raised_idx')
+
+    def test_get_low_stock_changes(self):
+        self.assertUsesIndex(selectors.get_low_stock_changes(store=self.store, after=0), 'lowstock_event_store_idx')
+
+    def test_get_item_transactions(self):
+        self.assertUsesIndex(selectors.get_item_transactions(item=self.item), 'invtx_item_created_idx')
+
+    def test_list_categories(self):
+        self.assertUsesIndex(selectors.list_categories(store=self.store))
+
+
+class ItemSearchTestCase(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        self.other_store = Store.objects.create(name='Other Store', slug='other-store')
+        self.camping = Category.objects.create(store=self.store, name='Camping Gear')
+        self.tent = InventoryService.create_item(
+            store=self.store, category=self.camping, name='Family Tent', sku='TENT-001',
+            price=Decimal('50.00'), quantity=3,
+        )
+        self.stove = InventoryService.create_item(
+            store=self.store, name='Camp Stove', sku='STOVE-001', price=Decimal('20.00'),
+            description='Fits in any tent bag',
+        )
+        InventoryService.create_item(
+            store=self.other_store, name='Tent', sku='TENT-001', price=Decimal('50.00'),
+        )
+
+    def search_ids(self, text):
+        return list(selectors.list_items(store=self.store, search=text).values_list('id', flat=True))
+
+    def test_index_available(self):
+        self.assertTrue(search.is_available())
+
+    def test_prefix_match_and_ranking(self):
+        self.assertEqual(self.search_ids('ten'), [self.tent.id, self.stove.id])
+        self.assertEqual(self.search_ids('fam tent-0'), [self.tent.id])
+        self.assertEqual(self.search_ids('camping'), [self.tent.id])
+        self.assertEqual(self.search_ids('!!'), [])
+
+    def test_update_and_delete_keep_index_in_sync(self):
+        InventoryService.update_item(item=self.stove, name='Gas Burner')
+        self.assertEqual(self.search_ids('burn'), [self.stove.id])
+        self.camping.name = 'Outdoor'
+        self.camping.save()
+        self.assertEqual(self.search_ids('outdoor'), [self.tent.id])
+        self.tent.delete()
+        self.assertEqual(self.search_ids('family'), [])
+
+    def test_category_search(self):
+        Category.objects.create(store=self.store, name='Cooking')
+        names = [c.name for c in selectors.list_categories(store=self.store, search='c')]
+        self.assertEqual(sorted(names), ['Camping Gear', 'Cooking'])
+
+    def test_fallback_without_index(self):
+        with mock.patch.object(search, 'is_available', return_value=False):
+            self.assertEqual(self.search_ids('mily te'), [self.tent.id])
+            names = [c.name for c in selectors.list_categories(store=self.store, search='ping')]
+            self.assertEqual(names, ['Camping Gear'])
+
+    def test_rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search.ITEM_TABLE}")
+        self.assertEqual(self.search_ids('tent'), [])
+        self.assertEqual(search.rebuild(store=self.store), (2, 1))
+        self.assertEqual(self.search_ids('tent'), [self.tent.id, self.stove.id])
+
+
+class ConditionalStockUpdateTestCase(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        self.tent = InventoryService.create_item(
+            store=self.store, name='Tent', sku='TENT', price=Decimal('50.00'), quantity=3,
+        )
+        self.stove = InventoryService.create_item(
+            store=self.store, name='Stove', sku='STOVE', price=Decimal('20.00'), quantity=2,
+        )
+
+    def assertLedgerMatches(self):
+        for item in Item.objects.all():
+            self.assertEqual(sum(item.transactions.values_list('delta', flat=True)), item.quantity)
+
+    def test_check_uses_the_stored_quantity(self):
+        stale = Item.objects.get(id=self.tent.id)
+        stale.quantity = 100
+        with self.assertRaisesMessage(ValueError, 'Current: 3, requested reduction: 4'):
+            InventoryService.adjust_stock(item=stale, delta=-4, reason=InventoryService.REASON_SALE)
+        record = InventoryService.adjust_stock(item=stale, delta=-3, reason=InventoryService.REASON_SALE)
+        self.assertEqual(record.item.quantity, 0)
+        self.assertEqual(Item.objects.get(id=self.tent.id).quantity, 0)
+        self.assertLedgerMatches()
+
+    def test_many_is_all_or_nothing(self):
+        with self.assertRaisesMessage(ValueError, 'Current: 2, requested reduction: 3'):
+            InventoryService.adjust_stock_many(
+                adjustments=[(self.tent, -1), (self.stove, -2), (self.stove, -1)],
+                reason=InventoryService.REASON_RENTAL,
+            )
+        self.assertEqual(dict(Item.objects.values_list('sku', 'quantity')), {'TENT': 3, 'STOVE': 2})
+        InventoryService.adjust_stock_many(
+            adjustments=[(self.tent, -3), (self.stove, -2), (self.stove, 1)],
+            reason=InventoryService.REASON_RENTAL,
+        )
+        self.assertEqual(dict(Item.objects.values_list('sku', 'quantity')), {'TENT': 0, 'STOVE': 1})
+        self.assertLedgerMatches()
+
+    def test_missing_item(self):
+        missing = Item(id=self.stove.id + 100)
+        with self.assertRaises(Item.DoesNotExist):
+            InventoryService.adjust_stock(item=missing, delta=1, reason=InventoryService.REASON_ADJUSTMENT)
+
+    def test_without_update_returning(self):
+        with mock.patch.object(stock, '_supports_update_returning', return_value=False):
+            records = InventoryService.adjust_stock_many(
+                adjustments=[(self.tent, -2), (self.stove, -2)], reason=InventoryService.REASON_RENTAL,
+            )
+            self.assertEqual([record.item.quantity for record in records], [1, 0])
+            with self.assertRaisesMessage(ValueError, 'Current: 1, requested reduction: 2'):
+                InventoryService.adjust_stock(item=self.tent, delta=-2, reason=InventoryService.REASON_SALE)
+        self.assertLedgerMatches()
+
+
+class StockCheckpointTestCase(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        self.item = InventoryService.create_item(
+            store=self.store, name='Tent', sku='TENT-001', price=Decimal('50.00'), quantity=10,
+        )
+        for delta in [-2, -3, 4, -1, 5, -6, 2]:
+            InventoryService.adjust_stock(item=self.item, delta=delta, reason=InventoryService.REASON_ADJUSTMENT)
+        # One ledger entry per hour, the last two sharing a timestamp
+        self.base = timezone.make_aware(datetime(2025, 1, 1))
+        ledger = list(InventoryTransaction.objects.filter(item=self.item).order_by('id'))
+        for i, transaction in enumerate(ledger):
+            transaction.created_at = self.base + timedelta(hours=min(i, 6))
+        InventoryTransaction.objects.bulk_update(ledger, ['created_at'])
+        # Running stock after each entry: 10, 8, 5, 9, 8, 13, 7, 9
+
+    def stock_at(self, hours):
+        return selectors.get_stock_at(item=self.item, at=self.base + timedelta(hours=hours))
+
+    def test_stock_at_without_checkpoints(self):
+        self.assertEqual(self.stock_at(-1), 0)
+        self.assertEqual(self.stock_at(0), 10)
+        self.assertEqual(self.stock_at(2.5), 5)
+        self.assertEqual(self.stock_at(6), 9)
+
+    def test_checkpoints_do_not_change_answers(self):
+        expected = [self.stock_at(h) for h in range(-1, 8)]
+        self.assertEqual(InventoryService.write_checkpoints(every=3), 2)
+        self.assertEqual([self.stock_at(h) for h in range(-1, 8)], expected)
+        self.assertEqual(InventoryService.write_checkpoints(every=2), 1)
+        self.assertEqual([self.stock_at(h) for h in range(-1, 8)], expected)
+        # A checkpoint landing between two entries sharing a timestamp
+        StockCheckpoint.objects.all().delete()
+        self.assertEqual(InventoryService.write_checkpoints(every=7), 1)
+        self.assertEqual([self.stock_at(h) for h in range(-1, 8)], expected)
+
+    def test_checkpoints_are_incremental(self):
+        InventoryService.write_checkpoints(every=3)
+        InventoryService.adjust_stock(item=self.item, delta=1, reason=InventoryService.REASON_ADJUSTMENT)
+        self.assertEqual(InventoryService.write_checkpoints(every=3), 1)
+        latest = StockCheckpoint.objects.order_by('-as_of', '-last_transaction_id').first()
+        self.assertEqual(latest.quantity, 10)
+        self.assertEqual(selectors.get_stock_at(item=self.item, at=timezone.now()), 10)
+
+    def test_stock_over_range(self):
+        InventoryService.write_checkpoints(every=2)
+        result = selectors.get_stock_over_range(
+            item=self.item, start=self.base + timedelta(hours=2), end=self.base + timedelta(hours=5),
+        )
+        self.assertEqual(result['opening'], 8)
+        self.assertEqual(result['closing'], 13)
+        self.assertEqual((result['low'], result['high']), (5, 13))
+        self.assertEqual([m['quantity'] for m in result['movements']], [5, 9, 8, 13])
+
+    def test_verify(self):
+        InventoryService.write_checkpoints(every=3)
+        call_command('verify_stock_checkpoints', stdout=StringIO())
+
+        StockCheckpoint.objects.filter(pk=StockCheckpoint.objects.first().pk).update(quantity=99)
+        Item.objects.filter(pk=self.item.pk).update(quantity=1)
+        problems = list(selectors.verify_stock_checkpoints(store=self.store))
+        self.assertEqual(len(problems), 2)
+        with self.assertRaises(CommandError):
+            call_command('verify_stock_checkpoints', stdout=StringIO(), stderr=StringIO())
+
+
+class ItemImportTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        self.existing = InventoryService.create_item(
+            store=self.store, name='Old Tent', sku='TENT-001', price=Decimal('40.00'), quantity=5,
+        )
+
+    def run_import(self, content, fmt='csv', **kwargs):
+        return InventoryService.import_items(
+            store=self.store, stream=BytesIO(content.encode()), fmt=fmt, **kwargs
+        )
+
+    def test_csv_creates_and_updates(self):
+        report = self.run_import(
+            "name,sku,price,quantity,category,is_rentable\n"
+            "Family Tent,TENT-001,50.00,8,Camping,yes\n"
+            "Stove,STOVE-001,20,3,Camping,no\n"
+            "Lamp,LAMP-001,5,,,\n",
+            batch_size=2,
+        )
+        self.assertEqual((report.created, report.updated, report.error_count), (2, 1, 0))
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.name, self.existing.quantity), ('Family Tent', 8))
+        stove = Item.objects.get(store=self.store, sku='STOVE-001')
+        self.assertFalse(stove.is_rentable)
+        self.assertEqual(stove.category, self.existing.category)
+        self.assertEqual(Category.objects.filter(store=self.store).count(), 1)
+        self.assertEqual(
+            list(InventoryTransaction.objects.filter(item=self.existing).order_by('id').values_list('reason', 'delta')),
+            [('initial', 5), ('adjustment', 3)],
+        )
+        self.assertEqual(list(selectors.verify_stock_checkpoints(store=self.store)), [])
+        self.assertEqual(
+            list(selectors.list_items(store=self.store, search='stove').values_list('sku', flat=True)),
+            ['STOVE-001'],
+        )
+
+    def test_ndjson_row_errors(self):
+        report = self.run_import(
+            '{"name": "Stove", "sku": "STOVE-001", "price": 20}\n'
+            '\n'
+            'not json\n'
+            '[1, 2]\n'
+            '{"name": "Lamp", "sku": "STOVE-001", "price": 5}\n'
+            '{"name": "Lamp", "sku": "LAMP-001", "price": "cheap", "quantity": -1}\n'
+            '{"sku": "TENT-001", "name": "Tent", "price": 1}\n',
+            fmt=importer.FORMAT_NDJSON,
+            update_existing=False,
+        )
+        self.assertEqual((report.created, report.updated, report.error_count), (1, 0, 5))
+        self.assertEqual([error['row'] for error in report.errors], [2, 3, 4, 5, 6])
+        self.assertEqual(set(report.errors[3]['errors']), {'price', 'quantity'})
+        self.assertEqual(set(report.errors[4]['errors']), {'sku'})
+
+    def test_batch_query_count_does_not_grow_per_row(self):
+        rows = ''.join(f"Item {i},SKU{i:04d},10,2,Category {i % 3}\n" for i in range(200))
+        # Bulk inserts split at the backend's parameter limit, hence a budget rather than an exact count.
+        # Every row is below the default reorder point, so the batch also raises 200 low-stock alerts.
+        with self.assertMaxQueries(22):
+            self.run_import("name,sku,price,quantity,category\n" + rows, batch_size=200)
+
+
+class LowStockTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='Test Store', slug='test-store', settings={'low_stock_threshold': 3})
+        self.category = Category.objects.create(store=self.store, name='Tents', reorder_point=8)
+        self.tent = InventoryService.create_item(
+            store=self.store, category=self.category, name='Tent', sku='TENT', price=Decimal('50.00'), quantity=10,
+        )
+        self.stove = InventoryService.create_item(
+            store=self.store, name='Stove', sku='STOVE', price=Decimal('20.00'), quantity=2,
+        )
+        self.lamp = InventoryService.create_item(
+            store=self.store, category=self.category, name='Lamp', sku='LAMP', price=Decimal('5.00'),
+            quantity=4, reorder_point=2,
+        )
+
+    def alerted(self):
+        return set(LowStockAlert.objects.values_list('item__sku', flat=True))
+
+    def events(self):
+        return list(LowStockEvent.objects.order_by('id').values_list('item__sku', 'kind', 'quantity', 'threshold'))
+
+    def test_thresholds_resolve_item_category_store(self):
+        thresholds = dict(Item.objects.values_list('sku', 'low_stock_threshold'))
+        self.assertEqual(thresholds, {'TENT': 8, 'STOVE': 3, 'LAMP': 2})
+        self.assertEqual(self.alerted(), {'STOVE'})
+        self.assertEqual(self.events(), [('STOVE', 'raised', 2, 3)])
+
+    def test_adjust_stock_writes_only_on_crossing(self):
+        with self.assertNumQueries(4):
+            InventoryService.adjust_stock(item=self.tent, delta=-1, reason=InventoryService.REASON_SALE)
+        # Plus the alert and its event
+        with self.assertNumQueries(6):
+            InventoryService.adjust_stock(item=self.tent, delta=-2, reason=InventoryService.REASON_SALE)
+        self.assertEqual(self.alerted(), {'STOVE', 'TENT'})
+        InventoryService.adjust_stock_many(
+            adjustments=[(self.tent, 5), (self.lamp, -4), (self.lamp, 1)],
+            reason=InventoryService.REASON_ADJUSTMENT,
+        )
+        self.assertEqual(self.alerted(), {'STOVE', 'LAMP'})
+        self.assertEqual(self.events()[1:], [
+            ('TENT', 'raised', 7, 8), ('LAMP', 'raised', 1, 2), ('TENT', 'cleared', 12, 8),
+        ])
+
+    def test_reorder_point_changes_reconcile(self):
+        self.category.reorder_point = None
+        self.category.save()
+        self.assertEqual(Item.objects.get(id=self.tent.id).low_stock_threshold, 3)
+        InventoryService.update_item(item=self.stove, reorder_point=1)
+        self.assertEqual(self.alerted(), set())
+        self.store.settings = {'low_stock_threshold': 20}
+        self.store.save()
+        self.assertEqual(self.alerted(), {'TENT'})
+        InventoryService.update_item(item=Item.objects.get(id=self.tent.id), status='archived')
+        self.assertEqual(self.alerted(), set())
 
-# Create your tests here.
+    def test_maintained_set_matches_scan(self):
+        Item.objects.filter(id=self.tent.id).update(quantity=1)
+        LowStockAlert.objects.all().delete()
+        self.assertEqual(list(selectors.get_low_stock_items(store=self.store)), [])
+        call_command('reconcile_low_stock', stdout=StringIO())
+        self.assertEqual(self.alerted(), {'TENT', 'STOVE'})
+        self.assertEqual(
+            [item.sku for item in selectors.get_low_stock_items(store=self.store)], ['TENT', 'STOVE'],
+        )
+        with self.assertRaises(CommandError):
+            call_command('reconcile_low_stock', store=999, stdout=StringIO())
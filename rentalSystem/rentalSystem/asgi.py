@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rentalSystem.settings')
+# Serve the v1 read endpoints from async views (API_ASYNC_READS); set it to 0 to opt out
+os.environ.setdefault('API_ASYNC_READS', '1')
 
 application = get_asgi_application()
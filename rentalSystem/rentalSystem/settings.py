@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from core.db import sqlite_options
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -51,6 +54,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'core.timing.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -83,14 +87,74 @@ WSGI_APPLICATION = 'rentalSystem.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite tuned for concurrent writers: WAL, pragmas on every connection and
+# BEGIN IMMEDIATE transactions (core/db.py). Connections, and their page
+# cache, are kept between requests; health checks replace broken ones.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': sqlite_options(),
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Shared between worker processes on one host:
+    # 'default': {
+    #     'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    #     'LOCATION': BASE_DIR / 'cache',
+    # },
+}
+
+# Cache alias for cross-request store/membership lookups (None disables it)
+STORE_ACCESS_CACHE = None
+STORE_ACCESS_CACHE_TIMEOUT = 300
+
+# Cache alias for versioned category and item list responses (None disables it).
+# Writes move the store to a new version, so entries only need to expire.
+CATALOG_CACHE = None
+CATALOG_CACHE_TIMEOUT = 300
+
+# Report stats are folded in by `manage.py refresh_reports`, run periodically.
+# True also refreshes them after every commit that writes rentals or ledger
+# rows: three more write transactions per stock write, so only for small sites
+REPORTS_REFRESH_ON_COMMIT = False
+
+# Share of requests timed (0 disables): query count, DB, serialization and view
+# time go out as a Server-Timing header (unless REQUEST_TIMING_HEADER is False)
+# and as a `core.timing` log line for requests of at least REQUEST_TIMING_LOG_MIN_MS
+REQUEST_TIMING_SAMPLE_RATE = 0.05
+REQUEST_TIMING_HEADER = True
+REQUEST_TIMING_LOG_MIN_MS = 0
+
+# Directory where each worker process writes its metrics for /metrics to add
+# up (None: each process serves only its own), at most every
+# METRICS_FLUSH_INTERVAL seconds. Scrapes must send
+# `Authorization: Bearer <METRICS_TOKEN>`; without a token /metrics is only
+# served with DEBUG on
+METRICS_DIR = None
+METRICS_FLUSH_INTERVAL = 1.0
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+
+# Serve GETs of the item, category and rental lists and details and of whoami
+# from async views. rentalSystem/asgi.py turns it on; under WSGI every async
+# view would need an event loop of its own
+API_ASYNC_READS = os.environ.get('API_ASYNC_READS', '') == '1'
+
+# Days after its first day that a reservation not yet started keeps its units;
+# after that it lapses: it no longer counts against availability and cannot start
+RESERVATION_HOLD_DAYS = 1
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -141,8 +205,20 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed JSON when orjson is installed, the stdlib otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'core.pagination.DefaultPagination',
     'PAGE_SIZE': 20,
+    # DRF's handler, plus service ValidationErrors as 400
+    'EXCEPTION_HANDLER': 'core.exceptions.exception_handler',
 }
 
 # Custom user model
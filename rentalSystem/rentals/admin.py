@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Rental, RentalItem, ReturnReport
+from .models import OverdueSweep, Rental, RentalItem, ReturnReport
 
 
 @admin.register(Rental)
@@ -23,3 +23,9 @@ class ReturnReportAdmin(admin.ModelAdmin):
     search_fields = ('rental_item__item__name', 'rental_item__rental__customer_name')
     list_filter = ('returned_at',)
     readonly_fields = ('returned_at',)
+
+
+@admin.register(OverdueSweep)
+class OverdueSweepAdmin(admin.ModelAdmin):
+    list_display = ('id', 'started_at', 'rentals_marked', 'chunks', 'duration_ms')
+    readonly_fields = ('started_at', 'rentals_marked', 'chunks', 'duration_ms')
@@ -0,0 +1,128 @@
+"""
+Date-range availability over rental lines.
+
+An item's capacity is its units on hand (``Item.quantity``) plus the units
+out on rentals that have started. Every open rental line occupies its
+outstanding units on each day from its start to its due date inclusive;
+overdue lines are assumed out until at least today. Reserved (future)
+rentals have not taken stock yet, so they only count as occupancy, and only
+until they lapse: a reservation not started within ``RESERVATION_HOLD_DAYS``
+days after its first day no longer holds anything and cannot be started.
+Cancelled rentals are not open.
+
+``AvailabilityIndex`` loads the open lines once and answers range queries in
+memory by sweeping each item's pre-sorted interval events, so a query costs
+O(open lines of the item) with no database access.
+"""
+from bisect import bisect_right
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+ONE_DAY = timedelta(days=1)
+
+
+def is_lapsed(first_day, today) -> bool:
+    """True if a reservation starting on ``first_day`` was not started in time and holds no stock."""
+    return first_day + timedelta(days=getattr(settings, 'RESERVATION_HOLD_DAYS', 1)) < today
+
+
+class AvailabilityIndex:
+    def __init__(self, *, capacity, intervals):
+        """
+        Args:
+            capacity: Dict of item_id -> total units owned
+            intervals: Dict of item_id -> list of (first_day, last_day, units)
+        """
+        self.capacity = capacity
+        self.intervals = {}
+        for item_id, spans in intervals.items():
+            spans = sorted(spans)
+            self.intervals[item_id] = (spans, [span[0] for span in spans])
+
+    @classmethod
+    def for_store(cls, store, *, item_ids=None, today=None):
+        """Index the store's items (or just ``item_ids``) with two queries."""
+        from inventory.models import Item
+
+        items = Item.objects.filter(store=store)
+        if item_ids is not None:
+            items = items.filter(id__in=item_ids)
+        on_hand = dict(items.values_list('id', 'quantity'))
+        return cls.from_lines(on_hand=on_hand, lines=open_lines(store=store, item_ids=item_ids), today=today)
+
+    @classmethod
+    def from_lines(cls, *, on_hand, lines, today=None):
+        """
+        Build an index from on-hand quantities and ``open_lines`` rows.
+
+        Args:
+            on_hand: Dict of item_id -> Item.quantity
+            lines: Iterable of (item_id, outstanding, status, first_day, due_date)
+        """
+        from .models import Rental
+
+        today = today or timezone.now().date()
+        capacity = dict(on_hand)
+        intervals = {}
+        for item_id, outstanding, status, first_day, due_date in lines:
+            if outstanding <= 0:
+                continue
+            if status == Rental.STATUS_RESERVED:
+                if is_lapsed(first_day, today):
+                    continue
+            else:
+                capacity[item_id] = capacity.get(item_id, 0) + outstanding
+                due_date = max(due_date, today)
+            intervals.setdefault(item_id, []).append((first_day, due_date, outstanding))
+        return cls(capacity=capacity, intervals=intervals)
+
+    def peak(self, item_id, start, end) -> int:
+        """Most units of the item occupied on any single day in [start, end]."""
+        spans, starts = self.intervals.get(item_id, ((), ()))
+        # Only spans starting on or before ``end`` can overlap the range
+        events = []
+        for first_day, last_day, units in spans[:bisect_right(starts, end)]:
+            if last_day < start:
+                continue
+            events.append((max(first_day, start), units))
+            events.append((min(last_day, end) + ONE_DAY, -units))
+        # Releases sort before claims on the same day: a span ending yesterday
+        # does not overlap one starting today
+        events.sort()
+        running = highest = 0
+        for _, units in events:
+            running += units
+            highest = max(highest, running)
+        return highest
+
+    def available(self, item_id, start, end) -> int:
+        """Units of the item free on every day in [start, end]."""
+        return max(self.capacity.get(item_id, 0) - self.peak(item_id, start, end), 0)
+
+    def available_all(self, start, end) -> dict:
+        """``available`` for every indexed item."""
+        return {item_id: self.available(item_id, start, end) for item_id in self.capacity}
+
+
+def open_lines(*, store=None, item_ids=None):
+    """
+    Outstanding units of lines on reserved, active or overdue rentals.
+
+    Yields (item_id, outstanding, status, first_day, due_date) tuples.
+    """
+    from .models import Rental, RentalItem
+
+    qs = RentalItem.objects.filter(rental__status__in=Rental.OPEN_STATUSES)
+    if store is not None:
+        qs = qs.filter(rental__store=store)
+    if item_ids is not None:
+        qs = qs.filter(item_id__in=item_ids)
+    rows = qs.values_list(
+        'item_id', 'qty', 'returned_qty', 'rental__status', 'rental__starts_on',
+        'rental__start_date', 'rental__due_date',
+    )
+    for item_id, qty, returned_qty, status, starts_on, start_date, due_date in rows.iterator(chunk_size=5000):
+        first_day = starts_on or timezone.localdate(start_date)
+        yield item_id, qty - returned_qty, status, first_day, due_date
@@ -0,0 +1,47 @@
+from argparse import ArgumentTypeError
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rentals.services import RentalService
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
+
+def positive_float(value):
+    number = float(value)
+    if not number > 0:
+        raise ArgumentTypeError(f"must be above 0, not {value}")
+    return number
+
+
+class Command(BaseCommand):
+    help = "Mark active rentals past their due date (in each store's timezone) as overdue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=positive_int, default=5000, help="Most rows changed per UPDATE")
+        parser.add_argument(
+            '--interval', type=positive_float,
+            help="Keep running, sweeping every INTERVAL seconds, instead of sweeping once (run one such process)",
+        )
+
+    def handle(self, *args, **options):
+        # call_command() keyword arguments skip the argparse types
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+        if options['interval']:
+            from rentals.scheduler import OverdueSweeper
+            self.stdout.write(f"Sweeping for overdue rentals every {options['interval']:g} seconds")
+            try:
+                OverdueSweeper(interval=options['interval'], chunk_size=options['chunk_size']).run()
+            except KeyboardInterrupt:
+                pass
+            return
+        sweep = RentalService.mark_overdue(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Marked {sweep.rentals_marked} rentals overdue in {sweep.chunks} chunks, {sweep.duration_ms:.1f} ms"
+        ))
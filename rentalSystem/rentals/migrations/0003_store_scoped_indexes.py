@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0002_rename_returned_at_rental_returned_date_and_more'),
+        ('stores', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['store', 'start_date', 'id'], name='rental_store_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['store', 'status', 'start_date', 'id'], name='rental_store_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['store', 'due_date'], name='rental_active_due_idx'),
+        ),
+    ]
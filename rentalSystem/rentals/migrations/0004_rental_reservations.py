@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0003_store_scoped_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rental',
+            name='starts_on',
+            field=models.DateField(blank=True, help_text='First day of the rental period; later than start_date for reservations', null=True),
+        ),
+        migrations.AlterField(
+            model_name='rental',
+            name='status',
+            field=models.CharField(choices=[('reserved', 'Reserved'), ('active', 'Active'), ('returned', 'Returned'), ('overdue', 'Overdue')], default='active', max_length=16),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0004_rental_reservations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OverdueSweep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('duration_ms', models.FloatField()),
+                ('rentals_marked', models.IntegerField()),
+                ('chunks', models.IntegerField(help_text='UPDATE statements that changed at least one row')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0005_overdue_sweep'),
+        ('stores', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rental',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['store', 'updated_at'], name='rental_store_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0006_rental_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rental',
+            name='status',
+            field=models.CharField(choices=[('reserved', 'Reserved'), ('active', 'Active'), ('returned', 'Returned'), ('overdue', 'Overdue'), ('cancelled', 'Cancelled')], default='active', max_length=16),
+        ),
+    ]
@@ -2,24 +2,45 @@ from django.db import models
 
 
 class Rental(models.Model):
+    STATUS_RESERVED = 'reserved'
     STATUS_ACTIVE = 'active'
     STATUS_RETURNED = 'returned'
     STATUS_OVERDUE = 'overdue'
+    STATUS_CANCELLED = 'cancelled'
 
     STATUS_CHOICES = [
+        (STATUS_RESERVED, 'Reserved'),
         (STATUS_ACTIVE, 'Active'),
         (STATUS_RETURNED, 'Returned'),
         (STATUS_OVERDUE, 'Overdue'),
+        (STATUS_CANCELLED, 'Cancelled'),
     ]
 
+    # Rentals whose lines still hold (or will hold) stock
+    OPEN_STATUSES = (STATUS_RESERVED, STATUS_ACTIVE, STATUS_OVERDUE)
+
     store = models.ForeignKey('stores.Store', on_delete=models.CASCADE, related_name='rentals', null=True, blank=True)
     created_by = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='created_rentals', null=True, blank=True)
     customer_name = models.CharField(max_length=120)
     start_date = models.DateTimeField(auto_now_add=True)
+    starts_on = models.DateField(null=True, blank=True, help_text='First day of the rental period; later than start_date for reservations')
     due_date = models.DateField()
     returned_date = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_ACTIVE)
     total = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['store', 'start_date', 'id'], name='rental_store_start_idx'),
+            models.Index(fields=['store', 'updated_at'], name='rental_store_updated_idx'),
+            models.Index(fields=['store', 'status', 'start_date', 'id'], name='rental_store_status_idx'),
+            models.Index(
+                fields=['store', 'due_date'],
+                name='rental_active_due_idx',
+                condition=models.Q(status='active'),
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Rental #{self.id} - {self.customer_name}"
@@ -44,3 +65,17 @@ class ReturnReport(models.Model):
 
     def __str__(self) -> str:
         return f"Return Report for {self.rental_item.item.name}"
+
+
+class OverdueSweep(models.Model):
+    """One run of ``RentalService.mark_overdue``: what it changed and how long it took."""
+    started_at = models.DateTimeField()
+    duration_ms = models.FloatField()
+    rentals_marked = models.IntegerField()
+    chunks = models.IntegerField(help_text='UPDATE statements that changed at least one row')
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self) -> str:
+        return f"Overdue sweep {self.started_at:%Y-%m-%d %H:%M}: {self.rentals_marked} rentals"
@@ -0,0 +1,61 @@
+"""
+Periodic overdue sweep.
+
+``OverdueSweeper`` runs ``RentalService.mark_overdue`` every ``interval``
+seconds. ``manage.py sweep_overdue --interval N`` runs it in the foreground
+of a dedicated worker process; ``start()`` runs it on a daemon thread of the
+caller's process. Nothing starts it on import or app loading, so web
+workers, ``migrate`` and the test runner never sweep on their own. Keep to
+one sweeping process, or use cron and ``manage.py sweep_overdue``; the sweep
+is idempotent, so an occasional double run is harmless.
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_sweeper = None
+_lock = threading.Lock()
+
+
+class OverdueSweeper(threading.Thread):
+    def __init__(self, *, interval: float, chunk_size: int = 5000):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        super().__init__(name='overdue-sweeper', daemon=True)
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self._stopped = threading.Event()
+
+    def run(self):
+        from django.db import close_old_connections
+        from .services import RentalService
+
+        while not self._stopped.wait(self.interval):
+            try:
+                RentalService.mark_overdue(chunk_size=self.chunk_size)
+            except Exception:
+                logger.exception("Overdue sweep failed")
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self._stopped.set()
+
+
+def start(*, interval: float, chunk_size: int = 5000):
+    """Start the sweeper thread once per process; returns it."""
+    global _sweeper
+    with _lock:
+        if _sweeper is None or not _sweeper.is_alive():
+            _sweeper = OverdueSweeper(interval=interval, chunk_size=chunk_size)
+            _sweeper.start()
+        return _sweeper
+
+
+def stop():
+    global _sweeper
+    with _lock:
+        if _sweeper is not None:
+            _sweeper.stop()
+            _sweeper = None
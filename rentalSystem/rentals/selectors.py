@@ -1,34 +1,72 @@
-from datetime import date
+from datetime import date, datetime, time, timedelta
 from typing import Optional
 
-from django.db.models import QuerySet
+from django.core.exceptions import ValidationError
+from django.db.models import Prefetch, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+def _day_start(value) -> Optional[datetime]:
+    """
+    Start of a day in the current timezone, or None if value is not a date.
+
+    A well-formed but impossible date (``2024-13-45``) raises ValidationError,
+    as the ORM does for the values it cannot parse.
+    """
+    if isinstance(value, str):
+        try:
+            value = parse_date(value)
+        except ValueError:
+            raise ValidationError(
+                f"“{value}” value has the correct format (YYYY-MM-DD) but it is an invalid date.",
+                code='invalid_date',
+            )
+    if not isinstance(value, date):
+        return None
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+
+def get_rental_queryset(*, store) -> QuerySet:
+    """Rentals of a store with the store, creator and lines (with their items) loaded."""
+    from .models import Rental, RentalItem
+
+    return Rental.objects.filter(store=store).select_related('store', 'created_by').prefetch_related(
+        Prefetch('items', queryset=RentalItem.objects.select_related('item').order_by('id'))
+    )
 
 
 def get_rental_by_id(*, store, rental_id: int):
-    from .models import Rental
-    return Rental.objects.filter(store=store, id=rental_id).select_related('store').first()
+    return get_rental_queryset(store=store).filter(id=rental_id).first()
 
 
 def list_rentals(*, store, status: Optional[str] = None, item_id: Optional[int] = None,
                  date_from: Optional[date] = None, date_to: Optional[date] = None) -> QuerySet:
-    from .models import Rental
-
-    qs = Rental.objects.filter(store=store).select_related('store').order_by('-start_date')
+    qs = get_rental_queryset(store=store).order_by('-start_date', '-id')
     if status:
         qs = qs.filter(status=status)
     if item_id:
         qs = qs.filter(items__item_id=item_id)
+    # Compare start_date against day boundaries rather than start_date__date,
+    # so the filter stays on the (store, start_date) index
     if date_from:
-        qs = qs.filter(start_date__date__gte=date_from)
+        day_start = _day_start(date_from)
+        if day_start:
+            qs = qs.filter(start_date__gte=day_start)
+        else:
+            qs = qs.filter(start_date__date__gte=date_from)
     if date_to:
-        qs = qs.filter(start_date__date__lte=date_to)
+        day_start = _day_start(date_to)
+        if day_start:
+            qs = qs.filter(start_date__lt=day_start + timedelta(days=1))
+        else:
+            qs = qs.filter(start_date__date__lte=date_to)
     return qs
 
 
 def get_rentals_due_today(*, store) -> QuerySet:
     """Get rentals due for return today."""
     from .models import Rental
-    from django.utils import timezone
     
     today = timezone.now().date()
     return Rental.objects.filter(
@@ -38,6 +76,13 @@ def get_rentals_due_today(*, store) -> QuerySet:
     ).select_related('store')
 
 
+def get_overdue_rentals(*, store) -> QuerySet:
+    """Rentals the overdue sweep has marked as past due, most recent first."""
+    from .models import Rental
+    
+    return Rental.objects.filter(store=store, status=Rental.STATUS_OVERDUE).order_by('-start_date', '-id')
+
+
 def get_active_rentals(*, store) -> QuerySet:
     """Get currently active rentals."""
     from .models import Rental
@@ -46,3 +91,65 @@ def get_active_rentals(*, store) -> QuerySet:
         store=store,
         status=Rental.STATUS_ACTIVE
     ).select_related('store')
+
+
+EXPORT_ORDERING = ('id',)
+
+EXPORT_COLUMNS = [
+    'id', 'customer_name', 'status', 'start_date', 'starts_on', 'due_date', 'returned_date', 'total',
+    'created_by_id', 'line_id', 'item_id', 'item_sku', 'item_name', 'qty', 'per_day', 'returned_qty', 'cursor',
+]
+
+
+def export_rentals(*, store, after=None, chunk_size: int = 2000, status: Optional[str] = None,
+                   item_id: Optional[int] = None, date_from: Optional[date] = None,
+                   date_to: Optional[date] = None):
+    """
+    Yield every matching rental as a dict with its lines under ``items``, oldest first.
+    
+    Takes the filters of ``list_rentals``. Rentals are read ``chunk_size`` at a
+    time by id, each chunk with one query for its lines, so memory stays
+    bounded. Every record carries a ``cursor``; pass its decoded values as
+    ``after`` to resume after that rental.
+    """
+    from core.export import iter_keyset_chunks, with_cursor
+    from .models import RentalItem
+
+    qs = list_rentals(
+        store=store, status=status, item_id=item_id, date_from=date_from, date_to=date_to,
+    ).prefetch_related(None)
+    if item_id:
+        # The line join repeats rentals that hold the item on several lines
+        qs = qs.distinct()
+    rows = qs.values(
+        'id', 'customer_name', 'status', 'start_date', 'starts_on', 'due_date', 'returned_date', 'total',
+        'created_by_id',
+    )
+    for chunk in iter_keyset_chunks(rows, EXPORT_ORDERING, after=after, chunk_size=chunk_size):
+        lines = {}
+        line_rows = RentalItem.objects.filter(rental_id__in=[row['id'] for row in chunk]).order_by('id').values(
+            'rental_id', 'id', 'item_id', 'item__sku', 'item__name', 'qty', 'per_day', 'returned_qty',
+        )
+        for line in line_rows:
+            lines.setdefault(line.pop('rental_id'), []).append({
+                'id': line['id'],
+                'item_id': line['item_id'],
+                'item_sku': line['item__sku'],
+                'item_name': line['item__name'],
+                'qty': line['qty'],
+                'per_day': line['per_day'],
+                'returned_qty': line['returned_qty'],
+            })
+        for row in chunk:
+            yield with_cursor(EXPORT_ORDERING, row, {**row, 'items': lines.get(row['id'], [])})
+
+
+def flatten_rental_export(record):
+    """CSV rows of one exported rental: one per line, rental columns repeated."""
+    rental = {key: value for key, value in record.items() if key != 'items'}
+    if not record['items']:
+        return [rental]
+    return [
+        {**rental, **{f'line_{key}' if key == 'id' else key: value for key, value in line.items()}}
+        for line in record['items']
+    ]
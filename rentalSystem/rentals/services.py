@@ -1,161 +1,422 @@
+import logging
+import time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
 from django.db import transaction
+from django.db.models import Subquery
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from core.metrics import RENTAL_LINES, track_operation
 from inventory.services import InventoryService
+from reports.services import ReportsService
+
+logger = logging.getLogger(__name__)
 
 
 class RentalService:
     """Business actions for rentals."""
 
     @staticmethod
+    @track_operation('create_rental')
     @transaction.atomic
-    def create_rental(*, store, created_by, customer_name: str, due_date, items):
+    def create_rental(*, store, created_by, customer_name: str, due_date, items, start_date=None):
         """
         Create a rental with multiple items and proper inventory management.
         
+        All requested items are locked in one id-ordered query and the rental
+        lines, stock decrements and ledger rows are written in bulk, so the
+        query count does not grow with the size of the cart.
+        
+        A future start_date creates a reservation: stock is only checked
+        against the availability engine for the booked period and is not
+        taken until ``start_rental``.
+        
         Args:
             store: Store instance
             created_by: User creating the rental
             customer_name: Customer name
             due_date: Due date for the rental
             items: List of dicts with item_id, qty, per_day
+            start_date: First day of the rental (defaults to today)
         """
         from inventory.models import Item
+        from .availability import AvailabilityIndex, open_lines
         from .models import Rental, RentalItem
         
-        # Validate due date
-        if due_date <= timezone.now().date():
-            raise ValidationError("Due date must be in the future")
+        today = timezone.now().date()
+        start_date = start_date or today
+        
+        # Validate dates
+        if due_date <= today:
+            raise ValidationError("Due date must be in the future", code='invalid_dates')
+        if start_date < today:
+            raise ValidationError("Start date cannot be in the past", code='invalid_dates')
+        if due_date <= start_date:
+            raise ValidationError("Due date must be after the start date", code='invalid_dates')
+        reserved = start_date > today
+        
+        # Normalise the cart and total the requested quantity per item
+        lines = []
+        requested = {}
+        for item_data in items:
+            # Ids from JSON may be strings; the locked items are keyed by int
+            try:
+                item_id = int(item_data['item_id'])
+            except (TypeError, ValueError):
+                raise ValidationError(f"Item {item_data['item_id']} not found or not rentable", code='not_found')
+            qty = item_data.get('qty', 1)
+            per_day = item_data.get('per_day', 0)
+            lines.append((item_id, qty, per_day))
+            requested[item_id] = requested.get(item_id, 0) + qty
+        
+        # Lock every requested item in one query, in id order to avoid deadlocks
+        locked_items = {
+            item.id: item
+            for item in Item.objects.select_for_update().filter(
+                id__in=requested.keys(),
+                store=store,
+                is_rentable=True,
+                status='active'
+            ).order_by('id')
+        }
+        
+        for item_id, _, _ in lines:
+            if item_id not in locked_items:
+                raise ValidationError(f"Item {item_id} not found or not rentable", code='not_found')
+        
+        if not reserved:
+            for item_id, qty in requested.items():
+                item = locked_items[item_id]
+                if item.quantity < qty:
+                    raise ValidationError(f"Insufficient inventory for {item.name}. Available: {item.quantity}, requested: {qty}", code='insufficient_stock')
+        
+        # Check the whole period against other rentals and reservations
+        availability = AvailabilityIndex.from_lines(
+            on_hand={item_id: item.quantity for item_id, item in locked_items.items()},
+            lines=open_lines(item_ids=list(locked_items)),
+            today=today,
+        )
+        for item_id, qty in requested.items():
+            available = availability.available(item_id, start_date, due_date)
+            if available < qty:
+                item = locked_items[item_id]
+                raise ValidationError(
+                    f"Insufficient availability for {item.name} from {start_date} to {due_date}. "
+                    f"Available: {available}, requested: {qty}",
+                    code='insufficient_stock',
+                )
+        
+        # Calculate cost
+        days = (due_date - start_date).days
+        total_cost = sum(per_day * qty * days for _, qty, per_day in lines)
         
         # Create rental
         rental = Rental.objects.create(
             store=store,
             created_by=created_by,
             customer_name=customer_name,
+            starts_on=start_date,
             due_date=due_date,
+            status=Rental.STATUS_RESERVED if reserved else Rental.STATUS_ACTIVE,
+            total=total_cost,
         )
         
-        rental_items = []
-        total_cost = 0
-        
-        # Process each item
-        for item_data in items:
-            item_id = item_data['item_id']
-            qty = item_data.get('qty', 1)
-            per_day = item_data.get('per_day', 0)
-            
-            # Get and lock item
-            item = Item.objects.select_for_update().filter(
-                id=item_id, 
-                store=store,
-                is_rentable=True,
-                status='active'
-            ).first()
-            
-            if not item:
-                raise ValidationError(f"Item {item_id} not found or not rentable")
-            
-            if item.quantity < qty:
-                raise ValidationError(f"Insufficient inventory for {item.name}. Available: {item.quantity}, requested: {qty}")
-            
-            # Create rental item
-            rental_item = RentalItem.objects.create(
+        RentalItem.objects.bulk_create([
+            RentalItem(
                 rental=rental,
-                item=item,
+                item=locked_items[item_id],
                 qty=qty,
                 per_day=per_day
             )
-            rental_items.append(rental_item)
-            
-            # Calculate cost
-            days = (due_date - timezone.now().date()).days
-            total_cost += per_day * qty * days
-            
-            # Reduce inventory using service
-            InventoryService.adjust_stock(
-                item=item,
-                delta=-qty,
+            for item_id, qty, per_day in lines
+        ])
+        
+        # Reduce inventory and write the ledger in bulk. The decrement re-checks
+        # stock in the UPDATE itself, which also covers databases without row locks
+        if not reserved:
+            try:
+                InventoryService.adjust_stock_many(
+                    adjustments=[(locked_items[item_id], -qty) for item_id, qty, _ in lines],
+                    reason=InventoryService.REASON_RENTAL,
+                    actor=created_by,
+                )
+            except ValueError as exc:
+                raise ValidationError(str(exc), code='insufficient_stock')
+        else:
+            # Taking stock schedules the report refresh; a reservation writes no ledger rows
+            ReportsService.refresh_on_commit()
+        
+        RENTAL_LINES.observe(len(lines))
+        return rental
+
+    @staticmethod
+    @transaction.atomic
+    def start_rental(*, rental_id: int, actor=None):
+        """
+        Hand out a reserved rental: take its stock and mark it active.
+        
+        Args:
+            rental_id: Rental ID
+            actor: User handing out the items (optional)
+        """
+        from .availability import is_lapsed
+        from .models import Rental
+        
+        rental = Rental.objects.select_for_update().filter(id=rental_id).first()
+        if not rental:
+            raise ValidationError("Rental not found", code='not_found')
+        
+        if rental.status != Rental.STATUS_RESERVED:
+            raise ValidationError("Only reserved rentals can be started", code='not_reserved')
+        
+        # Its units stopped being held for it, so they may be promised to others
+        if is_lapsed(rental.starts_on, timezone.now().date()):
+            raise ValidationError("Reservation has lapsed", code='lapsed')
+        
+        try:
+            InventoryService.adjust_stock_many(
+                adjustments=[(line.item, -line.qty) for line in rental.items.select_related('item')],
                 reason=InventoryService.REASON_RENTAL,
-                actor=created_by
+                actor=actor,
             )
+        except ValueError as exc:
+            raise ValidationError(str(exc), code='insufficient_stock')
         
-        # Update rental total
-        rental.total = total_cost
-        rental.save(update_fields=['total'])
+        rental.status = Rental.STATUS_ACTIVE
+        rental.starts_on = min(rental.starts_on, timezone.now().date())
+        rental.save(update_fields=['status', 'starts_on', 'updated_at'])
+        return rental
+
+    @staticmethod
+    @transaction.atomic
+    def cancel_reservation(*, rental_id: int, actor=None):
+        """
+        Cancel a reserved rental, releasing the period it held.
+        
+        Reservations take no stock, so nothing is returned to inventory.
+        The rental is taken back out of the daily report stats.
         
+        Args:
+            rental_id: Rental ID
+            actor: User cancelling the reservation (optional)
+        """
+        from .models import Rental
+        
+        rental = Rental.objects.select_for_update().filter(id=rental_id).first()
+        if not rental:
+            raise ValidationError("Rental not found", code='not_found')
+        
+        if rental.status != Rental.STATUS_RESERVED:
+            raise ValidationError("Only reserved rentals can be cancelled", code='not_reserved')
+        
+        rental.status = Rental.STATUS_CANCELLED
+        rental.save(update_fields=['status', 'updated_at'])
+        ReportsService.retract_rental(rental=rental)
         return rental
 
     @staticmethod
+    @track_operation('process_return')
     @transaction.atomic
-    def process_return(*, rental_id: int, returned_items, returned_at=None):
+    def process_return(*, rental_id: int, returned_items=None, returned_at=None,
+                       return_all: bool = False, actor=None):
         """
         Process rental return with partial returns support.
         
+        The rental's lines are locked in one query and the returned
+        quantities, return reports and ledger rows are written in bulk.
+        Completion is worked out from the locked lines, without reloading.
+        
         Args:
             rental_id: Rental ID
             returned_items: List of dicts with rental_item_id, qty, condition, damage_cost
             returned_at: Return timestamp (defaults to now)
+            return_all: Also return every quantity still outstanding after
+                returned_items is applied, with condition "good"
+            actor: User processing the return (optional)
         """
         from .models import Rental, RentalItem, ReturnReport
         
         returned_at = returned_at or timezone.now()
+        returned_items = returned_items or []
         
         # Get and lock rental
         rental = Rental.objects.select_for_update().filter(id=rental_id).first()
         if not rental:
-            raise ValidationError("Rental not found")
+            raise ValidationError("Rental not found", code='not_found')
         
         if rental.status == Rental.STATUS_RETURNED:
-            raise ValidationError("Rental already returned")
+            raise ValidationError("Rental already returned", code='already_returned')
+        
+        if rental.status == Rental.STATUS_RESERVED:
+            raise ValidationError("Rental has not started", code='not_started')
+        
+        if rental.status == Rental.STATUS_CANCELLED:
+            raise ValidationError("Rental was cancelled", code='cancelled')
         
-        # Process each returned item
+        # Only rentals that took stock can give it back
+        if rental.status not in (Rental.STATUS_ACTIVE, Rental.STATUS_OVERDUE):
+            raise ValidationError(f"Rental cannot be returned from status {rental.status}", code='invalid_status')
+        
+        # Lock all lines of the rental at once; they are also used for the completion check
+        rental_items = {
+            rental_item.id: rental_item
+            for rental_item in RentalItem.objects.select_for_update().filter(
+                rental=rental
+            ).select_related('item').order_by('id')
+        }
+        
+        lines = []
         for return_data in returned_items:
-            rental_item_id = return_data['rental_item_id']
+            # Ids from JSON may be strings; the locked lines are keyed by int
+            try:
+                rental_item_id = int(return_data['rental_item_id'])
+            except (TypeError, ValueError):
+                raise ValidationError(f"Rental item {return_data['rental_item_id']} not found", code='not_found')
             qty = return_data.get('qty', 1)
             condition = return_data.get('condition', 'good')
             damage_cost = return_data.get('damage_cost', 0)
             
-            # Get rental item
-            rental_item = RentalItem.objects.select_for_update().filter(
-                id=rental_item_id,
-                rental=rental
-            ).first()
-            
+            rental_item = rental_items.get(rental_item_id)
             if not rental_item:
-                raise ValidationError(f"Rental item {rental_item_id} not found")
+                raise ValidationError(f"Rental item {rental_item_id} not found", code='not_found')
             
             if qty > rental_item.qty - rental_item.returned_qty:
-                raise ValidationError(f"Cannot return more than rented. Rented: {rental_item.qty}, already returned: {rental_item.returned_qty}")
+                raise ValidationError(f"Cannot return more than rented. Rented: {rental_item.qty}, already returned: {rental_item.returned_qty}", code='over_return')
             
-            # Update returned quantity
             rental_item.returned_qty += qty
-            rental_item.save(update_fields=['returned_qty'])
-            
-            # Create return report
-            ReturnReport.objects.create(
+            lines.append((rental_item, qty, condition, damage_cost))
+        
+        if return_all:
+            for rental_item in rental_items.values():
+                outstanding = rental_item.qty - rental_item.returned_qty
+                if outstanding > 0:
+                    rental_item.returned_qty += outstanding
+                    lines.append((rental_item, outstanding, 'good', 0))
+        
+        if not lines:
+            raise ValidationError("Nothing to return", code='nothing_to_return')
+        
+        # Update returned quantities
+        RentalItem.objects.bulk_update(
+            list({rental_item.id: rental_item for rental_item, _, _, _ in lines}.values()),
+            ['returned_qty']
+        )
+        
+        # Create return reports
+        ReturnReport.objects.bulk_create([
+            ReturnReport(
                 rental_item=rental_item,
                 returned_at=returned_at,
                 notes=f"Condition: {condition}",
                 damage_cost=damage_cost
             )
-            
-            # Return inventory using service
-            InventoryService.adjust_stock(
-                item=rental_item.item,
-                delta=qty,
-                reason=InventoryService.REASON_RETURN,
-                actor=None  # Could be passed from request
-            )
+            for rental_item, _, condition, damage_cost in lines
+        ])
+        
+        # Return inventory using service
+        InventoryService.adjust_stock_many(
+            adjustments=[(rental_item.item, qty) for rental_item, qty, _, _ in lines],
+            reason=InventoryService.REASON_RETURN,
+            actor=actor
+        )
         
         # Check if all items are returned
         all_returned = all(
             item.returned_qty >= item.qty 
-            for item in rental.items.all()
+            for item in rental_items.values()
         )
         
+        # Returned quantities are part of the rental, so its updated_at moves either way
         if all_returned:
             rental.returned_date = returned_at
             rental.status = Rental.STATUS_RETURNED
-            rental.save(update_fields=['returned_date', 'status'])
+            rental.save(update_fields=['returned_date', 'status', 'updated_at'])
+        else:
+            rental.save(update_fields=['updated_at'])
         
         return rental
+
+    @staticmethod
+    def mark_overdue(*, chunk_size: int = 5000, now=None):
+        """
+        Move every active rental past its due date to overdue, in all stores.
+        
+        "Past due" means due_date is before today in the store's timezone, so
+        stores are grouped by timezone. Each group is swept with set-based
+        ``UPDATE ... WHERE id IN (SELECT id ... LIMIT chunk_size)`` statements,
+        each committed on its own, served by the partial
+        ``rental_active_due_idx`` index. The run is recorded as an OverdueSweep.
+        
+        Args:
+            chunk_size: Most rows changed per UPDATE
+            now: Current time (defaults to now); for tests and backfills
+        
+        Raises:
+            ValueError: chunk_size is below 1
+        
+        Returns:
+            The OverdueSweep record.
+        """
+        from stores.models import Store
+        from .models import OverdueSweep, Rental
+        
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        
+        now = now or timezone.now()
+        started = time.perf_counter()
+        
+        stores_by_zone = {}
+        for store_id, zone_name in Store.objects.values_list('id', 'timezone'):
+            stores_by_zone.setdefault(zone_name, []).append(store_id)
+        
+        marked = chunks = 0
+        for zone_name, store_ids in stores_by_zone.items():
+            try:
+                today = now.astimezone(ZoneInfo(zone_name)).date()
+            except (ZoneInfoNotFoundError, ValueError):
+                logger.warning("Unknown timezone %r; sweeping its stores in UTC", zone_name)
+                today = now.astimezone(ZoneInfo('UTC')).date()
+            
+            # Keep each statement well under the backend's bound-parameter limit
+            for start in range(0, len(store_ids), 500):
+                due = Rental.objects.filter(
+                    store_id__in=store_ids[start:start + 500],
+                    status=Rental.STATUS_ACTIVE,
+                    due_date__lt=today,
+                )
+                while True:
+                    # A single statement: commits on its own, holding write locks briefly
+                    changed = Rental.objects.filter(
+                        id__in=Subquery(due.values('id')[:chunk_size])
+                    ).update(status=Rental.STATUS_OVERDUE, updated_at=timezone.now())
+                    if changed:
+                        marked += changed
+                        chunks += 1
+                    if changed < chunk_size:
+                        break
+        
+        sweep = OverdueSweep.objects.create(
+            started_at=now,
+            duration_ms=(time.perf_counter() - started) * 1000,
+            rentals_marked=marked,
+            chunks=chunks,
+        )
+        logger.info("Marked %d rentals overdue in %.1f ms", marked, sweep.duration_ms)
+        return sweep
+
+    @staticmethod
+    def touch_rentals_of_items(*, item_ids) -> int:
+        """
+        Move ``updated_at`` of every rental with a line for one of ``item_ids``.
+        
+        Rental payloads show their items' names and SKUs, so renaming an item
+        changes them too and must invalidate their ETags.
+        """
+        from .models import Rental, RentalItem
+        
+        item_ids = list(item_ids)
+        if not item_ids:
+            return 0
+        rental_ids = RentalItem.objects.filter(item_id__in=item_ids).values('rental_id')
+        return Rental.objects.filter(id__in=Subquery(rental_ids)).update(updated_at=timezone.now())
@@ -1,12 +1,25 @@
-from django.test import TestCase
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, TestCase
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
 from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+import tempfile
 
 from stores.models import Store
 from inventory.models import Item, Category
-from rentals.models import Rental, RentalItem
+from core.db import SQLITE_PRAGMAS, read_pragmas, sqlite_options
+from core.testing import QueryPlanMixin
+from rentals import selectors
+from rentals.availability import AvailabilityIndex
+from rentals.models import OverdueSweep, Rental, RentalItem
 from rentals.services import RentalService
 from inventory.services import InventoryService
 
@@ -155,6 +168,27 @@ class RentalServiceTestCase(TestCase):
         rental_item = rental.items.first()
         self.assertEqual(rental_item.returned_qty, 1)
 
+    def test_process_return_string_line_ids(self):
+        """Test that rental line ids given as strings, as JSON clients may send them, are accepted."""
+        rental = RentalService.create_rental(
+            store=self.store,
+            created_by=self.user,
+            customer_name='John Doe',
+            due_date=date.today() + timedelta(days=3),
+            items=[{'item_id': self.item.id, 'qty': 3, 'per_day': Decimal('2.00')}]
+        )
+        line = rental.items.get()
+
+        RentalService.process_return(
+            rental_id=rental.id,
+            returned_items=[{'rental_item_id': str(line.id), 'qty': 3}]
+        )
+
+        rental.refresh_from_db()
+        self.assertEqual(rental.status, 'returned')
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 5)
+
     def test_process_return_complete(self):
         """Test processing complete returns correctly."""
         # First create a rental
@@ -209,3 +243,498 @@ class RentalServiceTestCase(TestCase):
             )
         
         self.assertIn('Due date must be in the future', str(context.exception))
+
+    def _make_items(self, count, quantity=5):
+        return Item.objects.bulk_create([
+            Item(
+                name=f'Bulk Item {i}',
+                sku=f'BULK{i:03d}',
+                store=self.store,
+                price=Decimal('10.00'),
+                quantity=quantity,
+            )
+            for i in range(count)
+        ])
+
+    def test_create_rental_query_count_independent_of_cart_size(self):
+        """Test that a large cart costs the same number of queries as a single line."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        due_date = date.today() + timedelta(days=3)
+        items = self._make_items(30)
+
+        def create(cart_items):
+            with CaptureQueriesContext(connection) as ctx:
+                RentalService.create_rental(
+                    store=self.store,
+                    created_by=self.user,
+                    customer_name='John Doe',
+                    due_date=due_date,
+                    items=[
+                        {'item_id': item.id, 'qty': 1, 'per_day': Decimal('2.00')}
+                        for item in cart_items
+                    ]
+                )
+            return len(ctx.captured_queries)
+
+        self.assertEqual(create(items[:1]), create(items))
+        self.assertEqual(RentalItem.objects.count(), 31)
+        self.assertEqual(Item.objects.get(id=items[0].id).quantity, 3)
+        self.assertEqual(Item.objects.get(id=items[-1].id).quantity, 4)
+
+    def test_create_rental_repeated_item_lines(self):
+        """Test that repeated lines for one item are checked against their combined quantity."""
+        due_date = date.today() + timedelta(days=3)
+        line = {'item_id': self.item.id, 'qty': 3, 'per_day': Decimal('2.00')}
+
+        with self.assertRaises(Exception) as context:
+            RentalService.create_rental(
+                store=self.store,
+                created_by=self.user,
+                customer_name='John Doe',
+                due_date=due_date,
+                items=[line, line]
+            )
+        self.assertIn('Insufficient inventory', str(context.exception))
+
+        rental = RentalService.create_rental(
+            store=self.store,
+            created_by=self.user,
+            customer_name='John Doe',
+            due_date=due_date,
+            items=[line, dict(line, qty=2)]
+        )
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 0)
+        self.assertEqual(rental.items.count(), 2)
+        self.assertEqual(self.item.transactions.filter(reason='rental').count(), 2)
+        self.assertEqual(rental.total, Decimal('30.00'))
+
+    def test_create_rental_unknown_item(self):
+        """Test that rental creation fails if any item is missing and changes nothing."""
+        due_date = date.today() + timedelta(days=3)
+
+        with self.assertRaises(Exception) as context:
+            RentalService.create_rental(
+                store=self.store,
+                created_by=self.user,
+                customer_name='John Doe',
+                due_date=due_date,
+                items=[
+                    {'item_id': self.item.id, 'qty': 1, 'per_day': Decimal('2.00')},
+                    {'item_id': 999999, 'qty': 1, 'per_day': Decimal('2.00')},
+                ]
+            )
+
+        self.assertIn('Item 999999 not found', str(context.exception))
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 5)
+        self.assertFalse(Rental.objects.exists())
+
+    def test_create_rental_string_item_ids(self):
+        """Test that item ids given as strings, as JSON clients may send them, are accepted."""
+        rental = RentalService.create_rental(
+            store=self.store,
+            created_by=self.user,
+            customer_name='John Doe',
+            due_date=date.today() + timedelta(days=3),
+            items=[{'item_id': str(self.item.id), 'qty': 2, 'per_day': Decimal('2.00')}]
+        )
+
+        self.assertEqual(rental.items.get().item, self.item)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 3)
+
+        with self.assertRaises(ValidationError) as context:
+            RentalService.create_rental(
+                store=self.store,
+                created_by=self.user,
+                customer_name='John Doe',
+                due_date=date.today() + timedelta(days=3),
+                items=[{'item_id': 'tent', 'qty': 1, 'per_day': Decimal('2.00')}]
+            )
+        self.assertEqual(context.exception.code, 'not_found')
+
+    def test_process_return_query_count_independent_of_lines(self):
+        """Test that returning many lines costs the same number of queries as one."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        due_date = date.today() + timedelta(days=3)
+        items = self._make_items(20)
+
+        def rent_and_return(cart_items):
+            rental = RentalService.create_rental(
+                store=self.store,
+                created_by=self.user,
+                customer_name='John Doe',
+                due_date=due_date,
+                items=[
+                    {'item_id': item.id, 'qty': 2, 'per_day': Decimal('2.00')}
+                    for item in cart_items
+                ]
+            )
+            returned_items = [
+                {'rental_item_id': rental_item.id, 'qty': 1, 'damage_cost': Decimal('1.50')}
+                for rental_item in rental.items.all()
+            ]
+            with CaptureQueriesContext(connection) as ctx:
+                RentalService.process_return(rental_id=rental.id, returned_items=returned_items)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(rent_and_return(items[:1]), rent_and_return(items))
+        self.assertEqual(Item.objects.get(id=items[0].id).quantity, 3)
+        self.assertEqual(Item.objects.get(id=items[-1].id).quantity, 4)
+
+    def test_process_return_all_outstanding(self):
+        """Test that return_all returns every outstanding quantity and completes the rental."""
+        due_date = date.today() + timedelta(days=3)
+        other = self._make_items(1)[0]
+        rental = RentalService.create_rental(
+            store=self.store,
+            created_by=self.user,
+            customer_name='John Doe',
+            due_date=due_date,
+            items=[
+                {'item_id': self.item.id, 'qty': 3, 'per_day': Decimal('2.00')},
+                {'item_id': other.id, 'qty': 2, 'per_day': Decimal('1.00')},
+            ]
+        )
+        first_line = rental.items.get(item=self.item)
+
+        RentalService.process_return(
+            rental_id=rental.id,
+            returned_items=[{
+                'rental_item_id': first_line.id,
+                'qty': 1,
+                'condition': 'damaged',
+                'damage_cost': Decimal('4.00')
+            }],
+            return_all=True,
+            actor=self.user
+        )
+
+        rental.refresh_from_db()
+        self.assertEqual(rental.status, 'returned')
+        self.item.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.item.quantity, 5)
+        self.assertEqual(other.quantity, 5)
+        self.assertEqual(first_line.return_reports.count(), 2)
+        self.assertEqual(
+            self.item.transactions.filter(reason='return', actor=self.user).count(), 2
+        )
+
+        with self.assertRaises(Exception) as context:
+            RentalService.process_return(rental_id=rental.id, return_all=True)
+        self.assertIn('Rental already returned', str(context.exception))
+
+
+class RentalSelectorQueryPlanTestCase(QueryPlanMixin, TestCase):
+    """Store-scoped rental selectors must be served by the composite indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.stores = [Store.objects.create(name=f'Store {i}', slug=f'store-{i}') for i in range(5)]
+        cls.store = cls.stores[0]
+        statuses = [Rental.STATUS_ACTIVE, Rental.STATUS_RETURNED, Rental.STATUS_RETURNED, Rental.STATUS_OVERDUE]
+        Rental.objects.bulk_create([
+            Rental(
+                store=store,
+                customer_name=f'Customer {i}',
+                due_date=date.today() + timedelta(days=i % 14 - 7),
+                status=statuses[i % len(statuses)],
+            )
+            for store in cls.stores
+            for i in range(300)
+        ])
+
+    def test_list_rentals(self):
+        self.assertUsesIndex(selectors.list_rentals(store=self.store), 'rental_store_start_idx')
+
+    def test_list_rentals_by_status(self):
+        qs = selectors.list_rentals(store=self.store, status=Rental.STATUS_OVERDUE)
+        self.assertUsesIndex(qs, 'rental_store_status_idx')
+
+    def test_list_rentals_by_date(self):
+        qs = selectors.list_rentals(store=self.store, date_from=date.today() - timedelta(days=3),
+                                    date_to=date.today().isoformat())
+        self.assertUsesIndex(qs)
+
+    def test_get_rentals_due_today(self):
+        self.assertUsesIndex(selectors.get_rentals_due_today(store=self.store), 'rental_active_due_idx')
+
+    def test_get_active_rentals(self):
+        self.assertUsesIndex(selectors.get_active_rentals(store=self.store))
+
+    def test_get_overdue_rentals(self):
+        self.assertUsesIndex(selectors.get_overdue_rentals(store=self.store), 'rental_store_status_idx')
+
+    def test_overdue_sweep_lookup(self):
+        due = Rental.objects.filter(
+            store_id__in=[store.id for store in self.stores], status=Rental.STATUS_ACTIVE, due_date__lt=date.today(),
+        ).values('id')[:100]
+        self.assertUsesIndex(due, 'rental_active_due_idx')
+
+
+class AvailabilityIndexTestCase(TestCase):
+    def setUp(self):
+        self.index = AvailabilityIndex(
+            capacity={1: 5, 2: 3},
+            intervals={1: [
+                (date(2025, 6, 1), date(2025, 6, 3), 2),
+                (date(2025, 6, 3), date(2025, 6, 5), 2),
+                (date(2025, 6, 6), date(2025, 6, 8), 4),
+            ]},
+        )
+
+    def test_peak_over_range(self):
+        self.assertEqual(self.index.available(1, date(2025, 6, 1), date(2025, 6, 2)), 3)
+        self.assertEqual(self.index.available(1, date(2025, 6, 3), date(2025, 6, 3)), 1)
+        self.assertEqual(self.index.available(1, date(2025, 6, 4), date(2025, 6, 5)), 3)
+        self.assertEqual(self.index.available(1, date(2025, 6, 5), date(2025, 6, 6)), 1)
+        self.assertEqual(self.index.available(1, date(2025, 6, 9), date(2025, 6, 30)), 5)
+
+    def test_items_without_rentals(self):
+        self.assertEqual(self.index.available(2, date(2025, 6, 1), date(2025, 6, 30)), 3)
+        self.assertEqual(self.index.available(99, date(2025, 6, 1), date(2025, 6, 30)), 0)
+        self.assertEqual(
+            self.index.available_all(date(2025, 6, 3), date(2025, 6, 3)), {1: 1, 2: 3}
+        )
+
+
+class ReservationTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.store = Store.objects.create(name='Test Store', slug='test-store')
+        self.item = InventoryService.create_item(
+            store=self.store, name='Tent', sku='TENT', price=Decimal('10.00'), quantity=5
+        )
+        self.today = date.today()
+
+    def rent(self, qty, start_offset, due_offset):
+        return RentalService.create_rental(
+            store=self.store,
+            created_by=self.user,
+            customer_name='John Doe',
+            start_date=self.today + timedelta(days=start_offset) if start_offset else None,
+            due_date=self.today + timedelta(days=due_offset),
+            items=[{'item_id': self.item.id, 'qty': qty, 'per_day': Decimal('2.00')}],
+        )
+
+    def available(self, start_offset, end_offset):
+        index = AvailabilityIndex.for_store(self.store)
+        return index.available(
+            self.item.id, self.today + timedelta(days=start_offset), self.today + timedelta(days=end_offset)
+        )
+
+    def test_reservation_holds_period_without_taking_stock(self):
+        rental = self.rent(4, 10, 13)
+        self.assertEqual(rental.status, Rental.STATUS_RESERVED)
+        self.assertEqual(rental.total, Decimal('24.00'))
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 5)
+        self.assertFalse(self.item.transactions.filter(reason='rental').exists())
+
+        self.assertEqual(self.available(0, 9), 5)
+        self.assertEqual(self.available(11, 12), 1)
+
+        # A walk-in rental overlapping the reservation is limited by it
+        with self.assertRaises(Exception) as context:
+            self.rent(2, 0, 11)
+        self.assertIn('Insufficient availability', str(context.exception))
+        self.rent(2, 0, 9)
+        self.assertEqual(self.available(0, 3), 3)
+        self.assertEqual(self.available(0, 10), 1)
+
+    def test_start_and_return_reservation(self):
+        rental = self.rent(2, 5, 8)
+        with self.assertRaises(Exception) as context:
+            RentalService.process_return(rental_id=rental.id, return_all=True)
+        self.assertIn('has not started', str(context.exception))
+
+        RentalService.start_rental(rental_id=rental.id, actor=self.user)
+        rental.refresh_from_db()
+        self.assertEqual(rental.status, Rental.STATUS_ACTIVE)
+        self.assertEqual(rental.starts_on, self.today)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 3)
+        self.assertEqual(self.available(0, 8), 3)
+
+        RentalService.process_return(rental_id=rental.id, return_all=True)
+        self.assertEqual(self.available(0, 8), 5)
+
+    def test_cancel_releases_period(self):
+        rental = self.rent(4, 2, 5)
+        self.assertEqual(self.available(2, 5), 1)
+        RentalService.cancel_reservation(rental_id=rental.id, actor=self.user)
+        rental.refresh_from_db()
+        self.assertEqual(rental.status, Rental.STATUS_CANCELLED)
+        self.assertEqual(self.available(2, 5), 5)
+
+        for rental_id in (rental.id, self.rent(1, 0, 3).id):
+            with self.assertRaises(ValidationError) as context:
+                RentalService.cancel_reservation(rental_id=rental_id)
+            self.assertEqual(context.exception.code, 'not_reserved')
+        with self.assertRaises(ValidationError) as context:
+            RentalService.start_rental(rental_id=rental.id)
+        self.assertEqual(context.exception.code, 'not_reserved')
+
+    def test_cancelled_reservation_cannot_be_returned(self):
+        rental = self.rent(3, 2, 5)
+        RentalService.cancel_reservation(rental_id=rental.id, actor=self.user)
+        with self.assertRaises(ValidationError) as context:
+            RentalService.process_return(rental_id=rental.id, return_all=True)
+        self.assertEqual(context.exception.code, 'cancelled')
+        rental.refresh_from_db()
+        self.assertEqual(rental.status, Rental.STATUS_CANCELLED)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 5)
+        self.assertFalse(self.item.transactions.filter(reason='return').exists())
+
+    def test_reservation_not_started_in_time_lapses(self):
+        rental = self.rent(4, 2, 5)
+        index = AvailabilityIndex.for_store(self.store, today=self.today + timedelta(days=3))
+        self.assertEqual(index.available(self.item.id, self.today + timedelta(days=3), self.today + timedelta(days=5)), 1)
+        index = AvailabilityIndex.for_store(self.store, today=self.today + timedelta(days=4))
+        self.assertEqual(index.available(self.item.id, self.today + timedelta(days=4), self.today + timedelta(days=5)), 5)
+
+        # Two days past its first day, with the default hold of one day
+        Rental.objects.filter(id=rental.id).update(starts_on=self.today - timedelta(days=2))
+        self.assertEqual(self.available(0, 3), 5)
+        self.rent(5, 0, 3)
+        with self.assertRaises(ValidationError) as context:
+            RentalService.start_rental(rental_id=rental.id)
+        self.assertEqual(context.exception.code, 'lapsed')
+        with self.settings(RESERVATION_HOLD_DAYS=2):
+            self.assertEqual(self.available(0, 3), 0)
+
+    def test_start_date_validation(self):
+        with self.assertRaises(Exception) as context:
+            self.rent(1, -1, 3)
+        self.assertIn('Start date cannot be in the past', str(context.exception))
+        with self.assertRaises(Exception) as context:
+            self.rent(1, 5, 5)
+        self.assertIn('Due date must be after the start date', str(context.exception))
+
+
+class OverdueSweepTestCase(TestCase):
+    def setUp(self):
+        # 03:00 UTC on June 10 is still June 9 in Los Angeles
+        self.now = datetime(2025, 6, 10, 3, 0, tzinfo=ZoneInfo('UTC'))
+        self.utc_store = Store.objects.create(name='London', slug='london')
+        self.la_store = Store.objects.create(name='Los Angeles', slug='los-angeles', timezone='America/Los_Angeles')
+        self.rentals = {}
+        for store in (self.utc_store, self.la_store):
+            for name, due, status in [
+                ('due yesterday', date(2025, 6, 9), Rental.STATUS_ACTIVE),
+                ('due last week', date(2025, 6, 3), Rental.STATUS_ACTIVE),
+                ('due today', date(2025, 6, 10), Rental.STATUS_ACTIVE),
+                ('returned late', date(2025, 6, 1), Rental.STATUS_RETURNED),
+                ('reserved', date(2025, 6, 1), Rental.STATUS_RESERVED),
+            ]:
+                self.rentals[store.slug, name] = Rental.objects.create(
+                    store=store, customer_name=name, due_date=due, status=status,
+                )
+
+    def status(self, store, name):
+        return Rental.objects.get(pk=self.rentals[store.slug, name].pk).status
+
+    def test_sweep_uses_store_timezone(self):
+        sweep = RentalService.mark_overdue(chunk_size=1, now=self.now)
+        self.assertEqual((sweep.rentals_marked, sweep.chunks), (3, 3))
+        self.assertEqual(self.status(self.utc_store, 'due yesterday'), Rental.STATUS_OVERDUE)
+        self.assertEqual(self.status(self.utc_store, 'due last week'), Rental.STATUS_OVERDUE)
+        self.assertEqual(self.status(self.utc_store, 'due today'), Rental.STATUS_ACTIVE)
+        self.assertEqual(self.status(self.la_store, 'due yesterday'), Rental.STATUS_ACTIVE)
+        self.assertEqual(self.status(self.la_store, 'due last week'), Rental.STATUS_OVERDUE)
+        self.assertEqual(self.status(self.utc_store, 'returned late'), Rental.STATUS_RETURNED)
+        self.assertEqual(self.status(self.utc_store, 'reserved'), Rental.STATUS_RESERVED)
+        self.assertEqual(
+            list(selectors.get_overdue_rentals(store=self.la_store)), [self.rentals['los-angeles', 'due last week']]
+        )
+
+    def test_sweep_is_idempotent_and_recorded(self):
+        RentalService.mark_overdue(now=self.now)
+        with self.assertNumQueries(4):
+            # Store lookup, one empty UPDATE per timezone, the sweep record
+            sweep = RentalService.mark_overdue(now=self.now)
+        self.assertEqual(sweep.rentals_marked, 0)
+        self.assertEqual(OverdueSweep.objects.count(), 2)
+        self.assertGreaterEqual(sweep.duration_ms, 0)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('sweep_overdue', stdout=out)
+        self.assertIn('Marked 6 rentals overdue', out.getvalue())
+
+    def test_chunk_size_must_be_positive(self):
+        for chunk_size in (0, -1):
+            with self.assertRaises(ValueError):
+                RentalService.mark_overdue(chunk_size=chunk_size, now=self.now)
+            with self.assertRaises(CommandError):
+                call_command('sweep_overdue', '--chunk-size', str(chunk_size), stdout=StringIO())
+            with self.assertRaises(CommandError):
+                call_command('sweep_overdue', chunk_size=chunk_size, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('sweep_overdue', '--interval', '0', stdout=StringIO())
+        self.assertFalse(OverdueSweep.objects.exists())
+        self.assertEqual(self.status(self.utc_store, 'due yesterday'), Rental.STATUS_ACTIVE)
+
+    def test_command_interval_runs_the_sweeper(self):
+        from rentals.scheduler import OverdueSweeper
+        out = StringIO()
+        with mock.patch.object(OverdueSweeper, 'run', autospec=True) as run:
+            call_command('sweep_overdue', '--interval', '30', '--chunk-size', '100', stdout=out)
+        sweeper, = run.call_args.args
+        self.assertEqual((sweeper.interval, sweeper.chunk_size), (30, 100))
+        self.assertIn('every 30 seconds', out.getvalue())
+
+    def test_scheduler(self):
+        from rentals import scheduler
+        with mock.patch.object(RentalService, 'mark_overdue') as mark_overdue:
+            sweeper = scheduler.start(interval=0.01)
+            self.assertIs(scheduler.start(interval=0.01), sweeper)
+            for _ in range(200):
+                if mark_overdue.call_count >= 2:
+                    break
+                sweeper._stopped.wait(0.01)
+            scheduler.stop()
+            sweeper.join(timeout=1)
+        self.assertGreaterEqual(mark_overdue.call_count, 2)
+        self.assertFalse(sweeper.is_alive())
+
+
+class SQLiteProfileTestCase(SimpleTestCase):
+    """Every new connection to the database file gets the production pragmas and BEGIN IMMEDIATE."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = str(Path(tmp.name) / 'profile.sqlite3')
+
+    def connect(self, **options):
+        settings_dict = {**connection.settings_dict, 'NAME': self.path, 'OPTIONS': sqlite_options(**options)}
+        wrapper = DatabaseWrapper(settings_dict, alias='profile')
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_pragmas(self):
+        pragmas = read_pragmas(self.connect())
+        self.assertEqual(pragmas['journal_mode'], 'wal')
+        # synchronous=NORMAL and temp_store=MEMORY read back as numbers
+        self.assertEqual(pragmas['synchronous'], 1)
+        self.assertEqual(pragmas['temp_store'], 2)
+        for name in ('busy_timeout', 'cache_size', 'mmap_size', 'journal_size_limit'):
+            self.assertEqual(pragmas[name], SQLITE_PRAGMAS[name], name)
+
+    def test_transactions_take_the_write_lock_at_begin(self):
+        first = self.connect()
+        second = self.connect(pragmas={'busy_timeout': 0})
+        self.assertEqual(first.transaction_mode, 'IMMEDIATE')
+        first._start_transaction_under_autocommit()
+        with self.assertRaisesMessage(OperationalError, 'database is locked'):
+            second._start_transaction_under_autocommit()
+        first.connection.rollback()
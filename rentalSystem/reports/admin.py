@@ -1,3 +1,20 @@
 from django.contrib import admin
+from .models import DailyItemStats, DailyStoreStats, RollupWatermark
 
-# Register your models here.
+
+@admin.register(DailyStoreStats)
+class DailyStoreStatsAdmin(admin.ModelAdmin):
+    list_display = ('id', 'store', 'day', 'rentals', 'revenue', 'units_out', 'units_returned', 'damage_cost', 'stock_delta')
+    list_filter = ('store', 'day')
+
+
+@admin.register(DailyItemStats)
+class DailyItemStatsAdmin(admin.ModelAdmin):
+    list_display = ('id', 'store', 'item', 'day', 'revenue', 'units_out', 'units_returned', 'damage_cost', 'stock_delta')
+    search_fields = ('item__name', 'item__sku')
+    list_filter = ('store', 'day')
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('source', 'last_id', 'updated_at')
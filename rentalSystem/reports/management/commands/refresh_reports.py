@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from reports.services import ReportsService
+
+
+class Command(BaseCommand):
+    help = "Fold rentals, returns and ledger entries recorded since the last run into the daily report stats."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help="Drop the stats and recompute them from scratch")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            folded = ReportsService.rebuild(chunk_size=options['chunk_size'])
+        else:
+            folded = ReportsService.refresh(chunk_size=options['chunk_size'])
+        summary = ', '.join(f"{count} {source}" for source, count in folded.items())
+        self.stdout.write(self.style.SUCCESS(f"Folded {summary}"))
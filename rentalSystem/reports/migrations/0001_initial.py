@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('inventory', '0005_stock_checkpoints'),
+        ('stores', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('ledger', 'Inventory transactions'), ('rentals', 'Rentals'), ('returns', 'Return reports')], max_length=16, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyItemStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text="Day in the store's timezone")),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('units_out', models.IntegerField(default=0)),
+                ('units_returned', models.IntegerField(default=0)),
+                ('damage_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('stock_delta', models.IntegerField(default=0)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='inventory.item')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_item_stats', to='stores.store')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily item stats',
+                'indexes': [models.Index(fields=['store', 'day'], name='itemstats_store_day_idx')],
+                'unique_together': {('item', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyStoreStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text="Day in the store's timezone")),
+                ('rentals', models.IntegerField(default=0, help_text='Rentals created')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, help_text='Sum of Rental.total', max_digits=14)),
+                ('units_out', models.IntegerField(default=0, help_text='Units taken out on rentals')),
+                ('units_returned', models.IntegerField(default=0)),
+                ('damage_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('stock_delta', models.IntegerField(default=0, help_text='Net stock movement of every ledger entry')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='stores.store')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily store stats',
+                'unique_together': {('store', 'day')},
+            },
+        ),
+    ]
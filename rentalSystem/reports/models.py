@@ -1,3 +1,66 @@
 from django.db import models
 
-# Create your models here.
+
+class DailyStoreStats(models.Model):
+    """
+    Per-store facts for one local day, rolled up from rentals, returns and the ledger.
+    
+    Maintained by ``ReportsService.refresh``; never written by hand.
+    """
+    store = models.ForeignKey('stores.Store', on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField(help_text="Day in the store's timezone")
+    rentals = models.IntegerField(default=0, help_text='Rentals created')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text='Sum of Rental.total')
+    units_out = models.IntegerField(default=0, help_text='Units taken out on rentals')
+    units_returned = models.IntegerField(default=0)
+    damage_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    stock_delta = models.IntegerField(default=0, help_text='Net stock movement of every ledger entry')
+
+    class Meta:
+        unique_together = [('store', 'day')]
+        verbose_name_plural = 'Daily store stats'
+
+    def __str__(self) -> str:
+        return f"{self.store.name} {self.day}"
+
+
+class DailyItemStats(models.Model):
+    """Per-item counterpart of ``DailyStoreStats``; revenue is the item's share of its rental lines."""
+    store = models.ForeignKey('stores.Store', on_delete=models.CASCADE, related_name='daily_item_stats')
+    item = models.ForeignKey('inventory.Item', on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField(help_text="Day in the store's timezone")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units_out = models.IntegerField(default=0)
+    units_returned = models.IntegerField(default=0)
+    damage_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    stock_delta = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = [('item', 'day')]
+        indexes = [
+            models.Index(fields=['store', 'day'], name='itemstats_store_day_idx'),
+        ]
+        verbose_name_plural = 'Daily item stats'
+
+    def __str__(self) -> str:
+        return f"{self.item.name} {self.day}"
+
+
+class RollupWatermark(models.Model):
+    """Highest source row id already folded into the daily stats, per source table."""
+    SOURCE_LEDGER = 'ledger'
+    SOURCE_RENTALS = 'rentals'
+    SOURCE_RETURNS = 'returns'
+
+    SOURCE_CHOICES = [
+        (SOURCE_LEDGER, 'Inventory transactions'),
+        (SOURCE_RENTALS, 'Rentals'),
+        (SOURCE_RETURNS, 'Return reports'),
+    ]
+
+    source = models.CharField(max_length=16, choices=SOURCE_CHOICES, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.source} @ {self.last_id}"
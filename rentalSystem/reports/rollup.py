@@ -0,0 +1,240 @@
+"""
+Incremental daily rollups of rentals, returns and the inventory ledger.
+
+Each source table is folded into ``DailyStoreStats`` and ``DailyItemStats``
+in id order, ``chunk_size`` rows per transaction. ``RollupWatermark`` holds
+the last id folded in per source and moves in the same transaction as the
+stats it produced, so a refresh can stop or crash at any point and the
+next one carries on without counting a row twice.
+
+Days are local to the store's ``timezone``. Stats rows are upserted with
+``ON CONFLICT ... DO UPDATE SET x = x + excluded.x`` (SQLite 3.24+ and
+PostgreSQL), one statement run per chunk.
+
+Rows are assumed to commit in id order, which holds on SQLite where writers
+are serialised. Cancelled rentals are never counted: they are skipped when
+folded, and retracted if cancelled after being folded. Other deleted or
+edited source rows are not reflected until a rebuild.
+"""
+from collections import defaultdict
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import DailyItemStats, DailyStoreStats, RollupWatermark
+
+STORE_FIELDS = ('rentals', 'revenue', 'units_out', 'units_returned', 'damage_cost', 'stock_delta')
+ITEM_FIELDS = ('revenue', 'units_out', 'units_returned', 'damage_cost', 'stock_delta')
+
+CENT = Decimal('0.01')
+
+
+class Rollup:
+    """In-memory stats deltas for one chunk of source rows."""
+
+    def __init__(self):
+        self.stores = defaultdict(lambda: dict.fromkeys(STORE_FIELDS, 0))
+        self.items = defaultdict(lambda: dict.fromkeys(ITEM_FIELDS, 0))
+        self._zones = {}
+
+    def load_zones(self, store_ids):
+        from stores.models import Store
+
+        missing = set(store_ids) - self._zones.keys()
+        for store_id, name in Store.objects.filter(id__in=missing).values_list('id', 'timezone'):
+            try:
+                self._zones[store_id] = ZoneInfo(name)
+            except (ZoneInfoNotFoundError, ValueError):
+                self._zones[store_id] = dt_timezone.utc
+
+    def day(self, store_id, moment):
+        return moment.astimezone(self._zones.get(store_id, dt_timezone.utc)).date()
+
+    def add(self, *, store_id, item_id, day, **facts):
+        store_row = self.stores[(store_id, day)]
+        for name, value in facts.items():
+            store_row[name] += value
+        if item_id is not None:
+            item_row = self.items[(store_id, item_id, day)]
+            for name, value in facts.items():
+                if name in ITEM_FIELDS:
+                    item_row[name] += value
+
+    def write(self, using: str = 'default'):
+        _upsert(DailyStoreStats, ('store', 'day'), STORE_FIELDS, [
+            (store_id, day, *(facts[name] for name in STORE_FIELDS))
+            for (store_id, day), facts in self.stores.items()
+        ], using=using)
+        _upsert(DailyItemStats, ('store', 'item', 'day'), ITEM_FIELDS, [
+            (store_id, item_id, day, *(facts[name] for name in ITEM_FIELDS))
+            for (store_id, item_id, day), facts in self.items.items()
+        ], using=using)
+
+
+def _upsert(model, key_names, field_names, rows, using):
+    """Insert rows, or add their values to the existing row with the same key."""
+    if not rows:
+        return
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    fields = [model._meta.get_field(name) for name in (*key_names, *field_names)]
+    conflict = model._meta.unique_together[0]
+    conflict_columns = ', '.join(quote(model._meta.get_field(name).column) for name in conflict)
+    increments = ', '.join(
+        f'{quote(name)} = {table}.{quote(name)} + excluded.{quote(name)}' for name in field_names
+    )
+    sql = (
+        f"INSERT INTO {table} ({', '.join(quote(field.column) for field in fields)}) "
+        f"VALUES ({', '.join(['%s'] * len(fields))}) "
+        f"ON CONFLICT ({conflict_columns}) DO UPDATE SET {increments}"
+    )
+    params = [
+        [field.get_db_prep_save(value, connection) for field, value in zip(fields, row)]
+        for row in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def fold_ledger(rollup, after: int, limit: int, using: str = 'default'):
+    from inventory.models import InventoryTransaction
+
+    rows = list(
+        InventoryTransaction.objects.using(using).filter(id__gt=after, item__store__isnull=False)
+        .order_by('id')
+        .values_list('id', 'item_id', 'item__store_id', 'delta', 'reason', 'created_at')[:limit]
+    )
+    rollup.load_zones({row[2] for row in rows})
+    for _, item_id, store_id, delta, reason, created_at in rows:
+        facts = {'stock_delta': delta}
+        if reason == InventoryTransaction.REASON_RENTAL:
+            facts['units_out'] = -delta
+        elif reason == InventoryTransaction.REASON_RETURN:
+            facts['units_returned'] = delta
+        rollup.add(store_id=store_id, item_id=item_id, day=rollup.day(store_id, created_at), **facts)
+    return rows[-1][0] if rows else None, len(rows)
+
+
+def fold_rentals(rollup, after: int, limit: int, using: str = 'default'):
+    """
+    Rental counts and revenue on the day each rental was booked, split over items by line value.
+
+    The day is the local date of ``start_date``, the booking time, for
+    reservations too: it never changes, so a rebuild lands every rental on
+    the day an incremental refresh did. Cancelled rentals are skipped; one
+    cancelled after it was folded is taken back out by ``retract_rental``.
+    """
+    from rentals.models import Rental
+
+    rentals = list(
+        Rental.objects.using(using).filter(id__gt=after, store__isnull=False)
+        .exclude(status=Rental.STATUS_CANCELLED)
+        .order_by('id')
+        .values_list('id', 'store_id', 'start_date', 'total')[:limit]
+    )
+    _add_rentals(rollup, rentals, sign=1, using=using)
+    return rentals[-1][0] if rentals else None, len(rentals)
+
+
+def _add_rentals(rollup, rentals, sign: int, using: str):
+    from rentals.models import RentalItem
+
+    lines = defaultdict(list)
+    line_rows = RentalItem.objects.using(using).filter(rental_id__in=[row[0] for row in rentals]).order_by('id')
+    for rental_id, item_id, qty, per_day in line_rows.values_list('rental_id', 'item_id', 'qty', 'per_day'):
+        lines[rental_id].append((item_id, qty * per_day))
+
+    rollup.load_zones({row[1] for row in rentals})
+    for rental_id, store_id, start_date, total in rentals:
+        day = rollup.day(store_id, start_date)
+        total = total or Decimal('0')
+        rollup.add(store_id=store_id, item_id=None, day=day, rentals=sign, revenue=sign * total)
+        weight = sum(value for _, value in lines[rental_id])
+        for item_id, value in lines[rental_id]:
+            share = (total * value / weight).quantize(CENT) if weight else Decimal('0')
+            rollup.items[(store_id, item_id, day)]['revenue'] += sign * share
+
+
+def retract_rental(rental, using: str = 'default'):
+    """
+    Take a cancelled rental back out of the stats, if a refresh already folded it in.
+
+    Runs in the cancelling transaction. The watermark is locked, so a
+    concurrent refresh either folded the rental before (and it is retracted
+    here) or runs after and skips it as cancelled.
+    """
+    if rental.store_id is None:
+        return
+    with transaction.atomic(using=using):
+        watermark = RollupWatermark.objects.using(using).select_for_update().filter(
+            source=RollupWatermark.SOURCE_RENTALS,
+        ).first()
+        if watermark is None or rental.id > watermark.last_id:
+            return
+        rollup = Rollup()
+        _add_rentals(rollup, [(rental.id, rental.store_id, rental.start_date, rental.total)], sign=-1, using=using)
+        rollup.write(using=using)
+
+
+def fold_returns(rollup, after: int, limit: int, using: str = 'default'):
+    from rentals.models import ReturnReport
+
+    rows = list(
+        ReturnReport.objects.using(using).filter(id__gt=after, rental_item__rental__store__isnull=False)
+        .order_by('id')
+        .values_list('id', 'rental_item__item_id', 'rental_item__rental__store_id', 'returned_at', 'damage_cost')[:limit]
+    )
+    rollup.load_zones({row[2] for row in rows})
+    for _, item_id, store_id, returned_at, damage_cost in rows:
+        rollup.add(
+            store_id=store_id, item_id=item_id, day=rollup.day(store_id, returned_at), damage_cost=damage_cost,
+        )
+    return rows[-1][0] if rows else None, len(rows)
+
+
+SOURCES = {
+    RollupWatermark.SOURCE_LEDGER: fold_ledger,
+    RollupWatermark.SOURCE_RENTALS: fold_rentals,
+    RollupWatermark.SOURCE_RETURNS: fold_returns,
+}
+
+
+def _claim(source, using):
+    """The source's watermark, locked; the UPDATE takes the write lock first on SQLite too."""
+    claimed = RollupWatermark.objects.using(using).filter(source=source).update(updated_at=timezone.now())
+    if not claimed:
+        RollupWatermark.objects.using(using).create(source=source)
+    return RollupWatermark.objects.using(using).select_for_update().get(source=source)
+
+
+def refresh(*, chunk_size: int = 5000, using: str = 'default') -> dict:
+    """Fold every source row past its watermark into the stats; returns rows folded per source."""
+    folded = {}
+    for source, fold in SOURCES.items():
+        folded[source] = 0
+        while True:
+            with transaction.atomic(using=using):
+                watermark = _claim(source, using)
+                rollup = Rollup()
+                last_id, count = fold(rollup, watermark.last_id, chunk_size, using=using)
+                if last_id is None:
+                    break
+                rollup.write(using=using)
+                watermark.last_id = last_id
+                watermark.save(update_fields=['last_id', 'updated_at'])
+            folded[source] += count
+            if count < chunk_size:
+                break
+    return folded
+
+
+@transaction.atomic
+def reset():
+    """Drop all stats and watermarks, so the next refresh recomputes everything."""
+    DailyStoreStats.objects.all().delete()
+    DailyItemStats.objects.all().delete()
+    RollupWatermark.objects.all().delete()
@@ -1,3 +1,61 @@
+from datetime import timedelta
+
+from django.db.models import Sum
+
+
 class ReportsSelectors:
-    """Read-only query helpers for reports."""
-    pass
+    """Read-only query helpers for reports. They read the daily stats only, never the source tables."""
+
+    @staticmethod
+    def daily_store_stats(*, store, start, end) -> list:
+        """
+        One dict per day in [start, end], days without activity included as zeros.
+        """
+        from .models import DailyStoreStats
+        from .rollup import STORE_FIELDS
+
+        rows = {
+            row['day']: row
+            for row in DailyStoreStats.objects.filter(store=store, day__gte=start, day__lte=end)
+            .values('day', *STORE_FIELDS)
+        }
+        days = []
+        day = start
+        while day <= end:
+            days.append(rows.get(day) or {'day': day, **dict.fromkeys(STORE_FIELDS, 0)})
+            day += timedelta(days=1)
+        return days
+
+    @staticmethod
+    def store_totals(*, store, start, end) -> dict:
+        from .models import DailyStoreStats
+        from .rollup import STORE_FIELDS
+
+        totals = DailyStoreStats.objects.filter(store=store, day__gte=start, day__lte=end).aggregate(
+            **{name: Sum(name) for name in STORE_FIELDS}
+        )
+        return {name: value or 0 for name, value in totals.items()}
+
+    @staticmethod
+    def item_totals(*, store, start, end, item_id=None, limit=None) -> list:
+        """Per-item sums over [start, end], highest revenue first."""
+        from .models import DailyItemStats
+        from .rollup import ITEM_FIELDS
+
+        qs = DailyItemStats.objects.filter(store=store, day__gte=start, day__lte=end)
+        if item_id is not None:
+            qs = qs.filter(item_id=item_id)
+        qs = qs.values('item_id', 'item__sku', 'item__name').annotate(
+            **{f'total_{name}': Sum(name) for name in ITEM_FIELDS}
+        ).order_by('-total_revenue', 'item_id')
+        if limit:
+            qs = qs[:limit]
+        return [
+            {
+                'item_id': row['item_id'],
+                'sku': row['item__sku'],
+                'name': row['item__name'],
+                **{name: row[f'total_{name}'] for name in ITEM_FIELDS},
+            }
+            for row in qs
+        ]
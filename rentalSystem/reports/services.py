@@ -1,3 +1,44 @@
+from django.conf import settings
+from django.db import transaction
+
+from . import rollup
+
+
 class ReportsService:
     """Business actions for reports."""
-    pass
+
+    @staticmethod
+    def refresh(*, chunk_size: int = 5000) -> dict:
+        """
+        Fold new rentals, returns and ledger entries into the daily stats.
+        
+        Idempotent: each source is read past its high-water mark only.
+        
+        Returns:
+            Dict of source -> rows folded in.
+        """
+        return rollup.refresh(chunk_size=chunk_size)
+
+    @staticmethod
+    def rebuild(*, chunk_size: int = 5000) -> dict:
+        """Recompute all daily stats from the source tables."""
+        rollup.reset()
+        return rollup.refresh(chunk_size=chunk_size)
+
+    @staticmethod
+    def retract_rental(*, rental):
+        """Remove a cancelled rental from the daily stats it was already folded into."""
+        rollup.retract_rental(rental)
+
+    @staticmethod
+    def refresh_on_commit():
+        """
+        Refresh the stats once the current transaction commits.
+        
+        Services call this after writing source rows. Only with
+        ``REPORTS_REFRESH_ON_COMMIT = True``: a refresh takes the write lock
+        once per source, so by default ``manage.py refresh_reports`` does it.
+        A failed refresh is logged and left to the next one.
+        """
+        if getattr(settings, 'REPORTS_REFRESH_ON_COMMIT', False):
+            transaction.on_commit(ReportsService.refresh, robust=True)
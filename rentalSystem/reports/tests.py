@@ -1,3 +1,138 @@
-from django.test import TestCase
+from datetime import datetime, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from inventory.models import InventoryTransaction
+from inventory.services import InventoryService
+from rentals.services import RentalService
+from reports.models import DailyItemStats, DailyStoreStats, RollupWatermark
+from reports.selectors import ReportsSelectors
+from reports.services import ReportsService
+from stores.models import Store
+
+
+class DailyRollupTestCase(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='Test Store', slug='test-store', timezone='America/New_York')
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.tent = InventoryService.create_item(
+            store=self.store, name='Tent', sku='TENT', price=Decimal('50.00'), quantity=10,
+        )
+        self.stove = InventoryService.create_item(
+            store=self.store, name='Stove', sku='STOVE', price=Decimal('20.00'), quantity=4,
+        )
+        self.rental = RentalService.create_rental(
+            store=self.store,
+            created_by=self.user,
+            customer_name='John Doe',
+            due_date=timezone.localdate() + timedelta(days=2),
+            items=[
+                {'item_id': self.tent.id, 'qty': 2, 'per_day': Decimal('3.00')},
+                {'item_id': self.stove.id, 'qty': 1, 'per_day': Decimal('4.00')},
+            ],
+        )
+        line = self.rental.items.get(item=self.tent)
+        RentalService.process_return(rental_id=self.rental.id, returned_items=[
+            {'rental_item_id': line.id, 'qty': 1, 'condition': 'damaged', 'damage_cost': Decimal('7.50')},
+        ])
+        self.today = timezone.now().astimezone(ZoneInfo('America/New_York')).date()
+
+    def snapshot(self):
+        return (
+            sorted(DailyStoreStats.objects.values_list('store_id', 'day', 'rentals', 'revenue', 'units_out',
+                                                       'units_returned', 'damage_cost', 'stock_delta')),
+            sorted(DailyItemStats.objects.values_list('item_id', 'day', 'revenue', 'units_out',
+                                                      'units_returned', 'damage_cost', 'stock_delta')),
+        )
+
+    def test_refresh(self):
+        folded = ReportsService.refresh()
+        self.assertEqual(folded, {'ledger': 5, 'rentals': 1, 'returns': 1})
+        self.assertEqual(self.snapshot(), (
+            [(self.store.id, self.today, 1, Decimal('20.00'), 3, 1, Decimal('7.50'), 12)],
+            sorted([
+                (self.tent.id, self.today, Decimal('12.00'), 2, 1, Decimal('7.50'), 9),
+                (self.stove.id, self.today, Decimal('8.00'), 1, 0, Decimal('0.00'), 3),
+            ]),
+        ))
+
+    def test_refresh_is_idempotent_and_incremental(self):
+        ReportsService.refresh(chunk_size=2)
+        expected = self.snapshot()
+        self.assertEqual(ReportsService.refresh(), {'ledger': 0, 'rentals': 0, 'returns': 0})
+        self.assertEqual(self.snapshot(), expected)
+
+        InventoryService.adjust_stock(item=self.tent, delta=-1, reason=InventoryService.REASON_SALE)
+        self.assertEqual(ReportsService.refresh()['ledger'], 1)
+        self.assertEqual(DailyStoreStats.objects.get().stock_delta, 11)
+        self.assertEqual(
+            RollupWatermark.objects.get(source='ledger').last_id,
+            InventoryTransaction.objects.latest('id').id,
+        )
+        incremental = self.snapshot()
+        ReportsService.rebuild()
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_cancelled_reservations_are_not_counted(self):
+        def reserve():
+            start = timezone.localdate() + timedelta(days=5)
+            return RentalService.create_rental(
+                store=self.store, created_by=self.user, customer_name='Jane Doe', start_date=start,
+                due_date=start + timedelta(days=2),
+                items=[{'item_id': self.tent.id, 'qty': 1, 'per_day': Decimal('10.00')}],
+            )
+
+        ReportsService.refresh()
+        expected = self.snapshot()
+
+        # Folded in, then cancelled: taken back out of the day it was booked
+        folded = reserve()
+        ReportsService.refresh()
+        self.assertEqual(DailyStoreStats.objects.get().revenue, Decimal('40.00'))
+        self.assertEqual(DailyItemStats.objects.get(item=self.tent).revenue, Decimal('32.00'))
+        RentalService.cancel_reservation(rental_id=folded.id)
+        self.assertEqual(self.snapshot(), expected)
+
+        # Cancelled before any refresh saw it: never folded in
+        RentalService.cancel_reservation(rental_id=reserve().id)
+        self.assertEqual(ReportsService.refresh()['rentals'], 0)
+        self.assertEqual(self.snapshot(), expected)
+
+        ReportsService.rebuild()
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_services_refresh_on_commit_only_when_enabled(self):
+        ReportsService.refresh()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            InventoryService.adjust_stock(item=self.stove, delta=2, reason=InventoryService.REASON_ADJUSTMENT)
+        self.assertNotIn(ReportsService.refresh, callbacks)
+        self.assertEqual(DailyItemStats.objects.get(item=self.stove).stock_delta, 3)
+
+        with override_settings(REPORTS_REFRESH_ON_COMMIT=True):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                InventoryService.adjust_stock(item=self.stove, delta=2, reason=InventoryService.REASON_ADJUSTMENT)
+        self.assertIn(ReportsService.refresh, callbacks)
+        self.assertEqual(DailyItemStats.objects.get(item=self.stove).stock_delta, 7)
+
+    def test_days_are_local_to_the_store(self):
+        late_evening = timezone.make_aware(datetime(2025, 3, 1, 23, 30), ZoneInfo('America/New_York'))
+        InventoryTransaction.objects.filter(item=self.stove).update(created_at=late_evening)
+        ReportsService.refresh()
+        self.assertEqual(DailyItemStats.objects.get(item=self.stove, stock_delta=3).day.isoformat(), '2025-03-01')
+
+    def test_selectors_read_rollups(self):
+        ReportsService.refresh()
+        days = ReportsSelectors.daily_store_stats(
+            store=self.store, start=self.today - timedelta(days=1), end=self.today,
+        )
+        self.assertEqual([day['rentals'] for day in days], [0, 1])
+        totals = ReportsSelectors.store_totals(store=self.store, start=self.today, end=self.today)
+        self.assertEqual(totals['revenue'], Decimal('20.00'))
+        items = ReportsSelectors.item_totals(store=self.store, start=self.today, end=self.today)
+        self.assertEqual([item['sku'] for item in items], ['TENT', 'STOVE'])
+        with self.assertNumQueries(1):
+            ReportsSelectors.daily_store_stats(store=self.store, start=self.today - timedelta(days=365), end=self.today)
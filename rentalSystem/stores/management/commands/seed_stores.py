@@ -0,0 +1,128 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from reports.services import ReportsService
+from stores.models import Store
+from stores.seeding import StoreSeeder
+
+WORKER_BUSY_TIMEOUT_MS = 10 * 60 * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic stores with items, rentals, returns and a consistent stock ledger, "
+        "deterministically from a seed, one store per worker process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stores', type=int, default=1)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='seed', help="Store slugs are <prefix>-<n>")
+        parser.add_argument('--as-of', type=datetime.fromisoformat,
+                            help="End of the generated history (default: start of today, UTC)")
+        parser.add_argument('--items', type=int, default=1000, help="Mean items (SKUs) per store")
+        parser.add_argument('--items-spread', type=float, default=0.5,
+                            help="Per-store item count varies by up to this fraction")
+        parser.add_argument('--categories', type=int, default=50, help="Categories per store")
+        parser.add_argument('--rentals', type=int, default=5000, help="Rentals per store")
+        parser.add_argument('--lines', type=int, default=3, help="Most lines per rental")
+        parser.add_argument('--duration', type=int, nargs=2, default=(1, 14), metavar=('MIN', 'MAX'),
+                            help="Rental length in days")
+        parser.add_argument('--return-rate', type=float, default=0.9, help="Share of due rentals returned")
+        parser.add_argument('--damage-rate', type=float, default=0.03, help="Share of returned lines damaged")
+        parser.add_argument('--history-days', type=int, default=365)
+        parser.add_argument('--spare-stock', type=int, nargs=2, default=(0, 20), metavar=('MIN', 'MAX'),
+                            help="Units per item beyond its busiest moment")
+        parser.add_argument('--staff', type=int, default=3, help="Staff users per store, besides the owner")
+        parser.add_argument('--password', help="Password of the seeded users (default: unusable)")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rentals written per transaction")
+        parser.add_argument('--workers', type=int, help="Processes building stores (default: one per CPU)")
+        parser.add_argument('--no-reports', action='store_true', help="Skip the report refresh at the end")
+
+    def handle(self, *args, **options):
+        as_of = options['as_of']
+        if as_of is not None and as_of.tzinfo is None:
+            as_of = as_of.replace(tzinfo=dt_timezone.utc)
+        try:
+            seeder = StoreSeeder(
+                seed=options['seed'],
+                prefix=options['prefix'],
+                as_of=as_of,
+                items=options['items'],
+                items_spread=options['items_spread'],
+                categories=options['categories'],
+                rentals=options['rentals'],
+                lines=options['lines'],
+                duration=options['duration'],
+                return_rate=options['return_rate'],
+                damage_rate=options['damage_rate'],
+                history_days=options['history_days'],
+                spare_stock=options['spare_stock'],
+                staff=options['staff'],
+                password=options['password'],
+                batch_size=options['batch_size'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        indexes = range(options['stores'])
+        taken = list(Store.objects.filter(slug__in=[seeder.slug(index) for index in indexes])
+                     .values_list('slug', flat=True))
+        if taken:
+            raise CommandError(f"Stores {', '.join(sorted(taken))} already exist; pick another --prefix")
+
+        workers = min(options['workers'] or os.cpu_count() or 1, len(indexes))
+        started = time.perf_counter()
+        totals = {}
+        for summary in self._run(seeder, indexes, workers):
+            store_id = summary.pop('store_id')
+            for name, count in summary.items():
+                totals[name] = totals.get(name, 0) + count
+            self.stdout.write(
+                f"Store {store_id}: " + ', '.join(f"{count} {name.replace('_', ' ')}" for name, count in summary.items())
+            )
+
+        if not options['no_reports']:
+            folded = ReportsService.refresh()
+            self.stdout.write(f"Reports: folded {', '.join(f'{count} {source}' for source, count in folded.items())}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(indexes)} stores in {time.perf_counter() - started:.1f}s: "
+            + ', '.join(f"{count} {name.replace('_', ' ')}" for name, count in totals.items())
+        ))
+
+    def _run(self, seeder, indexes, workers):
+        if workers <= 1:
+            for index in indexes:
+                yield seeder.seed_store(index)
+            return
+
+        # Workers open their own connections; an inherited SQLite handle must not be shared.
+        # Forked children also inherit the settings as configured at runtime (e.g. a test database).
+        connections.close_all()
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_setup_worker) as pool:
+            yield from pool.map(seeder.seed_store, indexes)
+
+
+def _setup_worker():
+    """Make Django usable in a spawned worker (a no-op after fork) and let it queue for SQLite's write lock."""
+    import django
+    from django.db.backends.signals import connection_created
+
+    django.setup()
+    connection_created.connect(_wait_for_write_lock)
+
+
+def _wait_for_write_lock(sender, connection, **kwargs):
+    # Workers take turns holding the single SQLite write lock for a whole batch,
+    # far longer than the busy_timeout that suits requests
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA busy_timeout = {WORKER_BUSY_TIMEOUT_MS}')
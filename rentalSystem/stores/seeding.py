@@ -0,0 +1,365 @@
+"""
+Synthetic stores for benchmarks and for reproducing customer issues.
+
+Everything is written with ``bulk_create``, bypassing the services, so a store
+with hundreds of thousands of items and rentals takes minutes instead of hours.
+The data is still what the services would have produced:
+
+- each item's ledger is an ``initial`` entry, then ``rental`` / ``return``
+  entries at the rental's start and return times, and sums to ``Item.quantity``
+- initial stock covers the item's busiest moment, so stock is never negative
+- returned rentals have every line returned, with a return report per line;
+  open rentals are ``active`` until their due date and ``overdue`` after it
+- timestamps are spread over the history window in rental order
+- the search index and low-stock alerts are rebuilt for the store; reports are
+  left to a refresh once every store is written (``seed_stores`` runs it)
+
+A store's contents depend only on the seed and its index (and ``as_of``), not
+on which process built it or in which order. Row ids depend on the order in
+which stores were written.
+"""
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import transaction
+
+SYLLABLES = 'ka te ro mi lu pa sen dor vik tal gro ben fi nu sha mar'.split()
+TIMEZONES = ('UTC', 'Europe/London', 'America/New_York', 'Asia/Tokyo', 'Australia/Sydney')
+CENT = Decimal('0.01')
+
+
+class StoreSeeder:
+    """
+    Builds one synthetic store per call to ``seed_store``.
+
+    Ranges are inclusive ``(low, high)`` pairs, drawn uniformly.
+
+    Args:
+        seed: Seed of every random choice
+        prefix: Store slugs are ``<prefix>-<index>``; usernames start with the slug
+        as_of: "Now" of the generated history (defaults to the start of today, UTC)
+        items: Mean number of items (SKUs) per store
+        items_spread: Per-store item count varies by up to this fraction of ``items``
+        categories: Categories per store
+        rentals: Rentals per store
+        lines: Most lines per rental; items are picked with a Zipf-like popularity
+        duration: Rental length in days
+        return_rate: Chance that a rental is returned once it is due
+        damage_rate: Chance that a returned line is reported damaged
+        history_days: Days of history before ``as_of``
+        spare_stock: Units on hand per item beyond its busiest moment
+        staff: Staff members per store, besides the owner
+        password: Password of the seeded users; unusable if None
+        batch_size: Rentals written per transaction
+    """
+
+    def __init__(self, *, seed: int = 0, prefix: str = 'seed', as_of=None, items: int = 1000,
+                 items_spread: float = 0.5, categories: int = 50, rentals: int = 5000, lines: int = 3,
+                 duration=(1, 14), return_rate: float = 0.9, damage_rate: float = 0.03,
+                 history_days: int = 365, spare_stock=(0, 20), staff: int = 3, password=None,
+                 batch_size: int = 5000):
+        for name, rate in (('items_spread', items_spread), ('return_rate', return_rate),
+                           ('damage_rate', damage_rate)):
+            if not 0 <= rate <= 1:
+                raise ValueError(f"{name} must be between 0 and 1")
+        for name, (low, high) in (('duration', duration), ('spare_stock', spare_stock)):
+            if low > high:
+                raise ValueError(f"{name} range is empty")
+        if duration[0] < 1:
+            raise ValueError("Rentals must last at least a day")
+        if items < 1 or lines < 1 or history_days < 1 or batch_size < 1:
+            raise ValueError("items, lines, history_days and batch_size must be positive")
+        if min(categories, rentals, staff, spare_stock[0]) < 0:
+            raise ValueError("categories, rentals, staff and spare_stock cannot be negative")
+
+        if as_of is None:
+            as_of = datetime.combine(datetime.now(dt_timezone.utc).date(), time(), tzinfo=dt_timezone.utc)
+        self.seed = seed
+        self.prefix = prefix
+        self.as_of = as_of
+        self.items = items
+        self.items_spread = items_spread
+        self.categories = categories
+        self.rentals = rentals
+        self.lines = lines
+        self.duration = tuple(duration)
+        self.return_rate = return_rate
+        self.damage_rate = damage_rate
+        self.history_days = history_days
+        self.spare_stock = tuple(spare_stock)
+        self.staff = staff
+        self.password = password
+        self.batch_size = batch_size
+
+    def slug(self, index: int) -> str:
+        return f'{self.prefix}-{index}'
+
+    def seed_store(self, index: int) -> dict:
+        """
+        Create store number ``index`` with its users, catalogue, rentals and ledger.
+
+        Returns:
+            Dict of row counts written, plus ``store_id``.
+        """
+        rng = random.Random(f'{self.seed}:{index}')
+        started = self.as_of - timedelta(days=self.history_days)
+        words = sorted({a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES})
+
+        # Plan everything first: initial stock depends on every rental of the item
+        catalogue = self._plan_catalogue(rng, words)
+        rentals = self._plan_rentals(rng, started, catalogue)
+        quantities = _stock_plan(catalogue, rentals, rng, self.spare_stock)
+
+        with _explicit_timestamps():
+            store, users = self._write_store(rng, index, started)
+            items = self._write_catalogue(store, catalogue, quantities, started)
+            counts = self._write_rentals(store, users, items, rentals)
+        self._refresh_derived(store)
+        counts['ledger_entries'] += sum(1 for initial, _ in quantities if initial)
+        return {'store_id': store.id, 'items': len(items), 'categories': len(catalogue['categories']), **counts}
+
+    # Planning
+
+    def _plan_catalogue(self, rng, words):
+        spread = round(self.items * self.items_spread)
+        count = max(1, self.items + rng.randint(-spread, spread))
+        categories = [f'{rng.choice(words).title()} {i}' for i in range(self.categories)]
+        items = []
+        for i in range(count):
+            price = Decimal(rng.randint(500, 50_000)) / 100
+            items.append({
+                'name': f"{' '.join(rng.choices(words, k=rng.randint(1, 3))).title()} {i}",
+                'sku': f'SKU{i:07d}',
+                'description': ' '.join(rng.choices(words, k=rng.randint(0, 12))),
+                'category': rng.randrange(len(categories)) if categories and rng.random() < 0.9 else None,
+                'price': price,
+                # 2-10% of the price per day
+                'rental_rate': (price * rng.randint(2, 10) / 100).quantize(CENT),
+            })
+        # A few items get most rentals: weight 1/rank, over a shuffled order
+        popularity = list(range(count))
+        rng.shuffle(popularity)
+        weights, total = [], 0.0
+        for rank in range(count):
+            total += 1 / (rank + 1)
+            weights.append(total)
+        return {'categories': categories, 'items': items, 'popularity': popularity, 'weights': weights}
+
+    def _plan_rentals(self, rng, started, catalogue):
+        """Rentals in start order as dicts; returned ones carry ``returned_at``."""
+        window = (self.as_of - started).total_seconds()
+        starts = sorted(started + timedelta(seconds=rng.uniform(0, window)) for _ in range(self.rentals))
+        popularity, weights = catalogue['popularity'], catalogue['weights']
+        rentals = []
+        for start in starts:
+            days = rng.randint(*self.duration)
+            due_date = start.date() + timedelta(days=days)
+            # Back a day early up to three days late, during opening hours
+            back = datetime.combine(due_date + timedelta(days=rng.randint(-1, 3)), time(), tzinfo=dt_timezone.utc)
+            back = max(back + timedelta(hours=rng.uniform(8, 20)), start + timedelta(hours=1))
+            returned_at = back if back <= self.as_of and rng.random() < self.return_rate else None
+
+            picked = dict.fromkeys(
+                popularity[position]
+                for position in rng.choices(range(len(popularity)), cum_weights=weights, k=rng.randint(1, self.lines))
+            )
+            lines = []
+            for item in picked:
+                lines.append({
+                    'item': item,
+                    'qty': rng.choice((1, 1, 1, 2, 3)),
+                    'per_day': catalogue['items'][item]['rental_rate'],
+                    'damage_cost': (
+                        Decimal(rng.randint(100, int(catalogue['items'][item]['price'] * 100))) / 100
+                        if returned_at and rng.random() < self.damage_rate else None
+                    ),
+                })
+            rentals.append({
+                'start': start,
+                'due_date': due_date,
+                'days': days,
+                'returned_at': returned_at,
+                'customer': f'Customer {rng.randint(1, max(1, self.rentals // 3))}',
+                'staff': rng.randint(0, self.staff),
+                'lines': lines,
+            })
+        return rentals
+
+    # Writing
+
+    def _write_store(self, rng, index, started):
+        from django.contrib.auth.hashers import make_password
+        from accounts.models import StoreUser, User
+        from stores.models import Store
+
+        slug = self.slug(index)
+        store = Store.objects.create(
+            name=f'{self.prefix.title()} Store {index}', slug=slug, timezone=rng.choice(TIMEZONES),
+            created_at=started, updated_at=started,
+        )
+        password = make_password(self.password)
+        users = User.objects.bulk_create([
+            User(username=f'{slug}-{role}', password=password, date_joined=started)
+            for role in ['owner', *(f'staff{i}' for i in range(1, self.staff + 1))]
+        ])
+        StoreUser.objects.bulk_create([
+            StoreUser(user=user, store=store, role=StoreUser.ROLE_OWNER if i == 0 else StoreUser.ROLE_STAFF,
+                      created_at=started, updated_at=started)
+            for i, user in enumerate(users)
+        ])
+        return store, users
+
+    def _write_catalogue(self, store, catalogue, quantities, started):
+        from inventory.models import Category, InventoryTransaction, Item
+
+        with transaction.atomic():
+            categories = Category.objects.bulk_create(
+                [Category(store=store, name=name) for name in catalogue['categories']], batch_size=self.batch_size,
+            )
+            items = Item.objects.bulk_create([
+                Item(
+                    store=store,
+                    category=categories[plan['category']] if plan['category'] is not None else None,
+                    name=plan['name'],
+                    sku=plan['sku'],
+                    description=plan['description'],
+                    price=plan['price'],
+                    rental_rate=plan['rental_rate'],
+                    quantity=quantities[i][1],
+                    created_at=started,
+                    updated_at=started,
+                )
+                for i, plan in enumerate(catalogue['items'])
+            ], batch_size=self.batch_size)
+            # As create_item: no entry for an item created without stock
+            InventoryTransaction.objects.bulk_create([
+                InventoryTransaction(item=item, delta=quantities[i][0], reason=InventoryTransaction.REASON_INITIAL,
+                                     created_at=started)
+                for i, item in enumerate(items)
+                if quantities[i][0]
+            ], batch_size=self.batch_size)
+        return items
+
+    def _write_rentals(self, store, users, items, rentals):
+        from inventory.models import InventoryTransaction
+        from rentals.models import Rental, RentalItem, ReturnReport
+
+        today = self.as_of.date()
+        counts = dict.fromkeys(('rentals', 'lines', 'return_reports', 'ledger_entries'), 0)
+        for offset in range(0, len(rentals), self.batch_size):
+            batch = rentals[offset:offset + self.batch_size]
+            with transaction.atomic():
+                created = Rental.objects.bulk_create([
+                    Rental(
+                        store=store,
+                        created_by=users[plan['staff']],
+                        customer_name=plan['customer'],
+                        start_date=plan['start'],
+                        starts_on=plan['start'].date(),
+                        due_date=plan['due_date'],
+                        returned_date=plan['returned_at'],
+                        status=(
+                            Rental.STATUS_RETURNED if plan['returned_at']
+                            else Rental.STATUS_ACTIVE if plan['due_date'] >= today
+                            else Rental.STATUS_OVERDUE
+                        ),
+                        total=sum(line['per_day'] * line['qty'] * plan['days'] for line in plan['lines']),
+                        updated_at=plan['returned_at'] or plan['start'],
+                    )
+                    for plan in batch
+                ])
+                lines = RentalItem.objects.bulk_create([
+                    RentalItem(
+                        rental=rental, item=items[line['item']], qty=line['qty'], per_day=line['per_day'],
+                        returned_qty=line['qty'] if plan['returned_at'] else 0,
+                    )
+                    for rental, plan in zip(created, batch)
+                    for line in plan['lines']
+                ])
+                reports, ledger = [], []
+                rental_items = iter(lines)
+                for rental, plan in zip(created, batch):
+                    for line in plan['lines']:
+                        rental_item = next(rental_items)
+                        ledger.append(InventoryTransaction(
+                            item_id=rental_item.item_id, delta=-line['qty'], actor=rental.created_by,
+                            reason=InventoryTransaction.REASON_RENTAL, created_at=plan['start'],
+                        ))
+                        if plan['returned_at'] is None:
+                            continue
+                        ledger.append(InventoryTransaction(
+                            item_id=rental_item.item_id, delta=line['qty'], actor=rental.created_by,
+                            reason=InventoryTransaction.REASON_RETURN, created_at=plan['returned_at'],
+                        ))
+                        damaged = line['damage_cost'] is not None
+                        reports.append(ReturnReport(
+                            rental_item=rental_item,
+                            returned_at=plan['returned_at'],
+                            notes=f"Condition: {'damaged' if damaged else 'good'}",
+                            damage_cost=line['damage_cost'] if damaged else 0,
+                        ))
+                ReturnReport.objects.bulk_create(reports)
+                InventoryTransaction.objects.bulk_create(ledger)
+            counts['rentals'] += len(created)
+            counts['lines'] += len(lines)
+            counts['return_reports'] += len(reports)
+            counts['ledger_entries'] += len(ledger)
+        return counts
+
+    def _refresh_derived(self, store):
+        """Search index and low-stock alerts; bulk writes skip the signals and services that keep them."""
+        from inventory import search
+        from inventory.services import InventoryService
+
+        # One write transaction: rebuild reads through an iterator while it writes, and in autocommit a
+        # read snapshot that another store's writer has moved past cannot be upgraded to a write
+        with transaction.atomic():
+            search.rebuild(store=store)
+        InventoryService.reconcile_low_stock(items=store.items.all())
+
+
+def _stock_plan(catalogue, rentals, rng, spare_stock):
+    """(initial stock, final quantity) per item: enough for its busiest moment plus spare units."""
+    events = []
+    for plan in rentals:
+        for line in plan['lines']:
+            events.append((plan['start'], -line['qty'], line['item']))
+            if plan['returned_at']:
+                events.append((plan['returned_at'], line['qty'], line['item']))
+    # At equal times take stock out before putting it back, which can only overestimate the peak
+    events.sort(key=lambda event: (event[0], event[1]))
+
+    out = [0] * len(catalogue['items'])
+    peak = [0] * len(catalogue['items'])
+    for _, delta, item in events:
+        out[item] -= delta
+        if out[item] > peak[item]:
+            peak[item] = out[item]
+    plan = []
+    for item in range(len(catalogue['items'])):
+        initial = peak[item] + rng.randint(*spare_stock)
+        plan.append((initial, initial - out[item]))
+    return plan
+
+
+@contextmanager
+def _explicit_timestamps():
+    """Let the seeded models' ``auto_now`` / ``auto_now_add`` fields be set, to backdate the history."""
+    from accounts.models import StoreUser
+    from inventory.models import InventoryTransaction, Item
+    from rentals.models import Rental, ReturnReport
+    from stores.models import Store
+
+    switched = []
+    for model in (Store, StoreUser, Item, InventoryTransaction, Rental, ReturnReport):
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                switched.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in switched:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidate_store
+from .models import Store
+
+
+@receiver([post_save, post_delete], sender=Store)
+def invalidate_store_access_cache(sender, instance, **kwargs):
+    invalidate_store(instance.pk)
@@ -1,3 +1,92 @@
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import CommandError, call_command
 from django.test import TestCase
 
-# Create your tests here.
+from inventory.models import InventoryTransaction, Item
+from rentals.models import Rental, RentalItem, ReturnReport
+from stores.models import Store
+from stores.seeding import StoreSeeder
+
+AS_OF = datetime(2025, 6, 1, tzinfo=dt_timezone.utc)
+
+
+class StoreSeederTestCase(TestCase):
+    def seed(self, **options):
+        options = {'seed': 7, 'as_of': AS_OF, 'items': 30, 'categories': 5, 'rentals': 300, 'history_days': 60,
+                   'damage_rate': 0.2, 'batch_size': 70, **options}
+        seeder = StoreSeeder(**options)
+        summary = seeder.seed_store(0)
+        return Store.objects.get(id=summary['store_id']), summary
+
+    def test_ledger_sums_to_quantity_and_never_goes_negative(self):
+        store, summary = self.seed()
+
+        items = {item.id: item.quantity for item in Item.objects.filter(store=store)}
+        running = dict.fromkeys(items, 0)
+        ledger = InventoryTransaction.objects.filter(item__store=store).order_by('created_at', 'id')
+        for item_id, delta in ledger.values_list('item_id', 'delta'):
+            running[item_id] += delta
+            self.assertGreaterEqual(running[item_id], 0)
+        self.assertEqual(running, items)
+        self.assertEqual(ledger.count(), summary['ledger_entries'])
+
+    def test_rentals_are_returned_or_open(self):
+        store, summary = self.seed()
+
+        rentals = Rental.objects.filter(store=store)
+        self.assertEqual(rentals.count(), 300)
+        self.assertEqual(set(rentals.values_list('status', flat=True)),
+                         {Rental.STATUS_RETURNED, Rental.STATUS_ACTIVE, Rental.STATUS_OVERDUE})
+        for rental in rentals.prefetch_related('items__return_reports'):
+            self.assertTrue(AS_OF.replace(month=4) < rental.start_date < AS_OF)
+            returned = rental.status == Rental.STATUS_RETURNED
+            self.assertEqual(rental.returned_date is not None, returned)
+            if rental.status != Rental.STATUS_RETURNED:
+                self.assertEqual(rental.status == Rental.STATUS_OVERDUE, rental.due_date < AS_OF.date())
+            for line in rental.items.all():
+                self.assertEqual(line.returned_qty, line.qty if returned else 0)
+                self.assertEqual(len(line.return_reports.all()), 1 if returned else 0)
+        damaged = ReturnReport.objects.filter(rental_item__rental__store=store, damage_cost__gt=0)
+        self.assertTrue(damaged.exists())
+        self.assertFalse(damaged.exclude(notes='Condition: damaged').exists())
+        self.assertEqual(RentalItem.objects.filter(rental__store=store).count(), summary['lines'])
+
+    def test_same_seed_gives_the_same_store(self):
+        def contents(store):
+            return (
+                list(Item.objects.filter(store=store).order_by('sku').values_list('sku', 'name', 'quantity', 'price')),
+                list(Rental.objects.filter(store=store).order_by('start_date').values_list(
+                    'customer_name', 'start_date', 'due_date', 'status', 'total',
+                )),
+            )
+
+        first, _ = self.seed(prefix='first')
+        second, _ = self.seed(prefix='second')
+        other, _ = self.seed(prefix='other', seed=8)
+
+        self.assertEqual(contents(first), contents(second))
+        self.assertNotEqual(contents(first), contents(other))
+
+    def test_invalid_distributions(self):
+        for options in ({'return_rate': 1.5}, {'duration': (5, 2)}, {'duration': (0, 3)}, {'items': 0}):
+            with self.subTest(options=options), self.assertRaises(ValueError):
+                StoreSeeder(**options)
+
+
+class SeedStoresCommandTestCase(TestCase):
+    def test_seeds_stores_and_reports(self):
+        from reports.models import DailyStoreStats
+
+        out = StringIO()
+        call_command('seed_stores', stores=2, workers=1, items=10, categories=2, rentals=50, as_of=AS_OF, stdout=out)
+
+        self.assertEqual(list(Store.objects.order_by('slug').values_list('slug', flat=True)), ['seed-0', 'seed-1'])
+        self.assertTrue(DailyStoreStats.objects.exists())
+        self.assertIn('Seeded 2 stores', out.getvalue())
+
+        with self.assertRaisesMessage(CommandError, 'seed-0, seed-1 already exist'):
+            call_command('seed_stores', stores=2, workers=1, stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, 'damage_rate'):
+            call_command('seed_stores', prefix='other', damage_rate=2, stdout=StringIO())